@@ -1,11 +1,25 @@
 from datetime import timedelta, datetime
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Body, Path
+from typing import Annotated, Optional
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Body,
+    Path,
+    UploadFile,
+    File,
+)
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
 from starlette import status
-from database import db_dependency, get_db
-from models import Users, Orders
+from starlette.concurrency import run_in_threadpool
+from database import db_dependency, get_db, SessionLocal
+from cache import TTLCache
+from models import Favorite, Orders, Products, Review, RevokedToken, Users
+import ratings
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from pydantic_models import (
@@ -19,6 +33,9 @@ from pydantic_models import (
     EmailVerificationRequest,
     ResendVerificationRequest,
     EmailVerificationResponse,
+    RefreshTokenRequest,
+    LogoutRequest,
+    BulkUserRow,
 )
 
 # from main import create_user_model
@@ -26,16 +43,22 @@ from passlib.context import CryptContext
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 import os
 from dotenv import load_dotenv
+import asyncio
+import csv
+import hashlib
+import io
+import json
 import logging
 import secrets
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 load_dotenv()
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -44,6 +67,24 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-default-secure-key")
 ALGORITHM = "HS256"
 
+# Access tokens are short-lived; clients renew them with a refresh token
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+# Single-use tickets for URLs that cannot carry an Authorization header (SSE)
+STREAM_TICKET_EXPIRE_SECONDS = int(os.getenv("STREAM_TICKET_EXPIRE_SECONDS", "30"))
+# How often each worker pulls revocations made by other workers
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "30"))
+# Profile fields served by /me and the superadmin user lookup
+USER_PROFILE_CACHE_TTL = int(os.getenv("USER_PROFILE_CACHE_TTL", "60"))
+# Expired verification/reset tokens are cleared in batches by sweep_expired_tokens
+TOKEN_SWEEP_INTERVAL_SECONDS = int(os.getenv("TOKEN_SWEEP_INTERVAL_SECONDS", "3600"))
+TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("TOKEN_SWEEP_BATCH_SIZE", "500"))
+# Bulk user import limits
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "5000"))
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "500"))
+BULK_IMPORT_MAX_BYTES = int(os.getenv("BULK_IMPORT_MAX_BYTES", str(5 * 1024 * 1024)))
+BULK_HASH_WORKERS = int(os.getenv("BULK_HASH_WORKERS", str(os.cpu_count() or 2)))
+
 # Frontend base URL for email links
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
 
@@ -84,6 +125,62 @@ def generate_verification_token():
     return secrets.token_urlsafe(32)
 
 
+def hash_token(token: str) -> str:
+    """SHA-256 digest stored in the database in place of the emailed token"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _clear_expired(db: Session, token_column, expires_column, batch_size: int):
+    """Null out expired token/expiry pairs, one batch of rows per commit"""
+    cleared = 0
+    while True:
+        ids = [
+            row[0]
+            for row in db.query(Users.id)
+            .filter(expires_column < datetime.utcnow())
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            return cleared
+        db.query(Users).filter(Users.id.in_(ids)).update(
+            {token_column: None, expires_column: None}, synchronize_session=False
+        )
+        db.commit()
+        cleared += len(ids)
+
+
+def sweep_expired_tokens(batch_size: int = TOKEN_SWEEP_BATCH_SIZE):
+    """Clear expired verification/reset tokens and prune expired revocations"""
+    db = SessionLocal()
+    try:
+        verification = _clear_expired(
+            db, Users.verification_token, Users.verification_expires, batch_size
+        )
+        reset = _clear_expired(
+            db, Users.reset_token, Users.reset_token_expires, batch_size
+        )
+        revoked = (
+            db.query(RevokedToken)
+            .filter(RevokedToken.expires_at < datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        if verification or reset or revoked:
+            logger.info(
+                "Token sweep cleared %s verification, %s reset and %s revoked tokens",
+                verification,
+                reset,
+                revoked,
+            )
+        return {"verification": verification, "reset": reset, "revoked": revoked}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 def send_verification_email(email: str, username: str, token: str):
     """Send verification email using SMTP"""
     try:
@@ -147,10 +244,10 @@ def send_verification_email(email: str, username: str, token: str):
         server.sendmail(MAIL_FROM, email, text)
         server.quit()
 
-        logger.info(f"Verification email sent to {email}")
+        logger.info("Verification email sent to %s", email)
         return True
     except Exception as e:
-        logger.error(f"Failed to send verification email to {email}: {str(e)}")
+        logger.error("Failed to send verification email to %s: %s", email, e)
         return False
 
 
@@ -205,10 +302,10 @@ def send_order_confirmation_email(email: str, username: str, order: dict):
         server.login(MAIL_USERNAME, MAIL_PASSWORD)
         server.sendmail(MAIL_FROM, email, msg.as_string())
         server.quit()
-        logger.info(f"Order confirmation email sent to {email}")
+        logger.info("Order confirmation email sent to %s", email)
         return True
     except Exception as e:
-        logger.error(f"Failed to send order confirmation email to {email}: {str(e)}")
+        logger.error("Failed to send order confirmation email to %s: %s", email, e)
         return False
 
 
@@ -237,13 +334,36 @@ def send_admin_new_order_notification(order: dict):
         server.login(MAIL_USERNAME, MAIL_PASSWORD)
         server.sendmail(MAIL_FROM, MAIL_FROM, msg.as_string())
         server.quit()
-        logger.info(f"Admin notification email sent for order {order['order_id']}")
+        logger.info("Admin notification email sent for order %s", order["order_id"])
         return True
     except Exception as e:
-        logger.error(f"Failed to send admin notification email: {str(e)}")
+        logger.error("Failed to send admin notification email: %s", e)
         return False
 
 
+user_profile_cache = TTLCache(ttl=USER_PROFILE_CACHE_TTL, maxsize=10000)
+
+
+def get_user_profile(db: Session, user_id: int):
+    """Return a user's profile fields, served from a short-lived cache"""
+    profile = user_profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+    user = db.query(Users).filter(Users.id == user_id).first()
+    if not user:
+        return None
+    profile = {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "role": get_user_role(user.role),
+        "is_verified": user.is_verified,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+    user_profile_cache.set(user_id, profile)
+    return profile
+
+
 # User creation helper
 def create_user_model(user_request, role: Role, db: Session):
     """Helper function to create user with proper error handling"""
@@ -273,7 +393,9 @@ def create_user_model(user_request, role: Role, db: Session):
             hashed_password=bcrypt_context.hash(user_request.password),
             role=role.value,
             is_verified=is_verified,
-            verification_token=verification_token,
+            verification_token=(
+                hash_token(verification_token) if verification_token else None
+            ),
             verification_expires=(
                 datetime.utcnow() + timedelta(hours=24) if verification_token else None
             ),
@@ -289,16 +411,110 @@ def create_user_model(user_request, role: Role, db: Session):
             )
             if not email_sent:
                 logger.warning(
-                    f"Failed to send verification email to {user_request.email}"
+                    "Failed to send verification email to %s", user_request.email
                 )
 
         return user_model
     except Exception as e:
         db.rollback()
-        logger.error(f"Error creating {role.value}: {str(e)}")
+        logger.error("Error creating %s: %s", role.value, e)
         raise HTTPException(status_code=500, detail=f"Failed to create {role.value}")
 
 
+_hashing_pool = None
+
+
+def _get_hashing_pool():
+    """Process pool for bcrypt, created on first bulk import"""
+    global _hashing_pool
+    if _hashing_pool is None:
+        _hashing_pool = ProcessPoolExecutor(max_workers=BULK_HASH_WORKERS)
+    return _hashing_pool
+
+
+def _hash_passwords(passwords):
+    """Hash a chunk of passwords (runs in a worker process)"""
+    return [bcrypt_context.hash(password) for password in passwords]
+
+
+async def hash_passwords_parallel(passwords):
+    """bcrypt-hash passwords across the process pool, preserving order"""
+    if not passwords:
+        return []
+    chunk_size = max(1, -(-len(passwords) // BULK_HASH_WORKERS))
+    chunks = [
+        passwords[i : i + chunk_size] for i in range(0, len(passwords), chunk_size)
+    ]
+    loop = asyncio.get_running_loop()
+    pool = _get_hashing_pool()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(pool, _hash_passwords, chunk) for chunk in chunks)
+    )
+    return [hashed for chunk in results for hashed in chunk]
+
+
+def send_verification_emails(recipients):
+    """Send queued verification emails (runs as a background task)"""
+    for email, username, token in recipients:
+        send_verification_email(email, username, token)
+
+
+class _CappedReader(io.RawIOBase):
+    """Binary reader over ``stream`` that fails once ``limit`` bytes are passed"""
+
+    def __init__(self, stream, limit: int):
+        self._stream = stream
+        self._limit = limit
+        self._size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        self._size += len(data)
+        if self._size > self._limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds {BULK_IMPORT_MAX_BYTES // (1024 * 1024)}MB limit",
+            )
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _too_many_rows():
+    return HTTPException(
+        status_code=400,
+        detail=f"At most {BULK_IMPORT_MAX_ROWS} users can be imported at once",
+    )
+
+
+def parse_bulk_user_file(filename: str, stream):
+    """Parse an uploaded CSV or JSON user list into a list of dicts.
+
+    The file is read incrementally and parsing stops as soon as it passes
+    BULK_IMPORT_MAX_BYTES or BULK_IMPORT_MAX_ROWS, so an oversized upload
+    is never loaded whole. Blocking; run it in the threadpool.
+    """
+    reader = io.BufferedReader(_CappedReader(stream, BULK_IMPORT_MAX_BYTES))
+    if filename.lower().endswith(".json"):
+        rows = json.loads(reader.read().decode("utf-8-sig"))
+        if isinstance(rows, dict):
+            rows = rows.get("users", [])
+        if not isinstance(rows, list):
+            raise ValueError("JSON must be a list of users or {'users': [...]}")
+        if len(rows) > BULK_IMPORT_MAX_ROWS:
+            raise _too_many_rows()
+        return rows
+    rows = []
+    text = io.TextIOWrapper(reader, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text):
+        if len(rows) == BULK_IMPORT_MAX_ROWS:
+            raise _too_many_rows()
+        rows.append(row)
+    return rows
+
+
 def authenticate_user(email: str, password: str, db: Session):
     """Authenticate user by email and password"""
     user = db.query(Users).filter(Users.email == email).first()
@@ -309,33 +525,197 @@ def authenticate_user(email: str, password: str, db: Session):
     return user
 
 
+class TokenRevocationList:
+    """Revoked token ids persisted in the database and mirrored in memory.
+
+    The hot path (``is_revoked``) is a dict lookup. Revocations made by other
+    workers are picked up by ``sync``, which only reads rows newer than the
+    last sync.
+    """
+
+    def __init__(self):
+        self._revoked = {}  # jti -> expires_at
+        self._last_sync = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def revoke(
+        self,
+        db: Session,
+        jti: str,
+        expires_at: datetime,
+        token_type: str,
+        user_id: int = None,
+    ):
+        """Persist a revocation and add it to the in-memory set.
+
+        Returns False when the token was already revoked, including by a
+        concurrent request that committed the same ``jti`` first.
+        """
+        if jti in self._revoked:
+            return False
+        db.add(
+            RevokedToken(
+                jti=jti,
+                token_type=token_type,
+                user_id=user_id,
+                expires_at=expires_at,
+            )
+        )
+        try:
+            db.commit()
+            revoked = True
+        except IntegrityError:
+            db.rollback()
+            revoked = False
+        with self._lock:
+            self._revoked[jti] = expires_at
+        return revoked
+
+    def sync(self, db: Session):
+        """Load revocations recorded since the last sync and drop expired ones"""
+        now = datetime.utcnow()
+        query = db.query(RevokedToken.jti, RevokedToken.expires_at).filter(
+            RevokedToken.expires_at > now
+        )
+        if self._last_sync is not None:
+            # Overlap slightly so rows committed during the last sync are not missed
+            query = query.filter(
+                RevokedToken.revoked_at >= self._last_sync - timedelta(seconds=5)
+            )
+        rows = query.all()
+        with self._lock:
+            for jti, expires_at in rows:
+                self._revoked[jti] = expires_at
+            self._revoked = {
+                jti: exp for jti, exp in self._revoked.items() if exp > now
+            }
+            self._last_sync = now
+        return len(rows)
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revocation_list = TokenRevocationList()
+
+
+def sync_revocation_list():
+    """Refresh the in-memory revocation list from the database"""
+    db = SessionLocal()
+    try:
+        return revocation_list.sync(db)
+    finally:
+        db.close()
+
+
 def create_access_token(
-    username: str, user_id: int, role: str, expires_delta: timedelta
+    username: str, user_id: int, role: str, expires_delta: timedelta = None
 ):
     """Create JWT access token"""
-    encode = {"sub": username, "id": user_id, "role": role}
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    encode = {
+        "sub": username,
+        "id": user_id,
+        "role": role,
+        "type": "access",
+        "jti": uuid.uuid4().hex,
+    }
     expires = datetime.utcnow() + expires_delta
     encode.update({"exp": expires})
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_active_user(token: Annotated[str, Depends(oauth2_bearer)]):
-    """Get current active user from JWT token"""
+def create_refresh_token(username: str, user_id: int, role: str):
+    """Create JWT refresh token"""
+    encode = {
+        "sub": username,
+        "id": user_id,
+        "role": role,
+        "type": "refresh",
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    }
+    return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def create_stream_ticket(user_id: int, role: str, scope: str):
+    """Create a short-lived ticket for one stream, e.g. scope "order:42".
+
+    EventSource cannot send headers, so the ticket goes in the query string;
+    it is useless once redeemed or after STREAM_TICKET_EXPIRE_SECONDS, unlike
+    an access token that ends up in access logs.
+    """
+    encode = {
+        "id": user_id,
+        "role": role,
+        "type": "ticket",
+        "scope": scope,
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.utcnow() + timedelta(seconds=STREAM_TICKET_EXPIRE_SECONDS),
+    }
+    return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def redeem_stream_ticket(db: Session, ticket: str, scope: str):
+    """Validate a ticket for ``scope`` and revoke it so it cannot be reused"""
+    payload = decode_token(ticket, expected_type="ticket")
+    if payload.get("scope") != scope:
+        raise HTTPException(status_code=401, detail="Invalid ticket")
+    if not revocation_list.revoke(
+        db,
+        payload["jti"],
+        datetime.utcfromtimestamp(payload["exp"]),
+        "ticket",
+        payload.get("id"),
+    ):
+        raise HTTPException(status_code=401, detail="Ticket has already been used")
+    return payload
+
+
+def create_token_pair(username: str, user_id: int, role: str):
+    """Issue a short-lived access token together with a refresh token"""
+    return {
+        "access_token": create_access_token(username, user_id, role),
+        "refresh_token": create_refresh_token(username, user_id, role),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def decode_token(token: str, expected_type: str = "access"):
+    """Decode a JWT, enforcing its type and the revocation list"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        user_id: int = payload.get("id")
-        role: str = payload.get("role")
-        if username is None or user_id is None or role is None:
-            raise HTTPException(status_code=401, detail="Could not validate user")
-        return {"username": username, "id": user_id, "role": role}
     except jwt.ExpiredSignatureError:
         logger.warning("Token expired")
         raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.DecodeError:
+    except jwt.InvalidTokenError:
         logger.warning("Invalid token")
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    # Tokens issued before refresh tokens existed carry no type and are access tokens
+    if payload.get("type", "access") != expected_type:
+        raise HTTPException(status_code=401, detail="Invalid token type")
+    jti = payload.get("jti")
+    if jti and revocation_list.is_revoked(jti):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return payload
+
+
+async def get_active_user(token: Annotated[str, Depends(oauth2_bearer)]):
+    """Get current active user from JWT token"""
+    payload = decode_token(token)
+    username: str = payload.get("sub")
+    user_id: int = payload.get("id")
+    role: str = payload.get("role")
+    if username is None or user_id is None or role is None:
+        raise HTTPException(status_code=401, detail="Could not validate user")
+    return {"username": username, "id": user_id, "role": role}
+
 
 def require_any_authenticated(current_user: dict = Depends(get_active_user)):
     """Dependency to ensure user is authenticated (any role)"""
@@ -372,7 +752,7 @@ def require_admin_or_above(current_user: dict = Depends(get_active_user)):
 @router.post("/login", response_model=Token)
 async def login(form_data: LoginUserRequest, db: db_dependency):
     """User login endpoint - Works for all roles"""
-    logger.info(f"Login attempt for email: {form_data.email}")
+    logger.info("Login attempt for email: %s", form_data.email)
     user = authenticate_user(form_data.email, form_data.password, db)
 
     # Check if customer account is verified
@@ -383,16 +763,73 @@ async def login(form_data: LoginUserRequest, db: db_dependency):
         )
 
     user_role = get_user_role(user.role)
-    token = create_access_token(user.username, user.id, user_role, timedelta(hours=6))
-    logger.info(f"User {user.username} logged in successfully with role: {user_role}")
+    tokens = create_token_pair(user.username, user.id, user_role)
+    logger.info(
+        "User %s logged in successfully with role: %s", user.username, user_role
+    )
     return {
-        "access_token": token,
-        "token_type": "bearer",
+        **tokens,
         "user_role": user_role,
         "username": user.username,
     }
 
 
+@router.post("/refresh", response_model=Token)
+async def refresh_tokens(request: RefreshTokenRequest, db: db_dependency):
+    """Rotate a refresh token: revoke it and issue a new token pair"""
+    payload = decode_token(request.refresh_token, expected_type="refresh")
+    user = db.query(Users).filter(Users.id == payload.get("id")).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="Could not validate user")
+
+    # Single use: a replayed refresh token is rejected by the revocation list,
+    # and of two concurrent refreshes only the one that records it first wins
+    if not revocation_list.revoke(
+        db,
+        payload["jti"],
+        datetime.utcfromtimestamp(payload["exp"]),
+        "refresh",
+        user.id,
+    ):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    user_role = get_user_role(user.role)
+    return create_token_pair(user.username, user.id, user_role)
+
+
+@router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(
+    db: db_dependency,
+    token: Annotated[str, Depends(oauth2_bearer)],
+    request: Optional[LogoutRequest] = None,
+):
+    """Revoke the current access token and, if given, its refresh token"""
+    payload = decode_token(token)
+    if payload.get("jti"):
+        revocation_list.revoke(
+            db,
+            payload["jti"],
+            datetime.utcfromtimestamp(payload["exp"]),
+            "access",
+            payload.get("id"),
+        )
+    if request and request.refresh_token:
+        try:
+            refresh_payload = decode_token(
+                request.refresh_token, expected_type="refresh"
+            )
+        except HTTPException:
+            refresh_payload = None  # Already expired or revoked
+        if refresh_payload and refresh_payload.get("id") == payload.get("id"):
+            revocation_list.revoke(
+                db,
+                refresh_payload["jti"],
+                datetime.utcfromtimestamp(refresh_payload["exp"]),
+                "refresh",
+                refresh_payload.get("id"),
+            )
+    return {"message": "Logged out successfully"}
+
+
 @router.post(
     "/verify-token",
     response_model=TokenVerificationResponse,
@@ -400,22 +837,12 @@ async def login(form_data: LoginUserRequest, db: db_dependency):
 )
 async def verify_token(request_body: TokenVerifyRequest):
     """Verify JWT token validity"""
-    try:
-        payload = jwt.decode(request_body.token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        user_role: str = payload.get("role")
-        exp_timestamp = float(payload["exp"])
-        exp_datetime = datetime.fromtimestamp(exp_timestamp)
-
-        if exp_datetime < datetime.utcnow():
-            logger.warning("Token expired during verification")
-            raise HTTPException(status_code=401, detail="Token expired")
-
-        logger.info(f"Token verified for user: {username} with role: {user_role}")
-        return {"username": username, "tokenverification": "success", "role": user_role}
-    except jwt.DecodeError:
-        logger.warning("Invalid token during verification")
-        raise HTTPException(status_code=401, detail="Invalid token")
+    payload = decode_token(request_body.token)
+    username: str = payload.get("sub")
+    user_role: str = payload.get("role")
+
+    logger.info("Token verified for user: %s with role: %s", username, user_role)
+    return {"username": username, "tokenverification": "success", "role": user_role}
 
 
 @router.post("/superadmin/create-admin", status_code=status.HTTP_201_CREATED)
@@ -426,11 +853,15 @@ async def create_admin_by_superadmin(
 ):
     """Create an admin user - only accessible by superadmins"""
     logger.info(
-        f"Superadmin {current_user['username']} creating admin: {create_admin_request.username}"
+        "Superadmin %s creating admin: %s",
+        current_user["username"],
+        create_admin_request.username,
     )
     user = create_user_model(create_admin_request, Role.ADMIN, db)
     logger.info(
-        f"Admin {create_admin_request.username} created by superadmin {current_user['username']}"
+        "Admin %s created by superadmin %s",
+        create_admin_request.username,
+        current_user["username"],
     )
     return {"message": "Admin created successfully", "user_id": user.id}
 
@@ -440,7 +871,7 @@ async def register_superadmin(
     db: db_dependency, create_user_request: CreateUserRequest
 ):
     """Register the first superadmin - Only use for initial setup"""
-    logger.info(f"Superadmin registration attempt for: {create_user_request.username}")
+    logger.info("Superadmin registration attempt for: %s", create_user_request.username)
 
     # Check if superadmin already exists
     existing_superadmin = (
@@ -453,7 +884,7 @@ async def register_superadmin(
         )
 
     user = create_user_model(create_user_request, Role.SUPERADMIN, db)
-    logger.info(f"Superadmin {create_user_request.username} registered successfully")
+    logger.info("Superadmin %s registered successfully", create_user_request.username)
     return {"message": "Superadmin created successfully", "user_id": user.id}
 
 
@@ -483,18 +914,45 @@ async def delete_user(
             )
 
         user_username = user.username
+        # The cascade below drops the user's favorites without going through
+        # the favorites endpoints, so take them off the product counters here
+        db.execute(
+            update(Products)
+            .where(
+                Products.id.in_(
+                    select(Favorite.product_id).where(Favorite.user_id == user_id)
+                )
+            )
+            .values(favorite_count=Products.favorite_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        # Same for the rating aggregates of the products the user reviewed
+        reviewed = (
+            db.query(Review.product_id, Review.rating)
+            .filter(Review.user_id == user_id)
+            .all()
+        )
+        for product_id, rating in reviewed:
+            ratings.apply_rating_delta(db, product_id, old_rating=rating)
         db.delete(user)
         db.commit()
+        user_profile_cache.invalidate(user_id)
+        for product_id in {product_id for product_id, _ in reviewed}:
+            ratings.rating_summary_cache.invalidate(product_id)
 
         logger.info(
-            f"{user_role.title()} {user_username} (ID: {user_id}) deleted by superadmin {current_user['username']}"
+            "%s %s (ID: %s) deleted by superadmin %s",
+            user_role.title(),
+            user_username,
+            user_id,
+            current_user["username"],
         )
         return {"message": f"{user_role.title()} {user_username} deleted successfully"}
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting user {user_id}: {str(e)}")
+        logger.error("Error deleting user %s: %s", user_id, e)
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -502,13 +960,156 @@ async def delete_user(
         )
 
 
+@router.post("/superadmin/users/bulk-import", status_code=status.HTTP_200_OK)
+async def bulk_import_users(
+    db: db_dependency,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user: dict = Depends(require_superadmin),
+):
+    """Create customers/admins from a CSV or JSON file - superadmin only
+
+    Each row needs username, email and password; role is optional
+    (customer or admin). Returns a per-row report.
+    """
+    try:
+        raw_rows = await run_in_threadpool(
+            parse_bulk_user_file, file.filename or "", file.file
+        )
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse file: {e}")
+
+    report = []
+    valid = []  # (report entry, BulkUserRow)
+    seen_emails, seen_usernames = set(), set()
+    for index, raw in enumerate(raw_rows, start=1):
+        entry = {"row": index, "username": None, "email": None, "user_id": None}
+        report.append(entry)
+        try:
+            row = BulkUserRow.model_validate(
+                {
+                    k.strip().lower(): v
+                    for k, v in raw.items()
+                    if k and v not in ("", None)
+                }
+                if isinstance(raw, dict)
+                else raw
+            )
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            )
+            entry.update(status="invalid", detail=detail)
+            continue
+        entry.update(username=row.username, email=row.email)
+        if row.role == Role.SUPERADMIN:
+            entry.update(status="invalid", detail="Cannot create superadmins")
+            continue
+        email, username = row.email.lower(), row.username.lower()
+        if email in seen_emails or username in seen_usernames:
+            entry.update(status="duplicate", detail="Repeated in file")
+            continue
+        seen_emails.add(email)
+        seen_usernames.add(username)
+        valid.append((entry, row))
+
+    # One query for all existing emails/usernames
+    if valid:
+        existing = (
+            db.query(Users.email, Users.username)
+            .filter(
+                or_(
+                    Users.email.in_([row.email for _, row in valid]),
+                    Users.username.in_([row.username for _, row in valid]),
+                )
+            )
+            .all()
+        )
+        taken_emails = {email.lower() for email, _ in existing}
+        taken_usernames = {username.lower() for _, username in existing}
+        remaining = []
+        for entry, row in valid:
+            if (
+                row.email.lower() in taken_emails
+                or row.username.lower() in taken_usernames
+            ):
+                entry.update(status="duplicate", detail="Username or email exists")
+            else:
+                remaining.append((entry, row))
+        valid = remaining
+
+    hashed_passwords = await hash_passwords_parallel([row.password for _, row in valid])
+
+    emails_to_send = []
+    for start in range(0, len(valid), BULK_IMPORT_BATCH_SIZE):
+        batch = valid[start : start + BULK_IMPORT_BATCH_SIZE]
+        values, tokens = [], []
+        for (entry, row), hashed in zip(batch, hashed_passwords[start:]):
+            token = generate_verification_token() if row.role == Role.CUSTOMER else None
+            tokens.append(token)
+            values.append(
+                {
+                    "username": row.username,
+                    "email": row.email,
+                    "hashed_password": hashed,
+                    "role": row.role.value,
+                    "is_verified": token is None,
+                    "verification_token": hash_token(token) if token else None,
+                    "verification_expires": (
+                        datetime.utcnow() + timedelta(hours=24) if token else None
+                    ),
+                    "created_at": datetime.utcnow(),
+                }
+            )
+        try:
+            db.execute(insert(Users), values)
+            db.commit()
+            inserted = list(range(len(batch)))
+        except IntegrityError:
+            # A concurrent registration took one of the names; retry row by row
+            db.rollback()
+            inserted = []
+            for i, value in enumerate(values):
+                try:
+                    db.execute(insert(Users), [value])
+                    db.commit()
+                    inserted.append(i)
+                except IntegrityError:
+                    db.rollback()
+                    batch[i][0].update(
+                        status="duplicate", detail="Username or email exists"
+                    )
+        ids = dict(
+            db.query(Users.email, Users.id)
+            .filter(Users.email.in_([values[i]["email"] for i in inserted]))
+            .all()
+        )
+        for i in inserted:
+            entry, row = batch[i]
+            entry.update(status="created", user_id=ids.get(row.email), detail=None)
+            if tokens[i]:
+                emails_to_send.append((row.email, row.username, tokens[i]))
+
+    if emails_to_send:
+        background_tasks.add_task(send_verification_emails, emails_to_send)
+
+    summary = {
+        key: sum(1 for entry in report if entry["status"] == key)
+        for key in ("created", "duplicate", "invalid")
+    }
+    logger.info(
+        "Superadmin %s bulk-imported users: %s", current_user["username"], summary
+    )
+    return {**summary, "total": len(report), "rows": report}
+
+
 # Registration endpoints
 @router.post("/register/customer", status_code=status.HTTP_201_CREATED)
 async def register_customer(db: db_dependency, create_user_request: CreateUserRequest):
     """Register a new customer - Public endpoint"""
-    logger.info(f"Customer registration attempt for: {create_user_request.username}")
+    logger.info("Customer registration attempt for: %s", create_user_request.username)
     user = create_user_model(create_user_request, Role.CUSTOMER, db)
-    logger.info(f"Customer {create_user_request.username} registered successfully")
+    logger.info("Customer %s registered successfully", create_user_request.username)
     return {"message": "Customer created successfully", "user_id": user.id}
 
 
@@ -521,16 +1122,14 @@ async def register_customer(db: db_dependency, create_user_request: CreateUserRe
 async def verify_email(request: EmailVerificationRequest, db: db_dependency):
     """Verify email address using verification token"""
     try:
-        # Find user with the verification token
+        # Find user with the verification token (single probe on the digest index)
         user = (
             db.query(Users)
-            .filter(
-                Users.verification_token == request.token, Users.is_verified == False
-            )
+            .filter(Users.verification_token == hash_token(request.token))
             .first()
         )
 
-        if not user:
+        if not user or user.is_verified:
             raise HTTPException(
                 status_code=400, detail="Invalid or expired verification token"
             )
@@ -546,18 +1145,16 @@ async def verify_email(request: EmailVerificationRequest, db: db_dependency):
         user.verification_token = None
         user.verification_expires = None
         db.commit()
+        user_profile_cache.invalidate(user.id)
 
         # Create access token for automatic login
         user_role = get_user_role(user.role)
-        access_token = create_access_token(
-            user.username, user.id, user_role, timedelta(hours=6)
-        )
+        tokens = create_token_pair(user.username, user.id, user_role)
 
-        logger.info(f"Email verified for user: {user.username}")
+        logger.info("Email verified for user: %s", user.username)
         return {
             "message": "Email verified successfully",
-            "access_token": access_token,
-            "token_type": "bearer",
+            **tokens,
             "user_role": user_role,
             "username": user.username,
         }
@@ -565,7 +1162,7 @@ async def verify_email(request: EmailVerificationRequest, db: db_dependency):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error verifying email: {str(e)}")
+        logger.error("Error verifying email: %s", e)
         raise HTTPException(status_code=500, detail="Error verifying email")
 
 
@@ -588,7 +1185,7 @@ async def resend_verification_email(
 
         # Generate new verification token
         new_token = generate_verification_token()
-        user.verification_token = new_token
+        user.verification_token = hash_token(new_token)
         user.verification_expires = datetime.utcnow() + timedelta(hours=24)
         db.commit()
 
@@ -596,7 +1193,7 @@ async def resend_verification_email(
         email_sent = send_verification_email(user.email, user.username, new_token)
 
         if email_sent:
-            logger.info(f"Verification email resent to {user.email}")
+            logger.info("Verification email resent to %s", user.email)
             return {"message": "Verification email sent successfully"}
         else:
             raise HTTPException(
@@ -606,7 +1203,7 @@ async def resend_verification_email(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error resending verification email: {str(e)}")
+        logger.error("Error resending verification email: %s", e)
         raise HTTPException(
             status_code=500, detail="Error resending verification email"
         )
@@ -622,7 +1219,7 @@ async def request_password_reset(
         # Don't reveal if user exists
         return {"message": "If the email exists, a reset link has been sent."}
     token = generate_verification_token()
-    user.reset_token = token
+    user.reset_token = hash_token(token)
     user.reset_token_expires = datetime.utcnow() + timedelta(minutes=30)
     db.commit()
     # Send reset email
@@ -646,9 +1243,9 @@ async def request_password_reset(
         server.login(MAIL_USERNAME, MAIL_PASSWORD)
         server.sendmail(MAIL_FROM, user.email, msg.as_string())
         server.quit()
-        logger.info(f"Password reset email sent to {user.email}")
+        logger.info("Password reset email sent to %s", user.email)
     except Exception as e:
-        logger.error(f"Failed to send password reset email: {str(e)}")
+        logger.error("Failed to send password reset email: %s", e)
     return {"message": "If the email exists, a reset link has been sent."}
 
 
@@ -657,7 +1254,7 @@ async def reset_password(
     token: str = Body(...), new_password: str = Body(...), db: Session = Depends(get_db)
 ):
     """Reset password using token and new password."""
-    user = db.query(Users).filter(Users.reset_token == token).first()
+    user = db.query(Users).filter(Users.reset_token == hash_token(token)).first()
     if (
         not user
         or not user.reset_token_expires
@@ -668,7 +1265,8 @@ async def reset_password(
     user.reset_token = None
     user.reset_token_expires = None
     db.commit()
-    logger.info(f"Password reset for user {user.email}")
+    user_profile_cache.invalidate(user.id)
+    logger.info("Password reset for user %s", user.email)
     return {"message": "Password has been reset successfully."}
 
 
@@ -700,7 +1298,7 @@ async def cancel_order(
         server.login(MAIL_USERNAME, MAIL_PASSWORD)
         server.sendmail(MAIL_FROM, MAIL_FROM, msg.as_string())
         server.quit()
-        logger.info(f"Admin notified of cancellation request for order {order_id}")
+        logger.info("Admin notified of cancellation request for order %s", order_id)
     except Exception as e:
-        logger.error(f"Failed to send admin cancellation email: {str(e)}")
+        logger.error("Failed to send admin cancellation email: %s", e)
     return {"message": "Cancellation request sent to admin."}
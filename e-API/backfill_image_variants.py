@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Render thumb/card/detail variants for images uploaded before the variant
+pipeline existed. Originals under uploads/ that are missing any variant
+are processed on a process pool; --force re-renders everything.
+
+Usage:
+    python backfill_image_variants.py [--workers 4] [--force]
+
+Safe to re-run; each variant is written to a temp file and renamed.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from images import is_variant, render_variants, variant_names, variants_missing
+from uploads import UPLOAD_DIR
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+
+def originals(force: bool):
+    for entry in os.scandir(UPLOAD_DIR):
+        name = entry.name
+        if (
+            entry.is_file()
+            and not name.startswith(".")
+            and name.lower().endswith(IMAGE_EXTENSIONS)
+            and not is_variant(name)
+            and (force or variants_missing(name))
+        ):
+            yield name
+
+
+def run_backfill(workers: int, force: bool):
+    pending = sorted(originals(force))
+    print(f"{len(pending)} images need variants")
+    if not pending:
+        print("\n🎉 Nothing to do!")
+        return
+
+    started = time.perf_counter()
+    original_bytes = card_bytes = failed = done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_variants, str(UPLOAD_DIR / name)): name
+            for name in pending
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ {name}: {e}")
+                continue
+            done += 1
+            original_bytes += (UPLOAD_DIR / name).stat().st_size
+            card = next(v for v in variant_names(name) if v.endswith("_card.webp"))
+            card_bytes += (UPLOAD_DIR / card).stat().st_size
+            if done % 100 == 0:
+                print(f"  {done}/{len(pending)} images processed")
+
+    print(f"✓ {done} images processed in {time.perf_counter() - started:.1f}s")
+    if done:
+        print(
+            f"✓ Grid image weight: {original_bytes / done / 1024:.0f} KB original "
+            f"vs {card_bytes / done / 1024:.0f} KB card WebP on average"
+        )
+    if failed:
+        print(f"❌ {failed} images could not be processed")
+        sys.exit(1)
+    print("\n🎉 Backfill completed successfully!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill image variants")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+    print("Starting image variant backfill...")
+    run_backfill(args.workers, args.force)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-request logging overhead on the request thread.
+
+Compares the old pattern (basicConfig StreamHandler, eagerly formatted
+f-strings, four print() calls from require_admin and a full callback
+payload dump) with the queue-based pipeline from logging_config.py.
+Output goes to a temporary file so both runs pay for real I/O;
+--write-latency-us adds a per-write stall to model a slow stderr pipe or
+container log driver.
+
+Usage: python bench_logging.py [--requests 20000] [--write-latency-us 0]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import logging_config
+
+PAYLOAD = {
+    "body": {
+        "stkCallback": {
+            "merchantRequestID": "29115-34620561-1",
+            "checkoutRequestID": "ws_CO_191220191020363925",
+            "resultCode": 0,
+            "resultDesc": "The service request is processed successfully.",
+            "callbackMetadata": {
+                "item": [
+                    {"name": "Amount", "value": "1.00"},
+                    {"name": "MpesaReceiptNumber", "value": "NLJ7RT61SV"},
+                    {"name": "TransactionDate", "value": "20191219102115"},
+                    {"name": "PhoneNumber", "value": "254708374149"},
+                ]
+            },
+        }
+    }
+}
+
+
+class SlowSink:
+    """File wrapper whose writes stall, like a pipe with a slow reader"""
+
+    def __init__(self, stream, latency):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, data):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def old_request(logger, role="admin"):
+    print(f"DEBUG: User role from token: '{role}'")
+    print(f"DEBUG: Role.ADMIN.value: 'admin', Role.SUPERADMIN.value: 'SUPERADMIN'")
+    print(f"Access granted for role: {role}")
+    logger.info(f"Received callback: {PAYLOAD}")
+    logger.info(f"Transaction {42} updated via callback: status ACCEPTED")
+
+
+def new_request(logger, role="admin"):
+    stk_callback = PAYLOAD["body"]["stkCallback"]
+    logger.info(
+        "Received callback for %s (result code %s)",
+        stk_callback["checkoutRequestID"],
+        stk_callback["resultCode"],
+    )
+    logger.info("Transaction %s updated via callback: status %s", 42, "ACCEPTED")
+
+
+def run(label, request, requests, setup, latency):
+    with tempfile.NamedTemporaryFile("w", delete=False) as out:
+        path = out.name
+    with open(path, "w") as stream, contextlib.redirect_stdout(
+        SlowSink(stream, latency)
+    ) as sink:
+        reset_root()
+        listener = setup(sink)
+        logger = logging.getLogger("bench")
+        start = time.perf_counter()
+        for i in range(requests):
+            token = logging_config.request_id_var.set(f"req-{i}")
+            request(logger)
+            logging_config.request_id_var.reset(token)
+        elapsed = time.perf_counter() - start
+        if listener is not None:
+            listener.stop()  # Drain the queue outside the timed section
+    size = os.path.getsize(path)
+    os.unlink(path)
+    per_request = elapsed / requests * 1e6
+    print(f"{label:<34} {per_request:8.2f} us/request  ({size / 1024:.0f} KiB written)")
+    return per_request
+
+
+def setup_old(sink):
+    logging.basicConfig(level=logging.INFO, stream=sink)
+    return None
+
+
+def setup_new(sink, sample_rate=1.0):
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging_config.JsonFormatter())
+    queue_handler = logging_config.DeferredQueueHandler(
+        logging_config.queue.SimpleQueue()
+    )
+    queue_handler.addFilter(logging_config.RequestIdFilter())
+    queue_handler.addFilter(logging_config.SamplingFilter(sample_rate))
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(logging.INFO)
+    listener = logging.handlers.QueueListener(queue_handler.queue, handler)
+    listener.start()
+    return listener
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--write-latency-us", type=float, default=0.0)
+    args = parser.parse_args()
+    latency = args.write_latency_us / 1e6
+
+    print(
+        f"Python {sys.version.split()[0]}, {args.requests} simulated requests, "
+        f"{args.write_latency_us:g} us per sink write\n"
+    )
+    old = run(
+        "sync handler + prints + f-strings",
+        old_request,
+        args.requests,
+        setup_old,
+        latency,
+    )
+    new = run(
+        "queue listener, lazy, JSON", new_request, args.requests, setup_new, latency
+    )
+    sampled = run(
+        "queue listener, 10% info sampling",
+        new_request,
+        args.requests,
+        lambda sink: setup_new(sink, sample_rate=0.1),
+        latency,
+    )
+    print(
+        f"\nRequest-path overhead reduced {old / new:.1f}x ({old / sampled:.1f}x sampled)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /admin/recalculate-product-ratings.
+
+Seeds a throwaway database with a catalog and random reviews, scrambles the
+stored aggregates, then times ratings.rebuild_product_ratings against the
+old per-product loop (an AVG query, a product lookup and a commit for each
+product). The old loop is timed on a sample and extrapolated, since running
+it over the whole catalog takes too long.
+
+Usage:
+    python bench_rating_recalc.py [--products 100000] [--reviews-per-product 5]
+        [--url sqlite:///bench.db] [--legacy-sample 2000]
+
+The default URL is an in-memory SQLite database. Pass a MySQL URL for a
+throwaway schema to benchmark against the production engine.
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import Index, create_engine, func, insert, update
+from sqlalchemy.orm import sessionmaker
+
+import models
+import ratings
+
+INSERT_BATCH = 10000
+
+
+def seed(Session, products: int, reviews_per_product: int):
+    db = Session()
+    rows = [
+        {
+            "id": i,
+            "name": f"bench-product-{i}",
+            "cost": 1,
+            "price": 2,
+            "stock_quantity": 10,
+            "description": "benchmark product",
+        }
+        for i in range(1, products + 1)
+    ]
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.execute(insert(models.Products), rows[start : start + INSERT_BATCH])
+
+    reviews = []
+    for product_id in range(1, products + 1):
+        # Leave some products unreviewed, like a real catalog. Each review
+        # comes from a different user/order, as uq_reviews_user_product_order
+        # requires.
+        for reviewer in range(1, random.randint(0, 2 * reviews_per_product) + 1):
+            reviews.append(
+                {
+                    "user_id": reviewer,
+                    "order_id": reviewer,
+                    "product_id": product_id,
+                    "rating": random.randint(1, 5),
+                }
+            )
+        if len(reviews) >= INSERT_BATCH:
+            db.execute(insert(models.Review), reviews)
+            reviews = []
+    if reviews:
+        db.execute(insert(models.Review), reviews)
+    db.commit()
+    total_reviews = db.query(func.count(models.Review.id)).scalar()
+    db.close()
+    return total_reviews
+
+
+def legacy_recalculate(db, product_ids):
+    """The old per-product implementation, kept here for comparison"""
+    for product_id in product_ids:
+        avg_rating = (
+            db.query(func.avg(models.Review.rating))
+            .filter(models.Review.product_id == product_id)
+            .scalar()
+        )
+        product = (
+            db.query(models.Products).filter(models.Products.id == product_id).first()
+        )
+        if product:
+            product.rating = float(avg_rating) if avg_rating else 0.0
+            db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--reviews-per-product", type=int, default=5)
+    parser.add_argument("--legacy-sample", type=int, default=2000)
+    parser.add_argument(
+        "--chunk-size", type=int, default=ratings.RATING_REBUILD_CHUNK_SIZE
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    models.Products.__table__.create(engine, checkfirst=True)
+    models.Review.__table__.create(engine, checkfirst=True)
+    # MySQL indexes foreign key columns implicitly; mirror that elsewhere
+    if engine.dialect.name != "mysql":
+        Index("ix_bench_reviews_product", models.Review.product_id).create(
+            engine, checkfirst=True
+        )
+    Session = sessionmaker(bind=engine)
+
+    started = time.perf_counter()
+    total_reviews = seed(Session, args.products, args.reviews_per_product)
+    print(
+        f"Seeded {args.products} products and {total_reviews} reviews "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+    db = Session()
+    started = time.perf_counter()
+    changed = ratings.rebuild_product_ratings(db, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"Set-based rebuild:  {elapsed:8.2f}s  ({changed} products changed)")
+
+    started = time.perf_counter()
+    unchanged = ratings.rebuild_product_ratings(db, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"Rebuild, no drift:  {elapsed:8.2f}s  ({unchanged} products changed)")
+
+    db.execute(update(models.Products).values(rating=0))
+    db.commit()
+    sample = min(args.legacy_sample, args.products)
+    started = time.perf_counter()
+    legacy_recalculate(db, range(1, sample + 1))
+    elapsed = time.perf_counter() - started
+    print(
+        f"Per-product loop:   {elapsed:8.2f}s for {sample} products, "
+        f"~{elapsed / sample * args.products:.1f}s extrapolated to {args.products}"
+    )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Asynchronous processing of M-Pesa STK callbacks.
+
+The webhook only appends the raw callback to ``mpesa_callback_inbox`` and
+acknowledges Safaricom. ``CallbackInboxWorker`` then applies pending rows
+in batches: callbacks are de-duplicated by checkoutRequestID, the matching
+transactions are loaded with one query, and the whole batch is committed
+at once. Transactions that already reached a final status are left alone,
+so Daraja retries and replays are harmless.
+
+Each callback is applied inside its own SAVEPOINT, so one that raises is
+rolled back on its own while the rest of the batch commits. The failing row
+stays pending with its attempt count and error recorded, and is set aside
+(``failed_at``) after ``CALLBACK_MAX_ATTEMPTS`` tries.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import models
+from database import SessionLocal
+from payment_events import broker, transaction_event
+from transaction_events import record_event
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_BATCH_SIZE = int(os.getenv("CALLBACK_BATCH_SIZE", "200"))
+# The worker also polls, to pick up rows written by other API processes
+CALLBACK_POLL_INTERVAL = float(os.getenv("CALLBACK_POLL_INTERVAL", "2"))
+# Failed applies before a callback is set aside for manual review
+CALLBACK_MAX_ATTEMPTS = int(os.getenv("CALLBACK_MAX_ATTEMPTS", "5"))
+
+FINAL_STATUSES = (models.TransactionStatus.ACCEPTED, models.TransactionStatus.REJECTED)
+
+
+def apply_stk_callback(
+    db: Session,
+    transaction: models.Transaction,
+    data: Dict[str, Any],
+    event_type: str = "callback",
+    raw_payload: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Apply an STK callback payload to its transaction (no commit).
+
+    The raw payload (``data`` unless ``raw_payload`` is given) is appended
+    to transaction_events. Returns False when the transaction already has a
+    final status.
+    """
+    if transaction._status in FINAL_STATUSES:
+        return False
+
+    stk_callback = data["body"]["stkCallback"]
+    record_event(db, transaction.id, event_type, raw_payload or data)
+    transaction.result_code = stk_callback["resultCode"]
+    transaction.result_desc = (stk_callback.get("resultDesc") or "")[:255]
+
+    if stk_callback["resultCode"] == 0:
+        # Transaction is successful
+        transaction._status = models.TransactionStatus.ACCEPTED
+        callback_metadata = stk_callback.get("callbackMetadata")
+        if callback_metadata:
+            for item in callback_metadata.get("item", []):
+                if item.get("name") == "MpesaReceiptNumber" and "value" in item:
+                    transaction.transaction_code = item["value"]
+                    break
+    else:
+        # Transaction failed
+        transaction._status = models.TransactionStatus.REJECTED
+    return True
+
+
+class CallbackInboxWorker:
+    """Drains the callback inbox in batches"""
+
+    def __init__(self, batch_size: int, poll_interval: float):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = None
+        self.batches = 0
+        self.received = 0
+        self.applied = 0
+        self.duplicates = 0  # superseded within a batch
+        self.replays = 0  # transaction already final
+        self.unmatched = 0
+        self.errors = 0  # applies that raised and were rolled back
+        self.last_batch_at = None
+        self.last_batch_max_lag = None  # seconds from receipt to apply
+
+    def enqueue(self, db: Session, data: Dict[str, Any]) -> models.CallbackInbox:
+        """Persist a raw callback; this is all the webhook does"""
+        entry = models.CallbackInbox(
+            checkout_request_id=data["body"]["stkCallback"]["checkoutRequestID"],
+            payload=data,
+        )
+        db.add(entry)
+        db.commit()
+        self.received += 1
+        self.notify()
+        return entry
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def process_batch(self, db: Session) -> int:
+        """Apply up to batch_size pending callbacks; returns rows consumed"""
+        rows = (
+            db.query(models.CallbackInbox)
+            .filter(
+                models.CallbackInbox.processed_at.is_(None),
+                models.CallbackInbox.failed_at.is_(None),
+            )
+            .order_by(models.CallbackInbox.id)
+            .limit(self.batch_size)
+            # Lets several API processes drain the inbox without double work
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            db.rollback()
+            return 0
+
+        latest = {}
+        for row in rows:
+            latest[row.checkout_request_id] = row
+        self.duplicates += len(rows) - len(latest)
+
+        transactions = (
+            db.query(models.Transaction)
+            .filter(models.Transaction.transaction_id.in_(list(latest)))
+            .all()
+        )
+        by_checkout_id = {t.transaction_id: t for t in transactions}
+        # Built before commit, which expires the loaded attributes
+        events = []
+        failed = set()
+
+        for checkout_request_id, row in latest.items():
+            transaction = by_checkout_id.get(checkout_request_id)
+            if transaction is None:
+                self.unmatched += 1
+                logger.warning(
+                    "Transaction not found for checkout_request_id: %s",
+                    checkout_request_id,
+                )
+                continue
+            try:
+                with db.begin_nested():
+                    applied = apply_stk_callback(db, transaction, row.payload)
+                    event = transaction_event(transaction) if applied else None
+            except Exception as e:
+                self.errors += 1
+                failed.add(row.id)
+                self._record_failure(row, e)
+                continue
+            if applied:
+                self.applied += 1
+                events.append(event)
+                logger.info(
+                    "Transaction %s updated via callback: status %s",
+                    transaction.id,
+                    transaction._status,
+                )
+            else:
+                self.replays += 1
+
+        now = datetime.utcnow()
+        for row in rows:
+            if row.id not in failed:
+                row.processed_at = now
+        db.commit()
+        for event in events:
+            broker.publish(event["order_id"], event)
+
+        self.batches += 1
+        self.last_batch_at = now
+        self.last_batch_max_lag = max(
+            (now - row.received_at).total_seconds() for row in rows
+        )
+        return len(rows)
+
+    @staticmethod
+    def _record_failure(row: models.CallbackInbox, error: Exception):
+        """Count a failed apply; the row stays pending until the last attempt"""
+        row.attempts = (row.attempts or 0) + 1
+        row.last_error = f"{type(error).__name__}: {error}"[:255]
+        if row.attempts >= CALLBACK_MAX_ATTEMPTS:
+            row.failed_at = datetime.utcnow()
+            logger.error(
+                "Giving up on callback %s for %s after %s attempts: %s",
+                row.id,
+                row.checkout_request_id,
+                row.attempts,
+                row.last_error,
+            )
+        else:
+            logger.warning(
+                "Callback %s for %s failed (attempt %s): %s",
+                row.id,
+                row.checkout_request_id,
+                row.attempts,
+                row.last_error,
+            )
+
+    def drain(self) -> int:
+        """Process batches until the inbox is empty"""
+        total = 0
+        db = SessionLocal()
+        try:
+            while True:
+                count = self.process_batch(db)
+                total += count
+                if count < self.batch_size:
+                    return total
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run(self):
+        """Background loop: drain on notification or every poll_interval"""
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await run_in_threadpool(self.drain)
+            except Exception as e:
+                logger.error("Error processing callback inbox: %s", e)
+                await asyncio.sleep(self.poll_interval)
+
+    def metrics(self, db: Session) -> Dict[str, Any]:
+        pending, oldest = (
+            db.query(
+                func.count(models.CallbackInbox.id),
+                func.min(models.CallbackInbox.received_at),
+            )
+            .filter(
+                models.CallbackInbox.processed_at.is_(None),
+                models.CallbackInbox.failed_at.is_(None),
+            )
+            .one()
+        )
+        failed = (
+            db.query(func.count(models.CallbackInbox.id))
+            .filter(models.CallbackInbox.failed_at.isnot(None))
+            .scalar()
+        )
+        return {
+            "pending": pending,
+            "failed": failed,
+            "queue_lag_seconds": (
+                (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+            ),
+            "last_batch_max_lag_seconds": self.last_batch_max_lag,
+            "last_batch_at": self.last_batch_at,
+            "received": self.received,
+            "batches": self.batches,
+            "applied": self.applied,
+            "duplicates": self.duplicates,
+            "replays": self.replays,
+            "unmatched": self.unmatched,
+            "errors": self.errors,
+        }
+
+
+worker = CallbackInboxWorker(CALLBACK_BATCH_SIZE, CALLBACK_POLL_INTERVAL)
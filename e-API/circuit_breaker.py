@@ -0,0 +1,150 @@
+"""
+Circuit breaker and bulkhead for outbound calls to third-party APIs.
+
+``CircuitBreaker`` tracks the outcome of the last ``window`` calls and opens
+once the failure rate crosses a threshold; while open, calls fail at once
+instead of waiting on a degraded upstream. After ``open_seconds`` it lets a
+few probe calls through (half-open) and closes again if they succeed.
+``Bulkhead`` caps how many calls may be in flight, so a slow upstream can
+only tie up a fixed share of the worker's capacity.
+
+Both are meant for use on a single event loop and need no locking.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open")
+        self.retry_after = retry_after
+
+
+class BulkheadFullError(Exception):
+    """Raised when no call slot frees up within the bulkhead's wait time"""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)  # True for failures
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.opened_count = 0
+        self.rejected_count = 0
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError"""
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected_count += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = self.HALF_OPEN
+            self._probes_in_flight = 0
+        if self.state == self.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self.rejected_count += 1
+                raise CircuitOpenError(self.name, 1.0)
+            self._probes_in_flight += 1
+
+    def record_success(self):
+        if self.state == self.HALF_OPEN:
+            self._close()
+        else:
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(True)
+        if (
+            self.state == self.CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and self.current_failure_rate() >= self.failure_rate
+        ):
+            self._open()
+
+    def release(self):
+        """Forget an admitted call that ended without an outcome (cancelled)"""
+        if self.state == self.HALF_OPEN and self._probes_in_flight:
+            self._probes_in_flight -= 1
+
+    def current_failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self.opened_count += 1
+
+    def _close(self):
+        self.state = self.CLOSED
+        self._outcomes.clear()
+        self._probes_in_flight = 0
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failure_rate": round(self.current_failure_rate(), 3),
+            "calls_in_window": len(self._outcomes),
+            "opened_count": self.opened_count,
+            "rejected_count": self.rejected_count,
+        }
+
+
+class Bulkhead:
+    def __init__(self, name: str, max_concurrent: int, max_wait: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.rejected_count = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected_count += 1
+            raise BulkheadFullError(f"Bulkhead '{self.name}' is full")
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "rejected_count": self.rejected_count,
+        }
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Safaricom Daraja API, for offline payment testing.
+
+Implements the three endpoints LNMORepository uses (OAuth, stkpush and
+stkpushquery) and, for every accepted push, posts an STK callback to the
+push's CallBackURL after a random delay. Success rate, callback delay,
+dropped callbacks and API latency are configurable.
+
+Point the API at it with:
+
+    MPESA_LNMO_ENVIRONMENT=http://127.0.0.1:8001
+    MPESA_CALLBACK_URL=http://127.0.0.1:8000/payments/lnmo/callback
+
+Usage:
+    python daraja_simulator.py serve [--port 8001] [--success-rate 0.9]
+    python daraja_simulator.py loadtest --email buyer@example.com \\
+        --password secret --order-ids 1-500 [--concurrency 50]
+
+``loadtest`` runs the simulator in-process, fires concurrent
+/payments/lnmo/transact requests at a running API, waits for every
+callback to be delivered and prints latency percentiles.
+"""
+
+import argparse
+import asyncio
+import base64
+import random
+import secrets
+import statistics
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Header, Request, status
+from fastapi.responses import JSONResponse
+
+# Result codes Daraja reports for failed pushes
+FAILURE_RESULTS = [
+    (1032, "Request cancelled by user"),
+    (1037, "DS timeout user cannot be reached"),
+    (1, "The balance is insufficient for the transaction"),
+    (2001, "The initiator information is invalid."),
+]
+
+
+@dataclass
+class SimulatorConfig:
+    success_rate: float = 0.9
+    min_delay: float = 1.0  # seconds before the callback is sent
+    max_delay: float = 5.0
+    drop_rate: float = 0.0  # fraction of callbacks never sent
+    response_delay: float = 0.0  # added latency on every API response
+    token_ttl: int = 3599
+
+
+@dataclass
+class Push:
+    checkout_request_id: str
+    merchant_request_id: str
+    callback_url: str
+    amount: str
+    phone_number: str
+    created_at: float = field(default_factory=time.monotonic)
+    result_code: Optional[int] = None
+    result_desc: Optional[str] = None
+    callback_status: Optional[int] = None
+    callback_latency: Optional[float] = None  # push accepted -> callback acked
+
+
+class DarajaSimulator:
+    """In-memory Daraja state plus the FastAPI app serving it"""
+
+    def __init__(self, config: SimulatorConfig):
+        self.config = config
+        self.tokens: Dict[str, float] = {}  # token -> monotonic expiry
+        self.pushes: Dict[str, Push] = {}
+        self.counters = {
+            "oauth": 0,
+            "stkpush": 0,
+            "stkpushquery": 0,
+            "unauthorized": 0,
+            "callbacks_sent": 0,
+            "callbacks_failed": 0,
+            "callbacks_dropped": 0,
+        }
+        self._pending_callbacks = set()
+        self._client: Optional[httpx.AsyncClient] = None
+        self.app = self._build_app()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _authorized(self, authorization: Optional[str]) -> bool:
+        if not authorization or not authorization.startswith("Bearer "):
+            return False
+        expires_at = self.tokens.get(authorization[len("Bearer ") :])
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def _unauthorized(self) -> JSONResponse:
+        self.counters["unauthorized"] += 1
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={
+                "requestId": uuid.uuid4().hex,
+                "errorCode": "404.001.04",
+                "errorMessage": "Invalid Access Token",
+            },
+        )
+
+    async def _respond_later(self):
+        if self.config.response_delay:
+            await asyncio.sleep(self.config.response_delay)
+
+    def _decide(self, push: Push):
+        if random.random() < self.config.success_rate:
+            push.result_code, push.result_desc = (
+                0,
+                "The service request is processed successfully.",
+            )
+        else:
+            push.result_code, push.result_desc = random.choice(FAILURE_RESULTS)
+
+    def callback_payload(self, push: Push) -> dict:
+        """STK callback in the shape CallbackRequest expects"""
+        stk_callback = {
+            "merchantRequestID": push.merchant_request_id,
+            "checkoutRequestID": push.checkout_request_id,
+            "resultCode": push.result_code,
+            "resultDesc": push.result_desc,
+        }
+        if push.result_code == 0:
+            stk_callback["callbackMetadata"] = {
+                "item": [
+                    {"name": "Amount", "value": push.amount},
+                    {
+                        "name": "MpesaReceiptNumber",
+                        "value": "SIM" + secrets.token_hex(4).upper(),
+                    },
+                    {
+                        "name": "TransactionDate",
+                        "value": datetime.now().strftime("%Y%m%d%H%M%S"),
+                    },
+                    {"name": "PhoneNumber", "value": push.phone_number},
+                ]
+            }
+        return {"body": {"stkCallback": stk_callback}}
+
+    async def _deliver_callback(self, push: Push):
+        await asyncio.sleep(
+            random.uniform(self.config.min_delay, self.config.max_delay)
+        )
+        self._decide(push)
+        if random.random() < self.config.drop_rate:
+            # Left for the API's reconciler to find via stkpushquery
+            self.counters["callbacks_dropped"] += 1
+            return
+        try:
+            response = await self.client.post(
+                push.callback_url, json=self.callback_payload(push)
+            )
+            push.callback_status = response.status_code
+            push.callback_latency = time.monotonic() - push.created_at
+            self.counters["callbacks_sent"] += 1
+        except httpx.HTTPError:
+            self.counters["callbacks_failed"] += 1
+
+    async def wait_for_callbacks(self):
+        while self._pending_callbacks:
+            await asyncio.gather(*list(self._pending_callbacks))
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Daraja simulator")
+
+        @app.get("/oauth/v1/generate")
+        async def generate_token(
+            grant_type: str, authorization: Optional[str] = Header(None)
+        ):
+            self.counters["oauth"] += 1
+            await self._respond_later()
+            if grant_type != "client_credentials" or not (
+                authorization and authorization.startswith("Basic ")
+            ):
+                return JSONResponse(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    content={"error_description": "Invalid grant type passed"},
+                )
+            token = base64.b64encode(secrets.token_bytes(21)).decode()
+            self.tokens[token] = time.monotonic() + self.config.token_ttl
+            return {"access_token": token, "expires_in": str(self.config.token_ttl)}
+
+        @app.post("/mpesa/stkpush/v1/processrequest")
+        async def stk_push(
+            request: Request, authorization: Optional[str] = Header(None)
+        ):
+            self.counters["stkpush"] += 1
+            await self._respond_later()
+            if not self._authorized(authorization):
+                return self._unauthorized()
+            payload = await request.json()
+            missing = [
+                key
+                for key in ("BusinessShortCode", "Amount", "PhoneNumber", "CallBackURL")
+                if not payload.get(key)
+            ]
+            if missing:
+                return JSONResponse(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    content={
+                        "requestId": uuid.uuid4().hex,
+                        "errorCode": "400.002.02",
+                        "errorMessage": f"Bad Request - Invalid {missing[0]}",
+                    },
+                )
+
+            push = Push(
+                checkout_request_id=f"ws_CO_SIM_{uuid.uuid4().hex[:20]}",
+                merchant_request_id=f"{random.randint(10000, 99999)}-{uuid.uuid4().int % 10**8}-1",
+                callback_url=payload["CallBackURL"],
+                amount=str(payload["Amount"]),
+                phone_number=str(payload["PhoneNumber"]),
+            )
+            self.pushes[push.checkout_request_id] = push
+            task = asyncio.create_task(self._deliver_callback(push))
+            self._pending_callbacks.add(task)
+            task.add_done_callback(self._pending_callbacks.discard)
+
+            return {
+                "MerchantRequestID": push.merchant_request_id,
+                "CheckoutRequestID": push.checkout_request_id,
+                "ResponseCode": "0",
+                "ResponseDescription": "Success. Request accepted for processing",
+                "CustomerMessage": "Success. Request accepted for processing",
+            }
+
+        @app.post("/mpesa/stkpushquery/v1/query")
+        async def stk_push_query(
+            request: Request, authorization: Optional[str] = Header(None)
+        ):
+            self.counters["stkpushquery"] += 1
+            await self._respond_later()
+            if not self._authorized(authorization):
+                return self._unauthorized()
+            payload = await request.json()
+            push = self.pushes.get(payload.get("CheckoutRequestID"))
+            if push is None:
+                return JSONResponse(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    content={
+                        "requestId": uuid.uuid4().hex,
+                        "errorCode": "400.002.02",
+                        "errorMessage": "Bad Request - Invalid CheckoutRequestID",
+                    },
+                )
+            if push.result_code is None:
+                return JSONResponse(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    content={
+                        "requestId": uuid.uuid4().hex,
+                        "errorCode": "500.001.1001",
+                        "errorMessage": "The transaction is being processed",
+                    },
+                )
+            return {
+                "ResponseCode": "0",
+                "ResponseDescription": "The service request has been accepted successfully",
+                "MerchantRequestID": push.merchant_request_id,
+                "CheckoutRequestID": push.checkout_request_id,
+                "ResultCode": str(push.result_code),
+                "ResultDesc": push.result_desc,
+            }
+
+        @app.get("/simulator/stats")
+        async def simulator_stats():
+            return self.stats()
+
+        @app.on_event("shutdown")
+        async def close_client():
+            await self.aclose()
+
+        return app
+
+    def stats(self) -> dict:
+        results = {}
+        for push in self.pushes.values():
+            key = "pending" if push.result_code is None else str(push.result_code)
+            results[key] = results.get(key, 0) + 1
+        return {
+            **self.counters,
+            "pushes": len(self.pushes),
+            "results": results,
+            "callback_latency": summarize(
+                [p.callback_latency for p in self.pushes.values() if p.callback_latency]
+            ),
+        }
+
+
+def summarize(samples: List[float]) -> dict:
+    """Count and p50/p95/p99/max in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 1),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def parse_ids(spec: str) -> List[int]:
+    """'1-5,9' -> [1, 2, 3, 4, 5, 9]"""
+    ids = []
+    for part in spec.split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            ids.extend(range(int(start), int(end) + 1))
+        elif part:
+            ids.append(int(part))
+    return ids
+
+
+async def load_test(args, simulator: DarajaSimulator):
+    server = uvicorn.Server(
+        uvicorn.Config(
+            simulator.app, host=args.host, port=args.port, log_level="warning"
+        )
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(base_url=args.api_url, timeout=60) as api:
+        login = await api.post(
+            "/auth/login", json={"email": args.email, "password": args.password}
+        )
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        order_ids = parse_ids(args.order_ids)
+        requests = args.requests or len(order_ids)
+        slots = asyncio.Semaphore(args.concurrency)
+        latencies, failures = [], {}
+
+        async def transact(i):
+            body = {
+                "amount": args.amount,
+                "phone_number": args.phone_number,
+                "order_id": order_ids[i % len(order_ids)],
+            }
+            async with slots:
+                start = time.monotonic()
+                try:
+                    response = await api.post(
+                        "/payments/lnmo/transact", json=body, headers=headers
+                    )
+                    code = response.status_code
+                except httpx.HTTPError as e:
+                    code = type(e).__name__
+            if code == 200:
+                latencies.append(time.monotonic() - start)
+            else:
+                failures[code] = failures.get(code, 0) + 1
+
+        print(f"Sending {requests} payments with concurrency {args.concurrency}...")
+        start = time.monotonic()
+        await asyncio.gather(*(transact(i) for i in range(requests)))
+        push_elapsed = time.monotonic() - start
+        await simulator.wait_for_callbacks()
+        total_elapsed = time.monotonic() - start
+
+    server.should_exit = True
+    await server_task
+
+    print(f"\ntransact: {len(latencies)} ok, failures {failures or 'none'}")
+    print(f"  throughput {len(latencies) / push_elapsed:.1f} req/s")
+    print(f"  latency    {summarize(latencies)}")
+    stats = simulator.stats()
+    print(
+        f"callbacks: {stats['callbacks_sent']} acked, "
+        f"{stats['callbacks_failed']} failed, {stats['callbacks_dropped']} dropped"
+    )
+    print(f"  push -> ack {stats['callback_latency']}")
+    print(f"  results     {stats['results']}")
+    print(f"total {total_elapsed:.1f}s, {stats['oauth']} OAuth calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("mode", choices=["serve", "loadtest"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--success-rate", type=float, default=0.9)
+    parser.add_argument("--min-delay", type=float, default=1.0)
+    parser.add_argument("--max-delay", type=float, default=5.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--response-delay", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=int, default=3599)
+    # loadtest options
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--order-ids", default="1")
+    parser.add_argument("--requests", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--amount", default="1")
+    parser.add_argument("--phone-number", default="254708374149")
+    args = parser.parse_args()
+
+    simulator = DarajaSimulator(
+        SimulatorConfig(
+            success_rate=args.success_rate,
+            min_delay=args.min_delay,
+            max_delay=max(args.min_delay, args.max_delay),
+            drop_rate=args.drop_rate,
+            response_delay=args.response_delay,
+            token_ttl=args.token_ttl,
+        )
+    )
+    if args.mode == "serve":
+        uvicorn.run(simulator.app, host=args.host, port=args.port)
+    else:
+        if not (args.email and args.password):
+            parser.error("loadtest needs --email and --password")
+        asyncio.run(load_test(args, simulator))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Resized variants of uploaded images.
+
+Every image stored under ``UPLOAD_DIR`` gets thumb/card/detail variants in
+WebP and JPEG, written next to the original as ``<stem>_<size>.<format>``.
+Names are derived from the original's, so variant URLs can be computed
+from ``img_url`` without a lookup.
+
+Uploads are content-addressed and shared: the same file may back several
+product images and banners. ``release_image`` deletes a file only once no
+``ProductImage.img_url`` or ``Banner.image_url`` refers to it, and
+``sweep_unreferenced_images`` collects the ones it had to leave behind.
+Resizing and encoding are CPU-bound and hold the GIL, so they run on a
+process pool rather than the threadpool.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from uploads import UPLOAD_DIR, UploadRejected
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels; images are only ever scaled down
+VARIANT_SIZES = {"detail": 1200, "card": 480, "thumb": 200}
+# format -> (Pillow format, save options)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# Unreferenced files this recent may belong to an upload whose product or
+# banner has not been saved yet, so release_image leaves them alone
+UPLOAD_RELEASE_GRACE_SECONDS = int(os.getenv("UPLOAD_RELEASE_GRACE_SECONDS", "3600"))
+UPLOAD_SWEEP_INTERVAL_SECONDS = int(os.getenv("UPLOAD_SWEEP_INTERVAL_SECONDS", "3600"))
+# Originals the sweep considers; variants go with their original
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+SWEEP_BATCH_SIZE = 500
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def variant_name(filename: str, size: str, fmt: str) -> str:
+    return f"{filename.rsplit('.', 1)[0]}_{size}.{fmt}"
+
+
+def variant_names(filename: str) -> List[str]:
+    return [
+        variant_name(filename, size, fmt)
+        for size in VARIANT_SIZES
+        for fmt in VARIANT_FORMATS
+    ]
+
+
+def is_variant(filename: str) -> bool:
+    stem = filename.rsplit(".", 1)[0]
+    return any(stem.endswith(f"_{size}") for size in VARIANT_SIZES)
+
+
+def local_filename(img_url: Optional[str]) -> Optional[str]:
+    """File name under UPLOAD_DIR for a local upload URL, else None"""
+    if img_url and img_url.startswith("/uploads/"):
+        filename = img_url[len("/uploads/") :]
+        # Never resolve outside UPLOAD_DIR
+        if filename and "/" not in filename and not filename.startswith("."):
+            return filename
+    return None
+
+
+def variant_urls(img_url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """{size: {format: url}} for a local upload; None for external URLs"""
+    filename = local_filename(img_url)
+    if filename is None:
+        return None
+    return {
+        size: {
+            fmt: f"/uploads/{variant_name(filename, size, fmt)}"
+            for fmt in VARIANT_FORMATS
+        }
+        for size in VARIANT_SIZES
+    }
+
+
+def render_variants(path: str) -> List[str]:
+    """Write every variant of the image at ``path``; runs in a worker process"""
+    from PIL import Image, ImageOps
+
+    directory, filename = os.path.split(path)
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    written = []
+    # Largest first, each variant scaled down from the previous one
+    for size, edge in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        for fmt, (pil_format, options) in VARIANT_FORMATS.items():
+            output = image
+            if pil_format == "JPEG" and has_alpha:
+                output = Image.new("RGB", image.size, (255, 255, 255))
+                output.paste(image, mask=image.getchannel("A"))
+            name = variant_name(filename, size, fmt)
+            # Unique per call: concurrent uploads of the same bytes render
+            # the same variant names at the same time
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.")
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    output.save(tmp, pil_format, **options)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, os.path.join(directory, name))
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+            written.append(name)
+    return written
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _executor
+
+
+async def generate_variants(filename: str) -> List[str]:
+    """Render the variants of an upload on the process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _pool(), render_variants, str(UPLOAD_DIR / filename)
+    )
+
+
+def variants_missing(filename: str) -> bool:
+    return not all((UPLOAD_DIR / name).exists() for name in variant_names(filename))
+
+
+async def check_decodable(filename: str):
+    """Render missing variants of a fresh upload, rejecting undecodable files"""
+    if not variants_missing(filename):
+        return
+    try:
+        await generate_variants(filename)
+    except Exception as e:
+        # Only this request is rejected. The file may be shared with another
+        # upload of the same bytes or referenced already, so it is left to
+        # sweep_unreferenced_images, which checks references first.
+        logger.warning("Rejected undecodable image %s: %s", filename, e)
+        raise UploadRejected(400, "Image could not be processed")
+
+
+async def ensure_variants(img_url: Optional[str]):
+    """Render variants for a local upload that lacks them; logs failures"""
+    filename = local_filename(img_url)
+    if filename is None or not variants_missing(filename):
+        return
+    try:
+        await generate_variants(filename)
+    except Exception as e:
+        logger.warning("Could not render variants for %s: %s", filename, e)
+
+
+def delete_image(img_url: Optional[str]):
+    """Remove a local upload and its variants from disk"""
+    filename = local_filename(img_url)
+    if filename is None:
+        return
+    for name in [filename, *variant_names(filename)]:
+        file_path = UPLOAD_DIR / name
+        try:
+            file_path.unlink()
+            logger.info("Deleted image file: %s", file_path)
+        except FileNotFoundError:
+            if name == filename:
+                logger.warning("Image file not found for deletion: %s", file_path)
+        except OSError as e:
+            logger.error("Error deleting image file %s: %s", file_path, e)
+
+
+def is_referenced(db: Session, img_url: str) -> bool:
+    """Whether any product image or banner still uses ``img_url``"""
+    return db.query(
+        exists().where(models.ProductImage.img_url == img_url)
+        | exists().where(models.Banner.image_url == img_url)
+    ).scalar()
+
+
+def release_image(db: Session, img_url: Optional[str]) -> bool:
+    """Delete a local upload once nothing refers to it; returns True if deleted.
+
+    Call after committing the change that dropped the reference.
+    """
+    filename = local_filename(img_url)
+    if filename is None or is_referenced(db, img_url):
+        return False
+    try:
+        age = time.time() - (UPLOAD_DIR / filename).stat().st_mtime
+    except FileNotFoundError:
+        return False
+    if age < UPLOAD_RELEASE_GRACE_SECONDS:
+        logger.info("Keeping recently uploaded unreferenced image %s", filename)
+        return False
+    delete_image(img_url)
+    return True
+
+
+def _unreferenced(db: Session, img_urls: List[str]) -> List[str]:
+    referenced = {
+        url
+        for (url,) in db.query(models.ProductImage.img_url).filter(
+            models.ProductImage.img_url.in_(img_urls)
+        )
+    }
+    referenced.update(
+        url
+        for (url,) in db.query(models.Banner.image_url).filter(
+            models.Banner.image_url.in_(img_urls)
+        )
+    )
+    return [url for url in img_urls if url not in referenced]
+
+
+def sweep_unreferenced_images() -> int:
+    """Delete uploads past the grace period that nothing refers to.
+
+    Picks up files ``release_image`` kept because they were still young when
+    their last reference went, and uploads whose product or banner was never
+    saved. Returns the number of originals deleted.
+    """
+    cutoff = time.time() - UPLOAD_RELEASE_GRACE_SECONDS
+    candidates = [
+        f"/uploads/{entry.name}"
+        for entry in os.scandir(UPLOAD_DIR)
+        if entry.is_file()
+        and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        and not is_variant(entry.name)
+        and entry.stat().st_mtime < cutoff
+    ]
+    deleted = 0
+    db = SessionLocal()
+    try:
+        for start in range(0, len(candidates), SWEEP_BATCH_SIZE):
+            for img_url in _unreferenced(
+                db, candidates[start : start + SWEEP_BATCH_SIZE]
+            ):
+                path = UPLOAD_DIR / local_filename(img_url)
+                try:
+                    # A repeat upload of the same bytes refreshes the mtime
+                    if path.stat().st_mtime >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                delete_image(img_url)
+                deleted += 1
+    finally:
+        db.close()
+    if deleted:
+        logger.info("Upload sweep deleted %s unreferenced images", deleted)
+    return deleted
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -1,23 +1,43 @@
 import os
-import requests
+import asyncio
+import httpx
 import base64
+import csv
+import json
+import time
 from datetime import datetime
 from decimal import Decimal
 from typing import Dict, Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
 from pydantic_models import TransactionRequest, QueryRequest, APIResponse, CallbackRequest , CheckTransactionStatus
-from database import db_dependency
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from database import db_dependency, SessionLocal
+from sqlalchemy.orm import Session, load_only
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, and_, or_
 import models
-from auth import get_active_user
+from auth import (
+    get_active_user, require_admin_or_above, create_stream_ticket, redeem_stream_ticket,
+    Role, STREAM_TICKET_EXPIRE_SECONDS,
+)
+import callback_inbox
+import payment_events
+from statement_import import StatementImport
+from transaction_events import record_event, latest_payload
+from reconciler import PaymentReconciler, STILL_PROCESSING_ERROR
+from circuit_breaker import CircuitBreaker, CircuitOpenError, Bulkhead, BulkheadFullError
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# HTTP/2 needs the optional "h2" package; fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Create router
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
@@ -25,6 +45,11 @@ router = APIRouter(prefix="/payments", tags=["Payments"])
 from typing import Annotated
 user_dependency = Annotated[dict, Depends(get_active_user)]
 
+# Payment status stream settings
+SSE_KEEPALIVE_SECONDS = int(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_MAX_STREAM_SECONDS = int(os.getenv("SSE_MAX_STREAM_SECONDS", "600"))
+FINAL_STATUS_VALUES = {s.value for s in callback_inbox.FINAL_STATUSES}
+
 class LNMORepository:
     """MPESA LNMO Repository for handling M-Pesa payments"""
     
@@ -38,7 +63,36 @@ class LNMORepository:
     MPESA_LNMO_SHORT_CODE = os.getenv("MPESA_LNMO_SHORT_CODE")
     MPESA_LNMO_CALLBACK_URL = os.getenv("MPESA_CALLBACK_URL")
 
+    # Outbound HTTP settings for the shared Daraja client
+    MPESA_HTTP_CONNECT_TIMEOUT = float(os.getenv("MPESA_HTTP_CONNECT_TIMEOUT", "5"))
+    MPESA_HTTP_READ_TIMEOUT = float(os.getenv("MPESA_HTTP_READ_TIMEOUT", "30"))
+    MPESA_HTTP_MAX_CONNECTIONS = int(os.getenv("MPESA_HTTP_MAX_CONNECTIONS", "20"))
+    # Refresh the cached OAuth token this many seconds before it expires
+    MPESA_TOKEN_REFRESH_MARGIN = int(os.getenv("MPESA_TOKEN_REFRESH_MARGIN", "60"))
+    # Circuit breaker: open when this share of the last WINDOW calls failed
+    MPESA_BREAKER_FAILURE_RATE = float(os.getenv("MPESA_BREAKER_FAILURE_RATE", "0.5"))
+    MPESA_BREAKER_WINDOW = int(os.getenv("MPESA_BREAKER_WINDOW", "20"))
+    MPESA_BREAKER_MIN_CALLS = int(os.getenv("MPESA_BREAKER_MIN_CALLS", "10"))
+    MPESA_BREAKER_OPEN_SECONDS = float(os.getenv("MPESA_BREAKER_OPEN_SECONDS", "30"))
+    # Bulkhead: concurrent Daraja calls, and how long a call may wait for a slot
+    MPESA_BULKHEAD_SIZE = int(os.getenv("MPESA_BULKHEAD_SIZE", "10"))
+    MPESA_BULKHEAD_WAIT_SECONDS = float(os.getenv("MPESA_BULKHEAD_WAIT_SECONDS", "0.5"))
+
     def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._access_token: Optional[str] = None
+        self._token_expires_at = 0.0  # time.monotonic() deadline
+        self._token_lock = asyncio.Lock()
+        self.breaker = CircuitBreaker(
+            "daraja",
+            failure_rate=self.MPESA_BREAKER_FAILURE_RATE,
+            window=self.MPESA_BREAKER_WINDOW,
+            min_calls=self.MPESA_BREAKER_MIN_CALLS,
+            open_seconds=self.MPESA_BREAKER_OPEN_SECONDS,
+        )
+        self.bulkhead = Bulkhead(
+            "daraja", self.MPESA_BULKHEAD_SIZE, self.MPESA_BULKHEAD_WAIT_SECONDS
+        )
         # Validate required environment variables
         required_vars = [
             "MPESA_LNMO_CONSUMER_KEY", "MPESA_LNMO_CONSUMER_SECRET", 
@@ -48,15 +102,41 @@ class LNMORepository:
             if not getattr(self, var):
                 raise ValueError(f"Missing required environment variable: {var}")
 
+    @property
+    def base_url(self) -> str:
+        # A full URL (e.g. http://127.0.0.1:8001 for daraja_simulator.py) is used as-is
+        if self.MPESA_LNMO_ENVIRONMENT.startswith(("http://", "https://")):
+            return self.MPESA_LNMO_ENVIRONMENT.rstrip("/")
+        return f"https://{self.MPESA_LNMO_ENVIRONMENT}.safaricom.co.ke"
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(
+                    self.MPESA_HTTP_READ_TIMEOUT,
+                    connect=self.MPESA_HTTP_CONNECT_TIMEOUT,
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.MPESA_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=self.MPESA_HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=60,
+                ),
+                http2=HTTP2_AVAILABLE,
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close pooled connections (called on application shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def transact(self, data: Dict[str, Any], db: Session, user_id: int) -> Dict[str, Any]:
         """Handle MPESA LNMO transaction"""
         try:
-            endpoint = f"https://{self.MPESA_LNMO_ENVIRONMENT}.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-            headers = {
-                "Authorization": "Bearer " + self.generate_access_token(),
-                "Content-Type": "application/json",
-            }
-            
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
             payload = {
                 "BusinessShortCode": self.MPESA_LNMO_SHORT_CODE,
@@ -72,8 +152,16 @@ class LNMORepository:
                 "TransactionDesc": f"Payment for order {data['order_id']}",
             }
 
-            response = requests.post(endpoint, json=payload, headers=headers)
+            response = await self._post("/mpesa/stkpush/v1/processrequest", payload)
             response_data = response.json()
+            if not response_data.get("CheckoutRequestID"):
+                # Nothing to match a callback or status query against later
+                logger.error("Daraja stkpush rejected: %s", response_data)
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=response_data.get("errorMessage")
+                    or "M-Pesa did not accept the payment request"
+                )
 
             # Save transaction to the database
             transaction = models.Transaction(
@@ -90,103 +178,161 @@ class LNMORepository:
                 transaction_code=None,
                 transaction_timestamp=datetime.now(),
                 transaction_details=f"Payment for order {data['order_id']}",
-                _feedback=response_data,
                 _status=models.TransactionStatus.PROCESSING,
                 user_id=user_id,
                 # order_id=None  
             )
 
             db.add(transaction)
+            db.flush()
+            record_event(db, transaction.id, "stk_push", response_data)
             db.commit()
             db.refresh(transaction)
 
-            logger.info(f"Transaction created: ID {transaction.id} for user {user_id}")
+            logger.info("Transaction created: ID %s for user %s", transaction.id, user_id)
             return response_data
 
+        except HTTPException:
+            db.rollback()
+            raise
+        except httpx.TimeoutException as e:
+            logger.error("Timed out calling Daraja stkpush: %r", e)
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="M-Pesa did not respond in time"
+            )
         except Exception as e:
-            logger.error(f"Error in transact: {str(e)}")
+            logger.error("Error in transact: %s", e)
             db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Transaction failed: {str(e)}"
             )
 
-    def query(self, transaction_id: str) -> Dict[str, Any]:
+    async def query_status(self, transaction_id: str) -> httpx.Response:
+        """Raw stkpushquery call; callers handle error responses themselves"""
+        payload = {
+            "BusinessShortCode": self.MPESA_LNMO_SHORT_CODE,
+            "Password": self.generate_password(),
+            "Timestamp": datetime.now().strftime("%Y%m%d%H%M%S"),
+            "CheckoutRequestID": transaction_id,
+        }
+        return await self._post("/mpesa/stkpushquery/v1/query", payload)
+
+    async def query(self, transaction_id: str) -> Dict[str, Any]:
         """Query MPESA LNMO transaction status"""
         try:
-            endpoint = f"https://{self.MPESA_LNMO_ENVIRONMENT}.safaricom.co.ke/mpesa/stkpushquery/v1/query"
-            headers = {
-                "Authorization": "Bearer " + self.generate_access_token(),
-                "Content-Type": "application/json",
-            }
-            
-            payload = {
-                "BusinessShortCode": self.MPESA_LNMO_SHORT_CODE,
-                "Password": self.generate_password(),
-                "Timestamp": datetime.now().strftime("%Y%m%d%H%M%S"),
-                "CheckoutRequestID": transaction_id,
-            }
-
-            response = requests.post(endpoint, json=payload, headers=headers)
+            response = await self.query_status(transaction_id)
             return response.json()
-            
+
+        except HTTPException:
+            raise
+        except httpx.TimeoutException as e:
+            logger.error("Timed out calling Daraja stkpushquery: %r", e)
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="M-Pesa did not respond in time"
+            )
         except Exception as e:
-            logger.error(f"Error in query: {str(e)}")
+            logger.error("Error in query: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Query failed: {str(e)}"
             )
 
-    async def callback(self, data: Dict[str, Any], db: Session) -> Dict[str, Any]:
-        """Handle MPESA callback"""
+    @staticmethod
+    def _is_upstream_failure(response: httpx.Response) -> bool:
+        """5xx responses count against the breaker, except "still processing" """
+        if response.status_code < 500:
+            return False
         try:
-            checkout_request_id = data["body"]["stkCallback"]["checkoutRequestID"]
-
-            # Find the transaction in the database
-            transaction = db.query(models.Transaction).filter(
-                models.Transaction.transaction_id == checkout_request_id
-            ).first()
-
-            if transaction:
-                # Store the entire callback response in _feedback
-                transaction._feedback = data
-                # Get the ResultCode to determine success or failure
-                result_code = data["body"]["stkCallback"]["resultCode"]
-
-                if result_code == 0:
-                    # Transaction is successful
-                    transaction._status = models.TransactionStatus.ACCEPTED
-                    # Safely access CallbackMetadata
-                    callback_metadata = data["body"]["stkCallback"].get("callbackMetadata")
-                    if callback_metadata:
-                        items = callback_metadata.get("item", [])
-                        for item in items:
-                            if item.get("name") == "MpesaReceiptNumber" and "value" in item:
-                                transaction.transaction_code = item["value"]
-                                break
-                else:
-                    # Transaction failed
-                    transaction._status = models.TransactionStatus.REJECTED
+            return response.json().get("errorCode") != STILL_PROCESSING_ERROR
+        except ValueError:
+            return True
 
-                db.commit()
-                logger.info(f"Transaction {transaction.id} updated via callback: status {transaction._status}")
-            else:
-                logger.warning(f"Transaction not found for checkout_request_id: {checkout_request_id}")
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Make one Daraja request through the bulkhead and circuit breaker.
 
-            return data
-
-        except Exception as e:
-            logger.error(f"Error in callback: {str(e)}")
-            db.rollback()
+        Fails fast with 503 when the breaker is open or no call slot frees
+        up in time, instead of queueing behind a degraded upstream.
+        """
+        try:
+            async with self.bulkhead.slot():
+                self.breaker.before_call()
+                try:
+                    response = await self.client.request(method, path, **kwargs)
+                except httpx.TransportError:
+                    self.breaker.record_failure()
+                    raise
+                except BaseException:
+                    self.breaker.release()
+                    raise
+                if self._is_upstream_failure(response):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                return response
+        except CircuitOpenError as e:
+            logger.warning("Daraja circuit open; failing fast")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Callback processing failed: {str(e)}"
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="M-Pesa is temporarily unavailable, please try again shortly",
+                headers={"Retry-After": str(max(1, round(e.retry_after)))}
+            )
+        except BulkheadFullError:
+            logger.warning("Too many concurrent Daraja calls; rejecting")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="M-Pesa is busy, please try again shortly",
+                headers={"Retry-After": "1"}
             )
 
-    def generate_access_token(self) -> str:
-        """Generate an access token for the MPESA API"""
+    async def _post(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
+        """POST to Daraja with the cached token, retrying once if it was rejected"""
+        for attempt in range(2):
+            token = await self.generate_access_token()
+            headers = {
+                "Authorization": "Bearer " + token,
+                "Content-Type": "application/json",
+            }
+            response = await self._send("POST", path, json=payload, headers=headers)
+            if response.status_code != status.HTTP_401_UNAUTHORIZED or attempt:
+                return response
+            logger.warning("Daraja rejected the cached access token; refreshing")
+            self.invalidate_access_token(token)
+        return response
+
+    def invalidate_access_token(self, token: Optional[str] = None):
+        """Drop the cached token (only if it is still ``token``, when given)"""
+        if token is None or token == self._access_token:
+            self._access_token = None
+            self._token_expires_at = 0.0
+
+    async def generate_access_token(self) -> str:
+        """Return a cached access token, refreshing it ahead of expiry.
+
+        Only one coroutine fetches a new token at a time; while a refresh is
+        in flight, callers keep using the current token if it is still valid.
+        """
+        now = time.monotonic()
+        if self._access_token and now < self._token_expires_at - self.MPESA_TOKEN_REFRESH_MARGIN:
+            return self._access_token
+        if self._access_token and now < self._token_expires_at and self._token_lock.locked():
+            return self._access_token
+
+        async with self._token_lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self._access_token and time.monotonic() < self._token_expires_at - self.MPESA_TOKEN_REFRESH_MARGIN:
+                return self._access_token
+            token, expires_in = await self._fetch_access_token()
+            self._access_token = token
+            self._token_expires_at = time.monotonic() + expires_in
+            return token
+
+    async def _fetch_access_token(self):
+        """Request a new OAuth access token; returns (token, expires_in seconds)"""
         try:
-            endpoint = f"https://{self.MPESA_LNMO_ENVIRONMENT}.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
             credentials = f"{self.MPESA_LNMO_CONSUMER_KEY}:{self.MPESA_LNMO_CONSUMER_SECRET}"
             encoded_credentials = base64.b64encode(credentials.encode()).decode()
 
@@ -195,18 +341,31 @@ class LNMORepository:
                 "Content-Type": "application/json",
             }
 
-            response = requests.get(endpoint, headers=headers)
+            response = await self._send(
+                "GET",
+                "/oauth/v1/generate",
+                params={"grant_type": "client_credentials"},
+                headers=headers,
+            )
             response_data = response.json()
 
             if response.status_code == 200:
-                return response_data["access_token"]
+                return response_data["access_token"], int(response_data.get("expires_in", 3599))
             else:
                 raise Exception(
                     f"Failed to generate access token: {response_data.get('error_description', 'Unknown error')}"
                 )
 
+        except HTTPException:
+            raise
+        except httpx.TimeoutException as e:
+            logger.error("Timed out generating access token: %r", e)
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="M-Pesa did not respond in time"
+            )
         except Exception as e:
-            logger.error(f"Error generating access token: {str(e)}")
+            logger.error("Error generating access token: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to generate access token"
@@ -221,7 +380,7 @@ class LNMORepository:
             ).decode()
             return password
         except Exception as e:
-            logger.error(f"Error generating password: {str(e)}")
+            logger.error("Error generating password: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to generate password"
@@ -230,6 +389,7 @@ class LNMORepository:
 
 # Initialize the repository
 lnmo_repository = LNMORepository()
+reconciler = PaymentReconciler(lnmo_repository)
 
 # =============================================================================
 # API ROUTES
@@ -284,7 +444,7 @@ async def initiate_payment(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error initiating payment: {str(e)}")
+        logger.error("Error initiating payment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to initiate payment"
@@ -298,7 +458,7 @@ async def query_payment(
 ):
     """Query MPESA LNMO transaction status"""
     try:
-        response = lnmo_repository.query(query_data.checkout_request_id)
+        response = await lnmo_repository.query(query_data.checkout_request_id)
         
         return APIResponse(
             status="success",
@@ -309,7 +469,7 @@ async def query_payment(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error querying payment: {str(e)}")
+        logger.error("Error querying payment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to query payment"
@@ -323,52 +483,299 @@ async def payment_callback(
 ):
     """Handle MPESA callback (webhook endpoint)"""
     try:
-        logger.info(f"Received callback: {callback_data}")
-        
-        response = await lnmo_repository.callback(callback_data.dict(), db)
+        stk_callback = callback_data.body.stkCallback
+        logger.info(
+            "Received callback for %s (result code %s)",
+            stk_callback.checkoutRequestID,
+            stk_callback.resultCode,
+        )
         
+        # Persist and acknowledge; callback_inbox.worker applies it in a batch
+        callback_inbox.worker.enqueue(db, callback_data.dict())
+
         return {
             "ResultCode": 0,
             "ResultDesc": "Success"
         }
         
     except Exception as e:
-        logger.error(f"Error processing callback: {str(e)}")
+        logger.error("Error processing callback: %s", e)
+        db.rollback()
         return {
             "ResultCode": 1,
             "ResultDesc": "Failed"
         }
 
 
+@router.get("/lnmo/callback-inbox/metrics", status_code=status.HTTP_200_OK)
+async def callback_inbox_metrics(
+    db: db_dependency,
+    current_user: dict = Depends(require_admin_or_above)
+):
+    """Backlog and queue lag of the callback inbox (admin only)"""
+    return {
+        **callback_inbox.worker.metrics(db),
+        "event_subscribers": payment_events.broker.subscriber_count(),
+    }
+
+
+@router.get("/lnmo/reconciler/metrics", status_code=status.HTTP_200_OK)
+async def reconciler_metrics(
+    current_user: dict = Depends(require_admin_or_above)
+):
+    """Counts of transactions reconciled or timed out by the poller (admin only)"""
+    return reconciler.stats()
+
+
+@router.get("/lnmo/daraja/health", status_code=status.HTTP_200_OK)
+async def daraja_health(
+    current_user: dict = Depends(require_admin_or_above)
+):
+    """Circuit breaker and bulkhead state for outbound Daraja calls (admin only)"""
+    return {
+        "circuit_breaker": lnmo_repository.breaker.stats(),
+        "bulkhead": lnmo_repository.bulkhead.stats(),
+    }
+
+
+@router.post("/lnmo/reconcile", status_code=status.HTTP_200_OK)
+async def run_reconciler(
+    current_user: dict = Depends(require_admin_or_above)
+):
+    """Run a reconciliation pass now instead of waiting for the next interval"""
+    return await reconciler.reconcile_once()
+
+
+def _check_order_access(order_id: int, user: dict):
+    """404 for unknown orders, 403 when a customer asks about someone else's"""
+    db = SessionLocal()
+    try:
+        order = db.query(models.Orders.user_id).filter(
+            models.Orders.order_id == order_id
+        ).first()
+    finally:
+        db.close()
+    if order is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    if user["role"] == Role.CUSTOMER.value and order.user_id != user["id"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your order")
+
+
+def _latest_payment_event(order_id: int) -> Optional[Dict[str, Any]]:
+    """Status event for the order's latest transaction, from hot columns only"""
+    db = SessionLocal()
+    try:
+        transaction = db.query(models.Transaction).options(
+            load_only(
+                models.Transaction._pid,
+                models.Transaction.transaction_id,
+                models.Transaction._status,
+                models.Transaction.transaction_code,
+            )
+        ).filter(
+            models.Transaction._pid == order_id
+        ).order_by(models.Transaction.created_at.desc()).first()
+        return payment_events.transaction_event(transaction) if transaction else None
+    finally:
+        db.close()
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: payment\ndata: {json.dumps(event)}\n\n"
+
+
+def _redeem_order_ticket(order_id: int, ticket: str):
+    db = SessionLocal()
+    try:
+        redeem_stream_ticket(db, ticket, f"order:{order_id}")
+    finally:
+        db.close()
+
+
+@router.post("/lnmo/orders/{order_id}/events/ticket", status_code=status.HTTP_201_CREATED)
+async def create_payment_events_ticket(
+    order_id: int,
+    current_user: dict = Depends(get_active_user)
+):
+    """Single-use ticket for opening the order's payment event stream"""
+    await run_in_threadpool(_check_order_access, order_id, current_user)
+    return {
+        "ticket": create_stream_ticket(
+            current_user["id"], current_user["role"], f"order:{order_id}"
+        ),
+        "expires_in": STREAM_TICKET_EXPIRE_SECONDS,
+    }
+
+
+@router.get("/lnmo/orders/{order_id}/events")
+async def stream_payment_events(
+    order_id: int,
+    request: Request,
+    ticket: str = Query(..., description="From POST .../events/ticket (EventSource cannot send headers)")
+):
+    """Server-Sent Events stream of an order's payment status.
+
+    Sends the current status first, then every change, and closes once the
+    payment is ACCEPTED or REJECTED. Replaces polling POST /payments/transactions.
+    The ticket is consumed on connect, so a reconnect needs a new one.
+    """
+    await run_in_threadpool(_redeem_order_ticket, order_id, ticket)
+
+    async def event_stream():
+        # Subscribe before reading the snapshot so no change slips in between
+        with payment_events.broker.subscribe(order_id) as events:
+            last_sent = await run_in_threadpool(_latest_payment_event, order_id)
+            yield "retry: 3000\n\n"
+            if last_sent is not None:
+                yield _sse(last_sent)
+                if last_sent["status"] in FINAL_STATUS_VALUES:
+                    return
+
+            deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                if await request.is_disconnected():
+                    return
+                try:
+                    event = await asyncio.wait_for(events.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Catches callbacks applied by another API process
+                    event = await run_in_threadpool(_latest_payment_event, order_id)
+                    if event is None or event == last_sent:
+                        yield ": keep-alive\n\n"
+                        continue
+                yield _sse(event)
+                last_sent = event
+                if event["status"] in FINAL_STATUS_VALUES:
+                    return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _encode_cursor(created_at: datetime, transaction_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(transaction_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _import_statement(file: UploadFile) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        return StatementImport(db).run(file.file)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@router.post("/lnmo/statements/import", status_code=status.HTTP_200_OK)
+async def import_statement(
+    file: UploadFile = File(..., description="M-Pesa statement CSV export"),
+    current_user: dict = Depends(require_admin_or_above)
+):
+    """Match an M-Pesa statement against transactions (admin only).
+
+    Completed rows are matched by receipt code, then by account reference
+    and amount; matched transactions are marked ACCEPTED. Returns counts
+    plus the unmatched rows and the rows whose amounts disagree.
+    """
+    try:
+        report = await run_in_threadpool(_import_statement, file)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse statement: {e}"
+        )
+    except Exception as e:
+        logger.error("Error importing statement: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to import statement"
+        )
+    logger.info(
+        "Statement imported by %s: %s rows, %s updated, %s unmatched, %s mismatched, "
+        "%s conflicting",
+        current_user["username"], report["rows"], report["updated"],
+        report["unmatched"], report["mismatched"], report["conflicts"],
+    )
+    return report
+
+
 @router.get("/transactions", status_code=status.HTTP_200_OK)
 async def get_user_transactions(
     user: user_dependency,
-    db: db_dependency
+    db: db_dependency,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
-    """Get user's transaction history"""
+    """Get user's transaction history, newest first, one page at a time"""
     try:
-        transactions = db.query(models.Transaction).filter(
+        # Column projection over the hot fields only
+        query = db.query(models.Transaction).with_entities(
+            models.Transaction.id,
+            models.Transaction._pid.label("order_id"),
+            models.Transaction.transaction_amount,
+            models.Transaction._status.label("status"),
+            models.Transaction.transaction_code,
+            models.Transaction.transaction_id,
+            models.Transaction.created_at,
+            models.Transaction.party_a,
+        ).filter(
             models.Transaction.user_id == user.get("id")
-        ).order_by(models.Transaction.created_at.desc()).all()
-        
+        )
+        if cursor:
+            created_at, last_id = _decode_cursor(cursor)
+            query = query.filter(
+                or_(
+                    models.Transaction.created_at < created_at,
+                    and_(
+                        models.Transaction.created_at == created_at,
+                        models.Transaction.id < last_id,
+                    ),
+                )
+            )
+        rows = query.order_by(
+            models.Transaction.created_at.desc(), models.Transaction.id.desc()
+        ).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
         return {
             "transactions": [
                 {
                     "id": t.id,
-                    "order_id": t._pid,
+                    "order_id": t.order_id,
                     "amount": float(t.transaction_amount),
-                    "status": t._status.value,
+                    "status": t.status.value,
                     "transaction_code": t.transaction_code,
                     "transaction_id": t.transaction_id,
                     "created_at": t.created_at,
                     "phone_number": t.party_a
                 }
-                for t in transactions
-            ]
+                for t in rows
+            ],
+            "next_cursor": _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
         }
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching transactions: {str(e)}")
+        logger.error("Error fetching transactions: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch transactions"
@@ -411,7 +818,9 @@ async def get_transaction_by_order_id(
                 "transaction_aggregator": transaction.transaction_aggregator,
                 "transaction_timestamp": transaction.transaction_timestamp,
                 "transaction_details": transaction.transaction_details,
-                "feedback": transaction._feedback,
+                "result_code": transaction.result_code,
+                "result_desc": transaction.result_desc,
+                "feedback": latest_payload(db, transaction.id),
                 "updated_at": transaction.updated_at
             }
         }
@@ -419,7 +828,7 @@ async def get_transaction_by_order_id(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching transaction: {str(e)}")
+        logger.error("Error fetching transaction: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch transaction"
@@ -0,0 +1,183 @@
+"""
+Central logging setup for the API.
+
+Records are handed to a QueueHandler on the request path and written by a
+QueueListener thread, so handler I/O never blocks a request. Messages are
+rendered before queueing, only for records that pass the level and sampling
+filters, emitted as JSON lines tagged with the id of the request that
+produced them, and INFO-and-below records can be sampled to cut volume on
+busy endpoints. Credentials passed in query strings (SSE tickets, email
+verification links) are masked in the access log.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import zlib
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+# Fraction of INFO/DEBUG records kept; warnings and errors are always kept
+LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0"))
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RESERVED_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+
+# Query parameters that carry credentials, masked in logged request paths
+REDACTED_QUERY_PARAMS = ("token", "ticket", "refresh_token")
+_REDACTED_PARAM_RE = re.compile(
+    r"(?<=[?&])(%s)=[^&\s]*" % "|".join(map(re.escape, REDACTED_QUERY_PARAMS))
+)
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Tag records with the id of the request being handled"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO/DEBUG records.
+
+    Records that belong to a request are sampled by request id, so a kept
+    request keeps all of its log lines.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            bucket = zlib.crc32(request_id.encode()) % 10000
+            return bucket < self.rate * 10000
+        return random.random() < self.rate
+
+
+class RedactQueryFilter(logging.Filter):
+    """Mask credential query parameters in a record's string args.
+
+    Installed on uvicorn's access logger, whose args include the request
+    path with its query string.
+    """
+
+    def filter(self, record):
+        if isinstance(record.args, tuple):
+            record.args = tuple(
+                (
+                    _REDACTED_PARAM_RE.sub(r"\1=[REDACTED]", arg)
+                    if isinstance(arg, str)
+                    else arg
+                )
+                for arg in record.args
+            )
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that renders records just before they are queued.
+
+    ``msg % args`` and the traceback are rendered in the calling thread,
+    because the args may be mutated (or the traceback's frames released)
+    before the listener gets to them; the handler's filters run first, so
+    records dropped by sampling are never rendered. Unlike the stock
+    ``prepare`` the record is not run through a formatter, which is left to
+    the listener's handlers, and ``extra`` fields are kept for JsonFormatter.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(
+                    record.exc_info
+                )
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as single-line JSON objects"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+def setup_logging():
+    """Route all logging through a background queue listener (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        )
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter(LOG_INFO_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    # A logger-level filter, so it applies whichever handlers uvicorn installs
+    logging.getLogger("uvicorn.access").addFilter(RedactQueryFilter())
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
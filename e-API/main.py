@@ -5,7 +5,9 @@ from fastapi import (
     status,
     UploadFile,
     File,
+    Form,
     Query,
+    Request,
 )
 from pydantic_models import (
     ProductsBase,
@@ -18,6 +20,7 @@ from pydantic_models import (
     Role,
     PaginatedProductResponse,
     ImageResponse,
+    MultiImageUploadResponse,
     AddressCreate,
     AddressResponse,
     PaginatedOrderResponse,
@@ -33,8 +36,15 @@ from pydantic_models import (
     ProductSpecificationResponse,
     FavoriteCreate,
     FavoriteResponse,
+    FavoriteLookupRequest,
+    FavoriteLookupResponse,
     ReviewCreate,
     ReviewResponse,
+    ReviewPage,
+    OrderReviewsCreate,
+    OrderReviewsResponse,
+    RatingSummary,
+    ProductDetailResponse,
     ProductCreateRequest,
     SubcategoryBase,
     SubcategoryResponse,
@@ -48,8 +58,8 @@ from pydantic_models import (
 from typing import Annotated, List, Optional
 import models
 from database import engine, db_dependency
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, noload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 import auth
 from auth import (
     get_active_user,
@@ -61,7 +71,7 @@ from auth import (
     send_admin_new_order_notification,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func, or_
+from sqlalchemy import func, insert, or_, update
 from datetime import datetime, timedelta
 import logging
 from dotenv import load_dotenv
@@ -69,14 +79,21 @@ import os
 from decimal import Decimal
 from math import ceil
 import uuid
-from pathlib import Path
-from fastapi.staticfiles import StaticFiles
+import asyncio
+from starlette.concurrency import run_in_threadpool
 import lnmo
+import callback_inbox
+import ratings
+import reviews
+import images
+import media
+import uploads
 from models import Users
+from logging_config import setup_logging, request_id_var
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
@@ -93,8 +110,60 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag every log record for this request with an X-Request-ID"""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 user_dependency = Annotated[dict, Depends(get_active_user)]
 
+# Keep references to background tasks so they are not garbage collected
+background_tasks = set()
+
+
+async def run_periodically(func, interval: int):
+    """Run a blocking maintenance job in the threadpool every interval seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(func)
+        except Exception as e:
+            logger.error("Error in periodic job %s: %s", func.__name__, e)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    await run_in_threadpool(auth.sync_revocation_list)
+    for func, interval in [
+        # Pull token revocations made by other workers into this process
+        (auth.sync_revocation_list, auth.REVOCATION_SYNC_SECONDS),
+        (auth.sweep_expired_tokens, auth.TOKEN_SWEEP_INTERVAL_SECONDS),
+        # Delete uploads whose last reference went inside the grace period
+        (images.sweep_unreferenced_images, images.UPLOAD_SWEEP_INTERVAL_SECONDS),
+    ]:
+        task = asyncio.create_task(run_periodically(func, interval))
+        background_tasks.add(task)
+    # Apply M-Pesa callbacks acknowledged by /payments/lnmo/callback
+    background_tasks.add(asyncio.create_task(callback_inbox.worker.run()))
+    # Resolve STK pushes whose callback never arrived
+    background_tasks.add(asyncio.create_task(lnmo.reconciler.run()))
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    await lnmo.lnmo_repository.aclose()
+    images.shutdown()
+
 
 def require_customer_only(current_user: dict = Depends(get_active_user)):
     """Dependency to ensure only customers can access"""
@@ -109,63 +178,161 @@ def require_customer_only(current_user: dict = Depends(get_active_user)):
 def require_admin(user: user_dependency):
     """Check if user has admin or superadmin role"""
     role = user.get("role")
-    print(f"DEBUG: User role from token: '{role}'")  # Add this line
-    print(
-        f"DEBUG: Role.ADMIN.value: '{Role.ADMIN.value}', Role.SUPERADMIN.value: '{Role.SUPERADMIN.value}'"
-    )  # Add this line
-
     if role not in [Role.ADMIN.value, Role.SUPERADMIN.value]:
-        print(f"Access denied for role: {role}")
+        logger.warning(
+            "Admin access denied for user %s (role %s)", user.get("id"), role
+        )
         raise HTTPException(status_code=403, detail="Admin access required")
-
-    print(f"Access granted for role: {role}")
     return user
 
 
 # Ensure uploads directory exists
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+uploads.ensure_upload_dirs()
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Cached, range-aware serving of /uploads (or hand-off to a front proxy)
+app.include_router(media.router)
 
 
 @app.post(
     "/upload-image", response_model=ImageResponse, status_code=status.HTTP_201_CREATED
 )
-async def upload_image(user: user_dependency, file: UploadFile = File(...)):
+async def upload_image(
+    request: Request, user: user_dependency, file: UploadFile = File(...)
+):
     require_admin(user)
     try:
-        # Validate file type
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Only image files are allowed")
-
-        # Validate file size (e.g., max 20MB)
-        max_size = 20 * 1024 * 1024  # 20MB in bytes
-        content = await file.read()
-        if len(content) > max_size:
-            raise HTTPException(status_code=400, detail="File size exceeds 20MB limit")
-
-        # Generate unique filename
-        file_extension = file.filename.split(".")[-1].lower()
-        if file_extension not in ["jpg", "jpeg", "png", "gif"]:
-            raise HTTPException(status_code=400, detail="Unsupported image format")
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-
-        # Save file
-        with file_path.open("wb") as f:
-            f.write(content)
+        uploads.check_content_length(request.headers.get("content-length"))
+        # Streamed to disk in chunks and stored under its SHA-256 digest, so
+        # repeats reuse the same file; the type comes from the magic bytes
+        unique_filename = await uploads.save_upload(file)
+        await images.check_decodable(unique_filename)
 
         # Generate URL (assuming static file serving or CDN in production)
         img_url = f"/uploads/{unique_filename}"
 
-        logger.info(f"Image uploaded: {unique_filename} by user {user.get('id')}")
+        logger.info("Image uploaded: %s by user %s", unique_filename, user.get("id"))
         return {"message": "Image uploaded successfully", "img_url": img_url}
+    except uploads.UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
-        logger.error(f"Error uploading image: {str(e)}")
+        logger.error("Error uploading image: %s", e)
         raise HTTPException(status_code=500, detail="Error uploading image")
 
 
+@app.post(
+    "/upload-images",
+    response_model=MultiImageUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_images(
+    request: Request,
+    db: db_dependency,
+    user: user_dependency,
+    files: List[UploadFile] = File(...),
+    product_id: Optional[int] = Form(None),
+):
+    """Store several images at once, optionally attaching them to a product.
+
+    Files are copied and validated concurrently; one that is rejected is
+    reported in its own entry without failing the others. With
+    ``product_id`` every stored image gets a ``ProductImage`` row, all
+    inserted in one statement and one commit.
+    """
+    require_admin(user)
+    if len(files) > uploads.UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {uploads.UPLOAD_MAX_FILES} files per upload",
+        )
+    try:
+        uploads.check_content_length(
+            request.headers.get("content-length"), files=len(files)
+        )
+    except uploads.UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if product_id is not None:
+        exists = (
+            db.query(models.Products.id)
+            .filter(models.Products.id == product_id)
+            .first()
+        )
+        if not exists:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+    semaphore = asyncio.Semaphore(uploads.UPLOAD_CONCURRENCY)
+
+    async def store(file: UploadFile):
+        async with semaphore:
+            try:
+                return await uploads.save_upload(file)
+            except uploads.UploadRejected as e:
+                return e
+
+    stored = await asyncio.gather(*(store(file) for file in files))
+
+    # Identical files share one stored name; render each name only once
+    async def render(filename: str):
+        try:
+            await images.check_decodable(filename)
+        except uploads.UploadRejected as e:
+            return e
+
+    filenames = list(dict.fromkeys(name for name in stored if isinstance(name, str)))
+    rendered = await asyncio.gather(*(render(name) for name in filenames))
+    rejected = {
+        name: error for name, error in zip(filenames, rendered) if error is not None
+    }
+
+    results = []
+    for file, outcome in zip(files, stored):
+        error = outcome if isinstance(outcome, Exception) else rejected.get(outcome)
+        if error is not None:
+            results.append({"filename": file.filename, "error": error.detail})
+        else:
+            results.append(
+                {"filename": file.filename, "img_url": f"/uploads/{outcome}"}
+            )
+    img_urls = list(dict.fromkeys(r["img_url"] for r in results if "img_url" in r))
+    if not img_urls:
+        first = next(
+            error
+            for error in (*stored, *rendered)
+            if isinstance(error, uploads.UploadRejected)
+        )
+        raise HTTPException(status_code=first.status_code, detail=first.detail)
+
+    if product_id is not None:
+        db.execute(
+            insert(models.ProductImage),
+            [{"product_id": product_id, "img_url": url} for url in img_urls],
+        )
+        db.commit()
+        image_ids = dict(
+            db.query(models.ProductImage.img_url, func.max(models.ProductImage.id))
+            .filter(
+                models.ProductImage.product_id == product_id,
+                models.ProductImage.img_url.in_(img_urls),
+            )
+            .group_by(models.ProductImage.img_url)
+        )
+        for result in results:
+            if "img_url" in result:
+                result["image_id"] = image_ids.get(result["img_url"])
+
+    logger.info(
+        "Uploaded %d of %d images by user %s",
+        len(img_urls),
+        len(files),
+        user.get("id"),
+    )
+    return {
+        "product_id": product_id,
+        "uploaded": sum("img_url" in r for r in results),
+        "failed": sum("error" in r for r in results),
+        "images": results,
+    }
+
+
 # Updated endpoint to support category and subcategory filtering
 @app.get(
     "/public/products",
@@ -201,17 +368,17 @@ async def browse_products(
         # Apply search filter
         if search:
             query = query.filter(models.Products.name.ilike(f"%{search}%"))
-            logger.info(f"Product search query: {search}")
+            logger.info("Product search query: %s", search)
 
         # Apply category filter
         if category_id:
             query = query.filter(models.Products.category_id == category_id)
-            logger.info(f"Product category filter: {category_id}")
+            logger.info("Product category filter: %s", category_id)
 
         # Apply subcategory filter
         if subcategory_id:
             query = query.filter(models.Products.subcategory_id == subcategory_id)
-            logger.info(f"Product subcategory filter: {subcategory_id}")
+            logger.info("Product subcategory filter: %s", subcategory_id)
 
         total = query.count()
         products = (
@@ -222,8 +389,8 @@ async def browse_products(
                 joinedload(models.Products.product_specifications).joinedload(
                     models.ProductSpecification.specification
                 ),
-                joinedload(models.Products.favorites),
-                joinedload(models.Products.reviews),
+                # Cards only show rating/rating_count; reviews are paged separately
+                noload(models.Products.reviews),
             )
             .offset(skip)
             .limit(limit)
@@ -240,16 +407,17 @@ async def browse_products(
             "pages": total_pages,
         }
     except Exception as e:
-        logger.error(f"Error fetching products: {str(e)}")
+        logger.error("Error fetching products: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching products")
 
 
 @app.get(
     "/public/products/{product_id}",
-    response_model=ProductResponse,
+    response_model=ProductDetailResponse,
     status_code=status.HTTP_200_OK,
 )
 async def get_product_by_id(product_id: int, db: db_dependency):
+    """Product details with its rating summary and the newest reviews"""
     try:
         product = (
             db.query(models.Products)
@@ -260,8 +428,8 @@ async def get_product_by_id(product_id: int, db: db_dependency):
                 joinedload(models.Products.product_specifications).joinedload(
                     models.ProductSpecification.specification
                 ),
-                joinedload(models.Products.favorites),
-                joinedload(models.Products.reviews).joinedload(models.Review.user),
+                # Reviews are paged separately below
+                noload(models.Products.reviews),
             )
             .filter(models.Products.id == product_id)
             .first()
@@ -269,9 +437,18 @@ async def get_product_by_id(product_id: int, db: db_dependency):
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        return product
+        page = reviews.review_page(db, product_id, limit=reviews.REVIEW_PAGE_SIZE)
+        detail = ProductDetailResponse.model_validate(product)
+        detail.reviews = [ReviewResponse.model_validate(r) for r in page["reviews"]]
+        detail.reviews_next_cursor = page["next_cursor"]
+        detail.rating_summary = RatingSummary(
+            **ratings.get_rating_summary(db, product_id)
+        )
+        return detail
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching product: {str(e)}")
+        logger.error("Error fetching product: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching product")
 
 
@@ -285,7 +462,7 @@ async def browse_categories(db: db_dependency):
         categories = db.query(models.Categories).all()
         return categories
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching categories: {str(e)}")
+        logger.error("Error fetching categories: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching categories")
 
 
@@ -302,7 +479,7 @@ async def browse_subcategories(db: db_dependency, category_id: int = None):
         subcategories = query.all()
         return subcategories
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching subcategories: {str(e)}")
+        logger.error("Error fetching subcategories: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching subcategories")
 
 
@@ -321,7 +498,7 @@ async def create_category(
         return db_category
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error creating category: {str(e)}")
+        logger.error("Error creating category: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -340,6 +517,7 @@ async def add_product(
         # Add images
         if payload.images:
             for img in payload.images:
+                await images.ensure_variants(img.img_url)
                 db_image = models.ProductImage(
                     product_id=add_product.id, img_url=img.img_url
                 )
@@ -357,7 +535,7 @@ async def add_product(
         return {"message": "Product added successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error adding product: {str(e)}")
+        logger.error("Error adding product: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -388,7 +566,7 @@ async def update_product(
         return {"message": "Product updated successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error updating product: {str(e)}")
+        logger.error("Error updating product: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -418,35 +596,28 @@ async def delete_product(product_id: int, db: db_dependency, user: user_dependen
                 status_code=400, detail="Cannot delete product with existing orders"
             )
 
-        # Get all product images and delete them from disk
-        product_images = (
-            db.query(models.ProductImage)
+        image_urls = [
+            row.img_url
+            for row in db.query(models.ProductImage)
+            .with_entities(models.ProductImage.img_url)
             .filter(models.ProductImage.product_id == product_id)
-            .all()
-        )
-
-        for image in product_images:
-            # Delete image file from disk if it's a local upload
-            if image.img_url and image.img_url.startswith("/uploads/"):
-                file_path = UPLOAD_DIR / image.img_url.replace("/uploads/", "")
-                try:
-                    if file_path.exists():
-                        file_path.unlink()
-                        logger.info(f"Deleted image file: {file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete image file {file_path}: {e}")
+        ]
 
         # Delete the product (this will cascade delete images, specs, etc.)
         db.delete(product)
         db.commit()
 
+        # Remove image files no other product or banner shares
+        for img_url in set(image_urls):
+            images.release_image(db, img_url)
+
         logger.info(
-            f"Product {product_id} and all associated files deleted successfully"
+            "Product %s and all associated files deleted successfully", product_id
         )
         return {"message": "Product deleted successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error deleting product: {str(e)}")
+        logger.error("Error deleting product: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -598,20 +769,20 @@ async def create_order(
                     }
                 )
         except Exception as e:
-            logger.error(f"Failed to send order confirmation email: {str(e)}")
+            logger.error("Failed to send order confirmation email: %s", e)
 
-        logger.info(f"Order {new_order.order_id} created for user {user.get('id')}")
+        logger.info("Order %s created for user %s", new_order.order_id, user.get("id"))
         return {
             "message": "Order created successfully",
             "order_id": new_order.order_id,
         }
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error creating order: {str(e)}")
+        logger.error("Error creating order: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
     except ValueError as e:
         db.rollback()
-        logger.error(f"Invalid quantity value: {str(e)}")
+        logger.error("Invalid quantity value: %s", e)
         raise HTTPException(status_code=400, detail="Invalid quantity value")
 
 
@@ -622,10 +793,17 @@ async def get_available_transactions(user: user_dependency, db: db_dependency):
     try:
         transactions = (
             db.query(models.Transaction)
+            .with_entities(
+                models.Transaction.id,
+                models.Transaction.transaction_amount,
+                models.Transaction.transaction_code,
+                models.Transaction.transaction_timestamp,
+                models.Transaction.account_reference,
+            )
             .filter(
                 models.Transaction.user_id == user.get("id"),
                 models.Transaction._status == models.TransactionStatus.ACCEPTED,
-                models.Transaction.order_id.is_(None),  # Not yet linked to any order
+                models.Transaction._pid.is_(None),  # Not yet linked to any order
             )
             .all()
         )
@@ -643,7 +821,7 @@ async def get_available_transactions(user: user_dependency, db: db_dependency):
             ]
         }
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching available transactions: {str(e)}")
+        logger.error("Error fetching available transactions: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching transactions")
 
 
@@ -709,14 +887,14 @@ async def get_order_by_id(order_id: int, user: user_dependency, db: db_dependenc
         )
 
         if not order:
-            logger.info(f"Order not found: ID {order_id} for user {user.get('id')}")
+            logger.info("Order not found: ID %s for user %s", order_id, user.get("id"))
             raise HTTPException(status_code=404, detail="Order not found")
 
-        logger.info(f"Retrieved order {order_id} for user {user.get('id')}")
+        logger.info("Retrieved order %s for user %s", order_id, user.get("id"))
         return order
 
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching order {order_id}: {str(e)}")
+        logger.error("Error fetching order %s: %s", order_id, e)
         raise HTTPException(status_code=500, detail="Error fetching order")
 
 
@@ -739,7 +917,7 @@ async def update_order_status(
             db.query(models.Orders).filter(models.Orders.order_id == order_id).first()
         )
         if not order:
-            logger.info(f"Order not found: ID {order_id}")
+            logger.info("Order not found: ID %s", order_id)
             raise HTTPException(status_code=404, detail="Order not found")
 
         # Update status from the request body
@@ -756,12 +934,15 @@ async def update_order_status(
         db.refresh(order)
 
         logger.info(
-            f"Order {order_id} status updated to {request.status} by user {user.get('id')}"
+            "Order %s status updated to %s by user %s",
+            order_id,
+            request.status,
+            user.get("id"),
         )
         return {"message": f"Order status updated to {request.status}"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error updating order status for order {order_id}: {str(e)}")
+        logger.error("Error updating order status for order %s: %s", order_id, e)
         raise HTTPException(status_code=500, detail="Error updating order status")
 
 
@@ -785,12 +966,12 @@ async def create_address(
         db.commit()
         db.refresh(db_address)
         logger.info(
-            f"Address created for user {user.get('id')}: Address ID {db_address.id}"
+            "Address created for user %s: Address ID %s", user.get("id"), db_address.id
         )
         return db_address
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error creating address: {str(e)}")
+        logger.error("Error creating address: %s", e)
         raise HTTPException(status_code=500, detail="Error creating address")
 
 
@@ -806,12 +987,14 @@ async def get_addresses(user: user_dependency, db: db_dependency):
             .all()
         )
         if not addresses:
-            logger.info(f"No addresses found for user {user.get('id')}")
+            logger.info("No addresses found for user %s", user.get("id"))
             return []
-        logger.info(f"Retrieved {len(addresses)} addresses for user {user.get('id')}")
+        logger.info(
+            "Retrieved %s addresses for user %s", len(addresses), user.get("id")
+        )
         return addresses
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching addresses: {str(e)}")
+        logger.error("Error fetching addresses: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching addresses")
 
 
@@ -827,7 +1010,9 @@ async def delete_address(address_id: int, user: user_dependency, db: db_dependen
             .first()
         )
         if not address:
-            logger.info(f"Address not found: ID {address_id} for user {user.get('id')}")
+            logger.info(
+                "Address not found: ID %s for user %s", address_id, user.get("id")
+            )
             raise HTTPException(status_code=404, detail="Address not found")
 
         # Check if address is used in any orders
@@ -838,7 +1023,7 @@ async def delete_address(address_id: int, user: user_dependency, db: db_dependen
         )
         if order:
             logger.info(
-                f"Cannot delete address {address_id}: used in order {order.order_id}"
+                "Cannot delete address %s: used in order %s", address_id, order.order_id
             )
             raise HTTPException(
                 status_code=400, detail="Cannot delete address used in orders"
@@ -846,11 +1031,11 @@ async def delete_address(address_id: int, user: user_dependency, db: db_dependen
 
         db.delete(address)
         db.commit()
-        logger.info(f"Address {address_id} deleted by user {user.get('id')}")
+        logger.info("Address %s deleted by user %s", address_id, user.get("id"))
         return {"message": "Address deleted successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error deleting address {address_id}: {str(e)}")
+        logger.error("Error deleting address %s: %s", address_id, e)
         raise HTTPException(status_code=500, detail="Error deleting address")
 
 
@@ -874,7 +1059,9 @@ async def update_address(
         )
 
         if not db_address:
-            logger.info(f"Address not found: ID {address_id} for user {user.get('id')}")
+            logger.info(
+                "Address not found: ID %s for user %s", address_id, user.get("id")
+            )
             raise HTTPException(status_code=404, detail="Address not found")
 
         # If setting as default, unset other default addresses for this user
@@ -891,11 +1078,11 @@ async def update_address(
 
         db.commit()
         db.refresh(db_address)
-        logger.info(f"Address {address_id} updated by user {user.get('id')}")
+        logger.info("Address %s updated by user %s", address_id, user.get("id"))
         return db_address
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error updating address {address_id}: {str(e)}")
+        logger.error("Error updating address %s: %s", address_id, e)
         raise HTTPException(status_code=500, detail="Error updating address")
 
 
@@ -955,7 +1142,11 @@ async def fetch_all_orders(
         pages = ceil(total / limit) if limit > 0 else 0
 
         logger.info(
-            f"Admin {user.get('id')} fetched {len(orders)} orders (page {page}, limit {limit})"
+            "Admin %s fetched %s orders (page %s, limit %s)",
+            user.get("id"),
+            len(orders),
+            page,
+            limit,
         )
         return {
             "items": orders,
@@ -965,7 +1156,7 @@ async def fetch_all_orders(
             "pages": pages,
         }
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching all orders: {str(e)}")
+        logger.error("Error fetching all orders: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching orders")
 
 
@@ -995,12 +1186,16 @@ async def get_all_users(
 
         result = get_paginated_users(db, query, page, limit, search)
         logger.info(
-            f"Superadmin {current_user['username']} retrieved {len(result['items'])} users (page {page}/{result['pages']})"
+            "Superadmin %s retrieved %s users (page %s/%s)",
+            current_user["username"],
+            len(result["items"]),
+            page,
+            result["pages"],
         )
         return result
 
     except Exception as e:
-        logger.error(f"Error fetching users: {str(e)}")
+        logger.error("Error fetching users: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch users",
@@ -1056,30 +1251,25 @@ async def get_user_by_id(
 ):
     """Get specific user by ID - accessible by superadmin only"""
     try:
-        user = db.query(Users).filter(Users.id == user_id).first()
-        if not user:
+        profile = auth.get_user_profile(db, user_id)
+        if not profile:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
 
-        user_role = get_user_role(user.role)
         return {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "role": user_role,
-            "created_at": (
-                user.created_at.isoformat()
-                if hasattr(user, "created_at") and user.created_at
-                else None
-            ),
+            "id": profile["id"],
+            "username": profile["username"],
+            "email": profile["email"],
+            "role": profile["role"],
+            "created_at": profile["created_at"],
             "status": "active",
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching user {user_id}: {str(e)}")
+        logger.error("Error fetching user %s: %s", user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch user",
@@ -1120,7 +1310,7 @@ async def get_admin_stats(
                 )
 
         logger.info(
-            f"User statistics retrieved by superadmin {current_user['username']}"
+            "User statistics retrieved by superadmin %s", current_user["username"]
         )
         return {
             "total_superadmins": total_superadmins,
@@ -1133,32 +1323,41 @@ async def get_admin_stats(
         }
 
     except Exception as e:
-        logger.error(f"Error fetching user stats: {str(e)}")
+        logger.error("Error fetching user stats: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch user statistics",
         )
 
 
+@app.get("/superadmin/metrics/cache", status_code=status.HTTP_200_OK)
+async def get_cache_metrics(current_user: dict = Depends(require_superadmin)):
+    """Hit-rate metrics for the in-process caches"""
+    return {
+        "user_profiles": auth.user_profile_cache.stats(),
+        "rating_summaries": ratings.rating_summary_cache.stats(),
+    }
+
+
 @app.get("/me", status_code=status.HTTP_200_OK)
 async def get_current_user(db: db_dependency, user: dict = Depends(get_active_user)):
     """Get current authenticated user information"""
     try:
-        current_user = db.query(Users).filter(Users.id == user["id"]).first()
-        if not current_user:
-            logger.warning(f"User not found in database: {user['id']}")
+        profile = auth.get_user_profile(db, user["id"])
+        if not profile:
+            logger.warning("User not found in database: %s", user["id"])
             raise HTTPException(status_code=404, detail="User not found")
 
-        user_role = get_user_role(current_user.role)
-        logger.info(f"Retrieved user info for: {current_user.username}")
         return {
-            "id": current_user.id,
-            "username": current_user.username,
-            "email": current_user.email,
-            "role": user_role,
+            "id": profile["id"],
+            "username": profile["username"],
+            "email": profile["email"],
+            "role": profile["role"],
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error retrieving user info: {str(e)}")
+        logger.error("Error retrieving user info: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -1168,6 +1367,8 @@ async def add_product_image(
     product_id: int, image: ProductImageCreate, db: db_dependency, user: user_dependency
 ):
     require_admin(user)
+    # Uploads from before variants existed get them on first use
+    await images.ensure_variants(image.img_url)
     db_image = models.ProductImage(product_id=product_id, img_url=image.img_url)
     db.add(db_image)
     db.commit()
@@ -1177,12 +1378,12 @@ async def add_product_image(
 
 @app.get("/products/{product_id}/images", response_model=List[ProductImageResponse])
 async def get_product_images(product_id: int, db: db_dependency):
-    images = (
+    product_images = (
         db.query(models.ProductImage)
         .filter(models.ProductImage.product_id == product_id)
         .all()
     )
-    return images
+    return product_images
 
 
 @app.delete("/products/{product_id}/images/{image_id}", status_code=200)
@@ -1200,21 +1401,11 @@ async def delete_product_image(
     )
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
-    # Delete the image file from disk if it exists
     img_url = image.img_url
-    # Only handle local uploads (not external URLs)
-    if img_url and img_url.startswith("/uploads/"):
-        file_path = UPLOAD_DIR / img_url.replace("/uploads/", "")
-        try:
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"Deleted image file: {file_path}")
-            else:
-                logger.warning(f"Image file not found for deletion: {file_path}")
-        except Exception as e:
-            logger.error(f"Error deleting image file: {file_path}: {str(e)}")
     db.delete(image)
     db.commit()
+    # Delete the file and its variants unless something else still uses it
+    images.release_image(db, img_url)
     return {"message": "Image deleted"}
 
 
@@ -1293,7 +1484,7 @@ async def delete_subcategory_specification(
         return {"message": "Specification deleted successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error deleting specification: {str(e)}")
+        logger.error("Error deleting specification: %s", e)
         raise HTTPException(status_code=500, detail="Error deleting specification")
 
 
@@ -1332,7 +1523,7 @@ async def update_subcategory_specification(
         return spec
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error updating specification: {str(e)}")
+        logger.error("Error updating specification: %s", e)
         raise HTTPException(status_code=500, detail="Error updating specification")
 
 
@@ -1368,7 +1559,7 @@ async def update_category(
         return category
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error updating category: {str(e)}")
+        logger.error("Error updating category: %s", e)
         raise HTTPException(status_code=500, detail="Error updating category")
 
 
@@ -1410,7 +1601,7 @@ async def delete_category(
         return {"message": "Category deleted successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error deleting category: {str(e)}")
+        logger.error("Error deleting category: %s", e)
         raise HTTPException(status_code=500, detail="Error deleting category")
 
 
@@ -1448,12 +1639,39 @@ async def get_product_specifications(product_id: int, db: db_dependency):
 
 
 # --- Favorites (Wishlist) ---
+def _adjust_favorite_count(db: Session, product_id: int, delta: int):
+    """Keep products.favorite_count in step with a favorite write (no commit)"""
+    db.execute(
+        update(models.Products)
+        .where(models.Products.id == product_id)
+        .values(favorite_count=models.Products.favorite_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
 @app.post("/favorites", response_model=FavoriteResponse)
 async def add_favorite(
     favorite: FavoriteCreate, db: db_dependency, user: user_dependency
 ):
     db_fav = models.Favorite(user_id=user.get("id"), product_id=favorite.product_id)
     db.add(db_fav)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Already favorited (unique user/product) or no such product
+        db.rollback()
+        existing = (
+            db.query(models.Favorite)
+            .filter(
+                models.Favorite.user_id == user.get("id"),
+                models.Favorite.product_id == favorite.product_id,
+            )
+            .first()
+        )
+        if not existing:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return existing
+    _adjust_favorite_count(db, favorite.product_id, 1)
     db.commit()
     db.refresh(db_fav)
     return db_fav
@@ -1478,34 +1696,29 @@ async def delete_favorite(favorite_id: int, db: db_dependency, user: user_depend
         raise HTTPException(
             status_code=403, detail="Not authorized to delete this favorite"
         )
+    _adjust_favorite_count(db, fav.product_id, -1)
     db.delete(fav)
     db.commit()
     return {"message": "Favorite removed successfully"}
 
 
-# Utility function to calculate and update product rating from reviews
-def update_product_rating(db: Session, product_id: int):
-    """Calculate average rating from reviews and update product rating"""
-    try:
-        # Calculate average rating from all reviews for this product
-        avg_rating = (
-            db.query(func.avg(models.Review.rating))
-            .filter(models.Review.product_id == product_id)
-            .scalar()
-        )
-
-        # Update product rating
-        product = (
-            db.query(models.Products).filter(models.Products.id == product_id).first()
+@app.post("/favorites/lookup", response_model=FavoriteLookupResponse)
+async def lookup_favorites(
+    lookup: FavoriteLookupRequest, db: db_dependency, user: user_dependency
+):
+    """Which of the given products the caller has favorited"""
+    if not lookup.product_ids:
+        return {"favorited": []}
+    rows = (
+        db.query(models.Favorite)
+        .with_entities(models.Favorite.product_id)
+        .filter(
+            models.Favorite.user_id == user.get("id"),
+            models.Favorite.product_id.in_(set(lookup.product_ids)),
         )
-        if product:
-            product.rating = float(avg_rating) if avg_rating else 0.0
-            db.commit()
-            return product.rating
-    except Exception as e:
-        logger.error(f"Error updating product rating: {str(e)}")
-        db.rollback()
-        return 0.0
+        .all()
+    )
+    return {"favorited": sorted(row.product_id for row in rows)}
 
 
 @app.post("/reviews", response_model=ReviewResponse)
@@ -1537,25 +1750,156 @@ async def add_review(review: ReviewCreate, db: db_dependency, user: user_depende
             comment=review.comment,
         )
         db.add(db_review)
+        # Adjust the product's rating aggregates in the same transaction
+        ratings.apply_rating_delta(db, review.product_id, new_rating=review.rating)
         db.commit()
         db.refresh(db_review)
-
-        # Update product rating
-        update_product_rating(db, review.product_id)
+        ratings.rating_summary_cache.invalidate(review.product_id)
 
         return db_review
+    except IntegrityError:
+        # A concurrent request reviewed this product for this order first
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="You have already reviewed this product for this order",
+        )
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error adding review: {str(e)}")
+        logger.error("Error adding review: %s", e)
         raise HTTPException(status_code=500, detail="Error adding review")
 
 
-@app.get("/products/{product_id}/reviews", response_model=List[ReviewResponse])
-async def get_product_reviews(product_id: int, db: db_dependency):
-    reviews = (
-        db.query(models.Review).filter(models.Review.product_id == product_id).all()
-    )
-    return reviews
+@app.post("/orders/{order_id}/reviews", response_model=OrderReviewsResponse)
+async def add_order_reviews(
+    order_id: int, payload: OrderReviewsCreate, db: db_dependency, user: user_dependency
+):
+    """Review several lines of a delivered order in one request"""
+    user_id = user.get("id")
+    product_ids = [item.product_id for item in payload.reviews]
+    if len(set(product_ids)) != len(product_ids):
+        raise HTTPException(
+            status_code=400, detail="Each product can only be reviewed once per order"
+        )
+    try:
+        order = (
+            db.query(models.Orders)
+            .with_entities(models.Orders.status)
+            .filter(
+                models.Orders.order_id == order_id, models.Orders.user_id == user_id
+            )
+            .first()
+        )
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        if order.status != models.OrderStatus.DELIVERED:
+            raise HTTPException(
+                status_code=400, detail="Only delivered orders can be reviewed"
+            )
+
+        order_products = {
+            row.product_id
+            for row in db.query(models.OrderDetails)
+            .with_entities(models.OrderDetails.product_id)
+            .filter(
+                models.OrderDetails.order_id == order_id,
+                models.OrderDetails.product_id.in_(product_ids),
+            )
+        }
+        not_in_order = [pid for pid in product_ids if pid not in order_products]
+        if not_in_order:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Products not in this order: {not_in_order}",
+            )
+
+        already_reviewed = {
+            row.product_id
+            for row in db.query(models.Review)
+            .with_entities(models.Review.product_id)
+            .filter(
+                models.Review.user_id == user_id,
+                models.Review.order_id == order_id,
+                models.Review.product_id.in_(product_ids),
+            )
+        }
+        new_items = [
+            item for item in payload.reviews if item.product_id not in already_reviewed
+        ]
+        created = []
+        if new_items:
+            created_at = datetime.utcnow()
+            db.execute(
+                insert(models.Review),
+                [
+                    {
+                        "user_id": user_id,
+                        "product_id": item.product_id,
+                        "order_id": order_id,
+                        "rating": item.rating,
+                        "comment": item.comment,
+                        "created_at": created_at,
+                    }
+                    for item in new_items
+                ],
+            )
+            # Each product appears once, so this is one aggregate update per product
+            for item in new_items:
+                ratings.apply_rating_delta(db, item.product_id, new_rating=item.rating)
+            db.commit()
+            for item in new_items:
+                ratings.rating_summary_cache.invalidate(item.product_id)
+
+            created = (
+                reviews.review_rows(db)
+                .filter(
+                    models.Review.user_id == user_id,
+                    models.Review.order_id == order_id,
+                    models.Review.product_id.in_([i.product_id for i in new_items]),
+                )
+                .order_by(models.Review.id)
+                .all()
+            )
+
+        return {"created": created, "already_reviewed": sorted(already_reviewed)}
+    except HTTPException:
+        raise
+    except IntegrityError:
+        # A concurrent submission reviewed one of these products first
+        db.rollback()
+        raise HTTPException(
+            status_code=409, detail="Some of these products were just reviewed"
+        )
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error("Error adding order reviews: %s", e)
+        raise HTTPException(status_code=500, detail="Error adding reviews")
+
+
+@app.get("/products/{product_id}/reviews", response_model=ReviewPage)
+async def get_product_reviews(
+    product_id: int,
+    db: db_dependency,
+    sort: str = Query("recent", pattern="^(recent|rating)$"),
+    limit: int = Query(reviews.REVIEW_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page"
+    ),
+):
+    """A product's reviews, newest or highest rated first, one page at a time"""
+    try:
+        return reviews.review_page(db, product_id, sort, limit, cursor)
+    except reviews.InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/products/{product_id}/rating-summary", response_model=RatingSummary)
+async def get_product_rating_summary(product_id: int, db: db_dependency):
+    """Review count, average rating and 1-5 star histogram"""
+    summary = ratings.get_rating_summary(db, product_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return summary
 
 
 @app.put("/reviews/{review_id}", response_model=ReviewResponse)
@@ -1577,19 +1921,24 @@ async def update_review(
             raise HTTPException(status_code=404, detail="Review not found")
 
         # Update review fields
+        if review.rating != review_update.rating:
+            ratings.apply_rating_delta(
+                db,
+                review.product_id,
+                old_rating=review.rating,
+                new_rating=review_update.rating,
+            )
         review.rating = review_update.rating
         review.comment = review_update.comment
 
         db.commit()
         db.refresh(review)
-
-        # Recalculate product rating
-        update_product_rating(db, review.product_id)
+        ratings.rating_summary_cache.invalidate(review.product_id)
 
         return review
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error updating review: {str(e)}")
+        logger.error("Error updating review: %s", e)
         raise HTTPException(status_code=500, detail="Error updating review")
 
 
@@ -1611,17 +1960,16 @@ async def delete_review(review_id: int, db: db_dependency, user: user_dependency
 
         product_id = review.product_id
 
-        # Delete the review
+        # Delete the review and take it out of the product's aggregates
+        ratings.apply_rating_delta(db, product_id, old_rating=review.rating)
         db.delete(review)
         db.commit()
-
-        # Recalculate product rating
-        update_product_rating(db, product_id)
+        ratings.rating_summary_cache.invalidate(product_id)
 
         return {"message": "Review deleted successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error deleting review: {str(e)}")
+        logger.error("Error deleting review: %s", e)
         raise HTTPException(status_code=500, detail="Error deleting review")
 
 
@@ -1642,7 +1990,7 @@ async def create_subcategory(
         return db_subcategory
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error creating subcategory: {str(e)}")
+        logger.error("Error creating subcategory: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1660,7 +2008,7 @@ async def get_category_subcategories(category_id: int, db: db_dependency):
         )
         return subcategories
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching subcategories: {str(e)}")
+        logger.error("Error fetching subcategories: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching subcategories")
 
 
@@ -1697,7 +2045,7 @@ async def get_all_subcategories(db: db_dependency, category_id: int = None):
         subcategories = query.all()
         return subcategories
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching subcategories: {str(e)}")
+        logger.error("Error fetching subcategories: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching subcategories")
 
 
@@ -1718,7 +2066,7 @@ async def get_subcategory_by_id(subcategory_id: int, db: db_dependency):
             raise HTTPException(status_code=404, detail="Subcategory not found")
         return subcategory
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching subcategory: {str(e)}")
+        logger.error("Error fetching subcategory: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching subcategory")
 
 
@@ -1753,7 +2101,7 @@ async def update_subcategory(
         return subcategory
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error updating subcategory: {str(e)}")
+        logger.error("Error updating subcategory: %s", e)
         raise HTTPException(status_code=500, detail="Error updating subcategory")
 
 
@@ -1794,7 +2142,7 @@ async def delete_subcategory(
         return {"message": "Subcategory deleted successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error deleting subcategory: {str(e)}")
+        logger.error("Error deleting subcategory: %s", e)
         raise HTTPException(status_code=500, detail="Error deleting subcategory")
 
 
@@ -1832,32 +2180,25 @@ async def get_products_by_subcategory(
             "pages": total_pages,
         }
     except Exception as e:
-        logger.error(f"Error fetching products by subcategory: {str(e)}")
+        logger.error("Error fetching products by subcategory: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching products")
 
 
 @app.post("/admin/recalculate-product-ratings", status_code=status.HTTP_200_OK)
 async def recalculate_all_product_ratings(db: db_dependency, user: user_dependency):
-    """Recalculate ratings for all products from their reviews"""
+    """Rebuild rating aggregates for all products from their reviews"""
     require_admin(user)
     try:
-        # Get all products
-        products = db.query(models.Products).all()
-        updated_count = 0
-
-        for product in products:
-            old_rating = product.rating
-            new_rating = update_product_rating(db, product.id)
-            if old_rating != new_rating:
-                updated_count += 1
+        updated_count = ratings.rebuild_product_ratings(db)
 
         return {
             "message": f"Product ratings recalculated successfully",
             "products_updated": updated_count,
-            "total_products": len(products),
+            "total_products": db.query(func.count(models.Products.id)).scalar(),
         }
     except Exception as e:
-        logger.error(f"Error recalculating product ratings: {str(e)}")
+        db.rollback()
+        logger.error("Error recalculating product ratings: %s", e)
         raise HTTPException(
             status_code=500, detail="Error recalculating product ratings"
         )
@@ -1877,7 +2218,7 @@ async def create_banner(banner: BannerCreate, user: user_dependency, db: db_depe
         return db_banner
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error creating banner: {str(e)}")
+        logger.error("Error creating banner: %s", e)
         raise HTTPException(status_code=500, detail="Error creating banner")
 
 
@@ -1898,7 +2239,7 @@ async def get_banners(
         banners = query.order_by(models.Banner.created_at.desc()).all()
         return banners
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching banners: {str(e)}")
+        logger.error("Error fetching banners: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching banners")
 
 
@@ -1913,14 +2254,17 @@ async def update_banner(
         )
         if not db_banner:
             raise HTTPException(status_code=404, detail="Banner not found")
+        old_image_url = db_banner.image_url
         for field, value in banner.dict().items():
             setattr(db_banner, field, value)
         db.commit()
+        if old_image_url != db_banner.image_url:
+            images.release_image(db, old_image_url)
         db.refresh(db_banner)
         return db_banner
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error updating banner: {str(e)}")
+        logger.error("Error updating banner: %s", e)
         raise HTTPException(status_code=500, detail="Error updating banner")
 
 
@@ -1933,12 +2277,14 @@ async def delete_banner(banner_id: int, user: user_dependency, db: db_dependency
         )
         if not db_banner:
             raise HTTPException(status_code=404, detail="Banner not found")
+        img_url = db_banner.image_url
         db.delete(db_banner)
         db.commit()
+        images.release_image(db, img_url)
         return {"message": "Banner deleted successfully"}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error deleting banner: {str(e)}")
+        logger.error("Error deleting banner: %s", e)
         raise HTTPException(status_code=500, detail="Error deleting banner")
 
 
@@ -1953,7 +2299,7 @@ async def get_all_banners(user: user_dependency, db: db_dependency):
         )
         return banners
     except SQLAlchemyError as e:
-        logger.error(f"Error fetching banners: {str(e)}")
+        logger.error("Error fetching banners: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching banners")
 
 
@@ -1990,11 +2336,11 @@ async def subscribe_to_newsletter(
         db.commit()
         db.refresh(new_subscriber)
 
-        logger.info(f"New newsletter subscription: {email}")
+        logger.info("New newsletter subscription: %s", email)
         return {"message": "Successfully subscribed to newsletter", "email": email}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error subscribing to newsletter: {str(e)}")
+        logger.error("Error subscribing to newsletter: %s", e)
         raise HTTPException(status_code=500, detail="Error subscribing to newsletter")
 
 
@@ -2008,25 +2354,14 @@ async def remove_banner_image(banner_id: int, user: user_dependency, db: db_depe
         if not db_banner:
             raise HTTPException(status_code=404, detail="Banner not found")
         img_url = db_banner.image_url
-        if img_url and img_url.startswith("/uploads/"):
-            file_path = UPLOAD_DIR / img_url.replace("/uploads/", "")
-            try:
-                if file_path.exists():
-                    file_path.unlink()
-                    logger.info(f"Deleted banner image file: {file_path}")
-                else:
-                    logger.warning(
-                        f"Banner image file not found for deletion: {file_path}"
-                    )
-            except Exception as e:
-                logger.error(f"Error deleting banner image file: {file_path}: {str(e)}")
         db_banner.image_url = ""
         db.commit()
+        images.release_image(db, img_url)
         db.refresh(db_banner)
         return {"message": "Banner image removed", "banner": db_banner.id}
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error removing banner image: {str(e)}")
+        logger.error("Error removing banner image: %s", e)
         raise HTTPException(status_code=500, detail="Error removing banner image")
 
 
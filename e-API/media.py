@@ -0,0 +1,193 @@
+"""
+Serving of uploaded media under ``/uploads``.
+
+Uploads are content-addressed (see ``uploads``), so a URL never changes
+meaning: digest-named files and their variants are served with a one-year
+``Cache-Control: immutable`` and their digest as a strong ETag. Requests
+carrying a matching ``If-None-Match`` get 304, single byte ranges get 206,
+and a ``.br``/``.gz`` sidecar next to a file is served when the client
+accepts that encoding.
+
+``MEDIA_SERVE_MODE`` picks who sends the bytes:
+
+- ``app`` (default): this process streams the file.
+- ``x-accel``: an ``X-Accel-Redirect`` to ``MEDIA_ACCEL_PREFIX`` + name,
+  for an nginx ``internal`` location aliased to the uploads directory.
+- ``x-sendfile``: an ``X-Sendfile`` header with the absolute path, for
+  Apache mod_xsendfile or lighttpd.
+
+In the proxy modes the proxy does the file I/O and range handling, so no
+file bytes pass through Python.
+"""
+
+import mimetypes
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from images import local_filename
+from uploads import UPLOAD_DIR
+
+router = APIRouter(tags=["media"])
+
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "app").lower()
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-uploads/")
+MEDIA_PRECOMPRESSED = os.getenv("MEDIA_PRECOMPRESSED", "true").lower() == "true"
+# Lifetime for files without a digest name (uploads from before hashing)
+MEDIA_DEFAULT_MAX_AGE = int(os.getenv("MEDIA_DEFAULT_MAX_AGE", "3600"))
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# <sha256>.<ext> originals and <sha256>_<size>.<ext> variants
+HASHED_NAME = re.compile(r"^([0-9a-f]{64}(?:_[a-z]+)?)\.[a-z0-9]+$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Accept-Encoding token -> (sidecar suffix, Content-Encoding)
+SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _cache_headers(filename: str, stat: os.stat_result) -> Dict[str, str]:
+    hashed = HASHED_NAME.match(filename)
+    if hashed:
+        return {"cache-control": IMMUTABLE_CACHE_CONTROL, "etag": f'"{hashed[1]}"'}
+    return {
+        "cache-control": f"public, max-age={MEDIA_DEFAULT_MAX_AGE}",
+        "etag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+    }
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    # Weak comparison, as If-None-Match requires
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def _select_encoding(
+    request: Request, path
+) -> Tuple[str, Optional[str], Optional[os.stat_result]]:
+    """Pick a precompressed sidecar the client accepts, if one exists"""
+    if not MEDIA_PRECOMPRESSED or MEDIA_SERVE_MODE != "app":
+        return str(path), None, None
+    accepted = request.headers.get("accept-encoding", "")
+    tokens = {token.split(";")[0].strip() for token in accepted.split(",")}
+    for encoding, suffix in SIDECARS:
+        if encoding in tokens:
+            sidecar = f"{path}{suffix}"
+            try:
+                return sidecar, encoding, os.stat(sidecar)
+            except FileNotFoundError:
+                continue
+    return str(path), None, None
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single satisfiable range.
+
+    Raises ValueError for an unsatisfiable range; returns None for ranges
+    this server ignores (multiple ranges or malformed headers), which are
+    answered with the full file.
+    """
+    match = RANGE_HEADER.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+async def _file_range(path: str, start: int, end: int):
+    f = await run_in_threadpool(open, path, "rb")
+    try:
+        await run_in_threadpool(f.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await run_in_threadpool(f.read, min(MEDIA_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await run_in_threadpool(f.close)
+
+
+@router.api_route("/uploads/{filename}", methods=["GET", "HEAD"])
+async def serve_upload(filename: str, request: Request):
+    """Serve an uploaded image with long-lived caching and range support"""
+    if local_filename(f"/uploads/{filename}") is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    path = UPLOAD_DIR / filename
+    try:
+        stat = await run_in_threadpool(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    headers = _cache_headers(filename, stat)
+    serve_path, encoding, sidecar_stat = _select_encoding(request, path)
+    if encoding:
+        stat = sidecar_stat
+        headers["content-encoding"] = encoding
+        # Each encoding is its own representation with its own strong ETag
+        headers["etag"] = f'{headers["etag"][:-1]}-{encoding}"'
+    if MEDIA_PRECOMPRESSED and MEDIA_SERVE_MODE == "app":
+        headers["vary"] = "Accept-Encoding"
+    if _etag_matches(request.headers.get("if-none-match"), headers["etag"]):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if MEDIA_SERVE_MODE == "x-accel":
+        headers["x-accel-redirect"] = f"{MEDIA_ACCEL_PREFIX}{filename}"
+        return Response(headers=headers, media_type=media_type)
+    if MEDIA_SERVE_MODE == "x-sendfile":
+        headers["x-sendfile"] = str(path.resolve())
+        return Response(headers=headers, media_type=media_type)
+
+    headers["accept-ranges"] = "bytes"
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == headers["etag"]):
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "content-range": f"bytes */{stat.st_size}"},
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{stat.st_size}"
+            headers["content-length"] = str(end - start + 1)
+            if request.method == "HEAD":
+                return Response(status_code=206, headers=headers, media_type=media_type)
+            return StreamingResponse(
+                _file_range(serve_path, start, end),
+                status_code=206,
+                headers=headers,
+                media_type=media_type,
+            )
+
+    return FileResponse(
+        serve_path,
+        headers=headers,
+        media_type=media_type,
+        stat_result=stat,
+        method=request.method,
+    )
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Migration script for callback inbox failure tracking.
+Adds the attempts, last_error and failed_at columns to mpesa_callback_inbox,
+so a callback that keeps failing is retried a bounded number of times and
+then set aside instead of blocking its batch.
+Run this script once to update your existing database schema.
+It can be re-run safely.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NEW_COLUMNS = {
+    "attempts": "INT NOT NULL DEFAULT 0",
+    "last_error": "VARCHAR(255) NULL",
+    "failed_at": "DATETIME NULL",
+}
+
+
+def run_migration():
+    """Add failure tracking columns to mpesa_callback_inbox"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT COLUMN_NAME
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'mpesa_callback_inbox'
+            """
+                )
+            )
+            existing_columns = {row[0] for row in result.fetchall()}
+
+            for column, definition in NEW_COLUMNS.items():
+                if column in existing_columns:
+                    print(f"✓ {column} column already exists")
+                    continue
+                print(f"Adding {column} column...")
+                conn.execute(
+                    text(
+                        f"ALTER TABLE mpesa_callback_inbox "
+                        f"ADD COLUMN {column} {definition}"
+                    )
+                )
+                print(f"✓ {column} column added")
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting callback inbox failures migration...")
+    run_migration()
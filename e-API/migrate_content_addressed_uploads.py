@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Migration script to move existing uploads to content-addressed names.
+Adds the img_url/image_url indexes used for reference counting, then
+renames every uploaded image (and its variants) to its SHA-256 digest,
+merging duplicates, and points product_images and banners at the new URLs.
+Run this script once from the e-API directory, with the API stopped.
+It can be re-run safely if interrupted: new names are linked in before the
+database is updated, and old files are only removed afterwards.
+"""
+
+import hashlib
+import os
+import re
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+from images import is_variant, variant_names
+from uploads import UPLOAD_DIR, sniff_image_type, SNIFF_BYTES
+
+load_dotenv()
+
+INDEXES = {
+    "product_images": ("ix_product_images_img_url", "img_url"),
+    "banners": ("ix_banners_image_url", "image_url"),
+}
+DIGEST_NAME = re.compile(r"^[0-9a-f]{64}\.[a-z]+$")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_name(path):
+    """Digest-based file name for an existing upload"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        digest.update(head)
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    extension = sniff_image_type(head) or path.suffix.lstrip(".").lower()
+    return f"{digest.hexdigest()}.{extension}"
+
+
+def link(source, target):
+    """Make ``target`` name the same file as ``source`` unless it exists"""
+    if not target.exists():
+        try:
+            os.link(source, target)
+        except OSError:
+            os.replace(source, target)
+
+
+def run_migration():
+    """Index upload URLs and rename uploads to their SHA-256 digests"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            for table, (index_name, column) in INDEXES.items():
+                result = conn.execute(
+                    text(
+                        """
+                    SELECT COUNT(*)
+                    FROM INFORMATION_SCHEMA.STATISTICS
+                    WHERE TABLE_SCHEMA = DATABASE()
+                    AND TABLE_NAME = :table
+                    AND INDEX_NAME = :index_name
+                """
+                    ),
+                    {"table": table, "index_name": index_name},
+                )
+                if result.scalar():
+                    print(f"✓ {index_name} already exists")
+                    continue
+                print(f"Adding {index_name}...")
+                conn.execute(text(f"CREATE INDEX {index_name} ON {table} ({column})"))
+                print(f"✓ {index_name} added")
+            conn.commit()
+
+            legacy = sorted(
+                entry.name
+                for entry in os.scandir(UPLOAD_DIR)
+                if entry.is_file()
+                and not entry.name.startswith(".")
+                and not is_variant(entry.name)
+                and not DIGEST_NAME.match(entry.name)
+            )
+            print(f"Renaming {len(legacy)} uploads to content-addressed names...")
+            merged = 0
+            for old_name in legacy:
+                old_path = UPLOAD_DIR / old_name
+                new_name = content_name(old_path)
+                if (UPLOAD_DIR / new_name).exists():
+                    merged += 1
+                link(old_path, UPLOAD_DIR / new_name)
+                for old_variant, new_variant in zip(
+                    variant_names(old_name), variant_names(new_name)
+                ):
+                    if (UPLOAD_DIR / old_variant).exists():
+                        link(UPLOAD_DIR / old_variant, UPLOAD_DIR / new_variant)
+
+                urls = {"old": f"/uploads/{old_name}", "new": f"/uploads/{new_name}"}
+                conn.execute(
+                    text(
+                        "UPDATE product_images SET img_url = :new WHERE img_url = :old"
+                    ),
+                    urls,
+                )
+                conn.execute(
+                    text("UPDATE banners SET image_url = :new WHERE image_url = :old"),
+                    urls,
+                )
+                conn.commit()
+
+                for name in [old_name, *variant_names(old_name)]:
+                    if (UPLOAD_DIR / name).exists():
+                        os.unlink(UPLOAD_DIR / name)
+            print(f"✓ {len(legacy)} uploads renamed, {merged} duplicates merged")
+
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting content-addressed uploads migration...")
+    run_migration()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Migration script to drop transactions._feedback.
+Second step of migrate_transaction_events.py: run it only after the code
+that reads transaction_events is deployed everywhere, since older code
+still writes _feedback. Payloads stored by that code since the first step
+are backfilled before the column is dropped.
+It can be re-run safely.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+from migrate_transaction_events import backfill_events
+
+load_dotenv()
+
+
+def run_migration():
+    """Backfill any remaining _feedback payloads, then drop the column"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT COLUMN_NAME
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'transactions'
+            """
+                )
+            )
+            existing_columns = {row[0] for row in result.fetchall()}
+
+            if "_feedback" not in existing_columns:
+                print("✓ _feedback column already dropped")
+            elif "result_code" not in existing_columns:
+                print("❌ Run migrate_transaction_events.py first")
+                sys.exit(1)
+            else:
+                backfill_events(conn)
+
+                print("Dropping _feedback column...")
+                conn.execute(text("ALTER TABLE transactions DROP COLUMN _feedback"))
+                print("✓ _feedback column dropped")
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting transaction feedback drop migration...")
+    run_migration()
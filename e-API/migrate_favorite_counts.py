@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Migration script for denormalized favorite counts.
+Removes duplicate favorites (keeping the oldest row per user and product),
+adds the unique (user_id, product_id) index, adds products.favorite_count
+and backfills it from favorites.
+Run this script once to update your existing database schema.
+It can be re-run safely.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+UNIQUE_INDEX = "uq_favorites_user_product"
+
+
+def run_migration():
+    """Dedupe favorites, add the unique index and products.favorite_count"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT DISTINCT INDEX_NAME
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'favorites'
+            """
+                )
+            )
+            existing_indexes = {row[0] for row in result.fetchall()}
+
+            if UNIQUE_INDEX in existing_indexes:
+                print(f"✓ {UNIQUE_INDEX} already exists")
+            else:
+                print("Removing duplicate favorites...")
+                result = conn.execute(
+                    text(
+                        """
+                    DELETE f FROM favorites f
+                    JOIN favorites keep
+                        ON keep.user_id = f.user_id
+                        AND keep.product_id = f.product_id
+                        AND keep.id < f.id
+                """
+                    )
+                )
+                print(f"✓ {result.rowcount} duplicate favorites removed")
+
+                print(f"Adding {UNIQUE_INDEX}...")
+                conn.execute(
+                    text(
+                        f"CREATE UNIQUE INDEX {UNIQUE_INDEX} "
+                        "ON favorites (user_id, product_id)"
+                    )
+                )
+                print(f"✓ {UNIQUE_INDEX} added")
+
+            result = conn.execute(
+                text(
+                    """
+                SELECT COLUMN_NAME
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'products'
+                AND COLUMN_NAME = 'favorite_count'
+            """
+                )
+            )
+            if result.fetchone():
+                print("✓ favorite_count column already exists")
+            else:
+                print("Adding favorite_count column...")
+                conn.execute(
+                    text(
+                        "ALTER TABLE products "
+                        "ADD COLUMN favorite_count INT NOT NULL DEFAULT 0"
+                    )
+                )
+                print("✓ favorite_count column added")
+
+            print("Backfilling favorite counts...")
+            conn.execute(
+                text(
+                    """
+                UPDATE products p
+                LEFT JOIN (
+                    SELECT product_id, COUNT(*) AS favorite_count
+                    FROM favorites
+                    GROUP BY product_id
+                ) f ON f.product_id = p.id
+                SET p.favorite_count = COALESCE(f.favorite_count, 0)
+            """
+                )
+            )
+            print("✓ Favorite counts backfilled")
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting favorite counts migration...")
+    run_migration()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Migration script to add incremental rating aggregates to products.
+Adds rating_sum, rating_count and the rating_1..rating_5 histogram columns,
+then fills them (and rating) from the reviews table in one grouped UPDATE.
+Run this script once to update your existing database schema.
+It can be re-run safely; the backfill always recomputes from reviews.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AGGREGATE_COLUMNS = [
+    "rating_sum",
+    "rating_count",
+    "rating_1",
+    "rating_2",
+    "rating_3",
+    "rating_4",
+    "rating_5",
+]
+
+
+def run_migration():
+    """Add and backfill the product rating aggregate columns"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT COLUMN_NAME
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'products'
+            """
+                )
+            )
+            existing_columns = {row[0] for row in result.fetchall()}
+
+            for column in AGGREGATE_COLUMNS:
+                if column in existing_columns:
+                    print(f"✓ {column} column already exists")
+                    continue
+                print(f"Adding {column} column...")
+                conn.execute(
+                    text(
+                        f"ALTER TABLE products ADD COLUMN {column} INT NOT NULL DEFAULT 0"
+                    )
+                )
+                print(f"✓ {column} column added")
+
+            print("Backfilling aggregates from reviews...")
+            conn.execute(
+                text(
+                    """
+                UPDATE products p
+                LEFT JOIN (
+                    SELECT product_id,
+                           COUNT(*) AS review_count,
+                           SUM(rating) AS review_sum,
+                           SUM(rating = 1) AS stars_1,
+                           SUM(rating = 2) AS stars_2,
+                           SUM(rating = 3) AS stars_3,
+                           SUM(rating = 4) AS stars_4,
+                           SUM(rating = 5) AS stars_5
+                    FROM reviews
+                    GROUP BY product_id
+                ) r ON r.product_id = p.id
+                SET p.rating = IF(r.review_count > 0, r.review_sum / r.review_count, 0),
+                    p.rating_sum = COALESCE(r.review_sum, 0),
+                    p.rating_count = COALESCE(r.review_count, 0),
+                    p.rating_1 = COALESCE(r.stars_1, 0),
+                    p.rating_2 = COALESCE(r.stars_2, 0),
+                    p.rating_3 = COALESCE(r.stars_3, 0),
+                    p.rating_4 = COALESCE(r.stars_4, 0),
+                    p.rating_5 = COALESCE(r.stars_5, 0)
+            """
+                )
+            )
+            print("✓ Rating aggregates backfilled")
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting rating aggregates migration...")
+    run_migration()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the transactions index used by the payment reconciler.
+The reconciler scans PROCESSING rows in (created_at, id) order.
+Run this script once to update your existing database.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INDEX_NAME = "ix_transactions_status_created"
+
+
+def run_migration():
+    """Add the (_status, created_at, id) index to transactions"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT DISTINCT INDEX_NAME
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'transactions'
+            """
+                )
+            )
+            existing_indexes = {row[0] for row in result.fetchall()}
+
+            if INDEX_NAME not in existing_indexes:
+                print(f"Adding {INDEX_NAME}...")
+                conn.execute(
+                    text(
+                        f"CREATE INDEX {INDEX_NAME} "
+                        "ON transactions (_status, created_at, id)"
+                    )
+                )
+                print(f"✓ {INDEX_NAME} added")
+            else:
+                print(f"✓ {INDEX_NAME} already exists")
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting reconciler index migration...")
+    run_migration()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the composite indexes on reviews.
+They back the keyset-paginated review listing, by recency and by rating.
+Run this script once to update your existing database.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INDEXES = {
+    "ix_reviews_product_created": "product_id, created_at, id",
+    "ix_reviews_product_rating": "product_id, rating, created_at, id",
+}
+
+
+def run_migration():
+    """Add the product-scoped composite indexes to reviews"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT DISTINCT INDEX_NAME
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'reviews'
+            """
+                )
+            )
+            existing_indexes = {row[0] for row in result.fetchall()}
+
+            for index_name, columns in INDEXES.items():
+                if index_name not in existing_indexes:
+                    print(f"Adding {index_name}...")
+                    conn.execute(
+                        text(f"CREATE INDEX {index_name} ON reviews ({columns})")
+                    )
+                    print(f"✓ {index_name} added")
+                else:
+                    print(f"✓ {index_name} already exists")
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting review index migration...")
+    run_migration()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Migration script to enforce one review per user, product and order.
+Removes duplicate reviews (keeping the oldest), adds the unique
+(user_id, product_id, order_id) index and, if anything was removed,
+rebuilds the product rating aggregates.
+Run this script once to update your existing database schema.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from ratings import rebuild_product_ratings
+
+load_dotenv()
+
+UNIQUE_INDEX = "uq_reviews_user_product_order"
+
+
+def run_migration():
+    """Dedupe reviews and add the unique user/product/order index"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT DISTINCT INDEX_NAME
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'reviews'
+            """
+                )
+            )
+            existing_indexes = {row[0] for row in result.fetchall()}
+
+            if UNIQUE_INDEX in existing_indexes:
+                print(f"✓ {UNIQUE_INDEX} already exists")
+                return
+
+            print("Removing duplicate reviews...")
+            result = conn.execute(
+                text(
+                    """
+                DELETE r FROM reviews r
+                JOIN reviews keep
+                    ON keep.user_id = r.user_id
+                    AND keep.product_id = r.product_id
+                    AND keep.order_id = r.order_id
+                    AND keep.id < r.id
+            """
+                )
+            )
+            removed = result.rowcount
+            print(f"✓ {removed} duplicate reviews removed")
+
+            print(f"Adding {UNIQUE_INDEX}...")
+            conn.execute(
+                text(
+                    f"CREATE UNIQUE INDEX {UNIQUE_INDEX} "
+                    "ON reviews (user_id, product_id, order_id)"
+                )
+            )
+            print(f"✓ {UNIQUE_INDEX} added")
+            conn.commit()
+
+        if removed:
+            print("Rebuilding product rating aggregates...")
+            with Session(engine) as db:
+                changed = rebuild_product_ratings(db)
+            print(f"✓ {changed} products updated")
+
+        print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting review uniqueness migration...")
+    run_migration()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Migration script to index the users token columns and hash existing tokens.
+Verification and reset tokens are now stored as SHA-256 hex digests.
+Run this script once to update your existing database.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BATCH_SIZE = 1000
+
+INDEXES = {
+    "ix_users_verification_token": "verification_token",
+    "ix_users_verification_expires": "verification_expires",
+    "ix_users_reset_token": "reset_token",
+    "ix_users_reset_token_expires": "reset_token_expires",
+}
+
+
+def run_migration():
+    """Add token indexes and replace plain-text tokens with their digests"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT DISTINCT INDEX_NAME
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'users'
+            """
+                )
+            )
+            existing_indexes = {row[0] for row in result.fetchall()}
+
+            for index_name, column in INDEXES.items():
+                if index_name not in existing_indexes:
+                    print(f"Adding {index_name}...")
+                    conn.execute(text(f"CREATE INDEX {index_name} ON users ({column})"))
+                    print(f"✓ {index_name} added")
+
+            # Plain-text tokens are 43 characters (token_urlsafe(32)); digests are 64
+            for column in ("verification_token", "reset_token"):
+                print(f"Hashing existing {column} values...")
+                total = 0
+                while True:
+                    result = conn.execute(
+                        text(
+                            f"""
+                        UPDATE users
+                        SET {column} = SHA2({column}, 256)
+                        WHERE {column} IS NOT NULL
+                        AND CHAR_LENGTH({column}) <> 64
+                        LIMIT {BATCH_SIZE}
+                    """
+                        )
+                    )
+                    conn.commit()
+                    total += result.rowcount
+                    if result.rowcount < BATCH_SIZE:
+                        break
+                print(f"✓ {total} {column} values hashed")
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting token hash migration...")
+    run_migration()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Migration script to move raw Daraja payloads out of transactions._feedback.
+Creates transaction_events, adds the result_code/result_desc columns and
+backfills both from _feedback in batches. _feedback itself is kept, because
+the code running before the deploy still writes it.
+Run this script before deploying the code that reads transaction_events,
+then run migrate_drop_transaction_feedback.py once the deploy is done.
+It can be re-run safely if interrupted.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+from transaction_events import encode_payload
+
+load_dotenv()
+
+BATCH_SIZE = 1000
+
+
+def parse_feedback(feedback):
+    """Return (event_type, result_code, result_desc) for a stored payload"""
+    stk_callback = (feedback.get("body") or {}).get("stkCallback")
+    if stk_callback:
+        return (
+            "callback",
+            stk_callback.get("resultCode"),
+            (stk_callback.get("resultDesc") or "")[:255],
+        )
+    return "stk_push", None, None
+
+
+def backfill_events(conn):
+    """Copy _feedback into transaction_events and the result columns.
+
+    Rows that already have events are picked up again while their result is
+    unknown, because code still writing _feedback may have stored the
+    callback there since the last run.
+    """
+    print("Backfilling transaction_events from _feedback...")
+    total = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                """
+            SELECT t.id, t._feedback, t.created_at, EXISTS (
+                SELECT 1 FROM transaction_events e
+                WHERE e.transaction_id = t.id
+            ) AS has_events
+            FROM transactions t
+            WHERE t.id > :last_id
+            AND t._feedback IS NOT NULL
+            AND (
+                t.result_code IS NULL
+                OR NOT EXISTS (
+                    SELECT 1 FROM transaction_events e
+                    WHERE e.transaction_id = t.id
+                )
+            )
+            ORDER BY t.id
+            LIMIT :batch_size
+        """
+            ),
+            {"last_id": last_id, "batch_size": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        events, results = [], []
+        for transaction_id, feedback, created_at, has_events in rows:
+            if isinstance(feedback, (str, bytes)):
+                feedback = json.loads(feedback)
+            event_type, result_code, result_desc = parse_feedback(feedback)
+            if has_events and result_code is None:
+                # Still the STK push payload an earlier run copied
+                continue
+            payload, compressed = encode_payload(feedback)
+            events.append(
+                {
+                    "transaction_id": transaction_id,
+                    "event_type": event_type,
+                    "payload": payload,
+                    "compressed": compressed,
+                    "created_at": created_at or datetime.utcnow(),
+                }
+            )
+            if result_code is not None:
+                results.append(
+                    {
+                        "id": transaction_id,
+                        "result_code": result_code,
+                        "result_desc": result_desc,
+                    }
+                )
+
+        if events:
+            conn.execute(
+                text(
+                    """
+                INSERT INTO transaction_events
+                    (transaction_id, event_type, payload, compressed, created_at)
+                VALUES
+                    (:transaction_id, :event_type, :payload, :compressed, :created_at)
+            """
+                ),
+                events,
+            )
+        if results:
+            conn.execute(
+                text(
+                    """
+                UPDATE transactions
+                SET result_code = :result_code, result_desc = :result_desc
+                WHERE id = :id
+            """
+                ),
+                results,
+            )
+        conn.commit()
+        total += len(events)
+        last_id = rows[-1][0]
+        print(f"  {total} transactions backfilled")
+    print(f"✓ {total} transactions backfilled")
+
+
+def run_migration():
+    """Create transaction_events and backfill it from transactions._feedback"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            print("Creating transaction_events table...")
+            conn.execute(
+                text(
+                    """
+                CREATE TABLE IF NOT EXISTS transaction_events (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    transaction_id INT NOT NULL,
+                    event_type VARCHAR(30) NOT NULL,
+                    payload MEDIUMBLOB NOT NULL,
+                    compressed BOOLEAN NOT NULL DEFAULT FALSE,
+                    created_at DATETIME NOT NULL,
+                    INDEX ix_transaction_events_transaction (transaction_id, id),
+                    FOREIGN KEY (transaction_id) REFERENCES transactions(id)
+                        ON DELETE CASCADE
+                )
+            """
+                )
+            )
+            print("✓ transaction_events table ready")
+
+            result = conn.execute(
+                text(
+                    """
+                SELECT COLUMN_NAME
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'transactions'
+            """
+                )
+            )
+            existing_columns = {row[0] for row in result.fetchall()}
+
+            if "result_code" not in existing_columns:
+                print("Adding result_code column...")
+                conn.execute(
+                    text("ALTER TABLE transactions ADD COLUMN result_code INT NULL")
+                )
+                print("✓ result_code column added")
+
+            if "result_desc" not in existing_columns:
+                print("Adding result_desc column...")
+                conn.execute(
+                    text(
+                        "ALTER TABLE transactions ADD COLUMN result_desc VARCHAR(255) NULL"
+                    )
+                )
+                print("✓ result_desc column added")
+
+            if "_feedback" not in existing_columns:
+                print("✓ _feedback already removed, nothing to backfill")
+            else:
+                backfill_events(conn)
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting transaction events migration...")
+    run_migration()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the composite indexes on transactions.
+They back the paginated history, the available-transactions lookup and
+statement matching by account reference.
+Run this script once to update your existing database.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INDEXES = {
+    "ix_transactions_user_created": "user_id, created_at",
+    "ix_transactions_user_status_order": "user_id, _status, _pid",
+    "ix_transactions_account_reference": "account_reference",
+}
+
+
+def run_migration():
+    """Add the user-scoped composite indexes to transactions"""
+    password = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_name = os.getenv("DB_NAME", "ecommerce")
+    database_url = f"mysql+pymysql://root:{password}@{db_host}:3306/{db_name}"
+
+    engine = create_engine(database_url)
+
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    """
+                SELECT DISTINCT INDEX_NAME
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'transactions'
+            """
+                )
+            )
+            existing_indexes = {row[0] for row in result.fetchall()}
+
+            for index_name, columns in INDEXES.items():
+                if index_name not in existing_indexes:
+                    print(f"Adding {index_name}...")
+                    conn.execute(
+                        text(f"CREATE INDEX {index_name} ON transactions ({columns})")
+                    )
+                    print(f"✓ {index_name} added")
+                else:
+                    print(f"✓ {index_name} already exists")
+
+            conn.commit()
+            print("\n🎉 Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    print("Starting transaction index migration...")
+    run_migration()
@@ -10,6 +10,9 @@ from sqlalchemy import (
     Boolean,
     Text,
     Table,
+    Index,
+    LargeBinary,
+    UniqueConstraint,
 )
 from database import Base
 from sqlalchemy.orm import relationship
@@ -49,10 +52,11 @@ class Users(Base):
     created_at = Column(DateTime, default=func.now())
     # Email verification fields
     is_verified = Column(Boolean, default=False, nullable=False)
-    verification_token = Column(String(255), nullable=True)
-    verification_expires = Column(DateTime, nullable=True)
-    reset_token = Column(String(255), nullable=True)
-    reset_token_expires = Column(DateTime, nullable=True)
+    # Tokens are stored as SHA-256 hex digests, never in plain text
+    verification_token = Column(String(255), nullable=True, index=True)
+    verification_expires = Column(DateTime, nullable=True, index=True)
+    reset_token = Column(String(255), nullable=True, index=True)
+    reset_token_expires = Column(DateTime, nullable=True, index=True)
     orders = relationship("Orders", back_populates="user")
     products = relationship("Products", back_populates="user")
     addresses = relationship("Address", back_populates="user")
@@ -104,6 +108,16 @@ class Products(Base):
     rating = Column(
         Numeric(precision=3, scale=2), nullable=True, default=0.0
     )  # New field (0.00 to 5.00)
+    # Review aggregates maintained by ratings.apply_rating_delta
+    rating_sum = Column(Integer, default=0, nullable=False)
+    rating_count = Column(Integer, default=0, nullable=False)
+    rating_1 = Column(Integer, default=0, nullable=False)
+    rating_2 = Column(Integer, default=0, nullable=False)
+    rating_3 = Column(Integer, default=0, nullable=False)
+    rating_4 = Column(Integer, default=0, nullable=False)
+    rating_5 = Column(Integer, default=0, nullable=False)
+    # Maintained by the favorites endpoints
+    favorite_count = Column(Integer, default=0, nullable=False)
     discount = Column(
         Numeric(precision=5, scale=2), nullable=True, default=0.0
     )  # New field - discount percentage
@@ -183,12 +197,20 @@ class Address(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Keyset scans of stale PROCESSING rows by the reconciler
+        Index("ix_transactions_status_created", "_status", "created_at", "id"),
+        # Paginated history per user
+        Index("ix_transactions_user_created", "user_id", "created_at"),
+        # Accepted transactions per user not yet linked to an order
+        Index("ix_transactions_user_status_order", "user_id", "_status", "_pid"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     _pid = Column(Integer, ForeignKey("orders.order_id"), nullable=False, index=True)
     party_a = Column(String(100), nullable=False)
     party_b = Column(String(100), nullable=False)
-    account_reference = Column(String(150), nullable=False)
+    account_reference = Column(String(150), nullable=False, index=True)
     transaction_category = Column(Integer, nullable=False)
     transaction_type = Column(Integer, nullable=False)
     transaction_channel = Column(Integer, nullable=False)
@@ -198,7 +220,9 @@ class Transaction(Base):
     transaction_code = Column(String(100), unique=True, nullable=True)
     transaction_timestamp = Column(DateTime, default=datetime.utcnow)
     transaction_details = Column(Text, nullable=False)
-    _feedback = Column(JSON, nullable=False)
+    # Parsed from the Daraja result; raw payloads live in transaction_events
+    result_code = Column(Integer, nullable=True)
+    result_desc = Column(String(255), nullable=True)
     _status = Column(Enum(TransactionStatus), default=TransactionStatus.PENDING)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, onupdate=func.now())
@@ -208,12 +232,47 @@ class Transaction(Base):
     order = relationship("Orders", back_populates="transactions")
 
 
+# Append-only log of raw Daraja payloads (STK response, callbacks, queries)
+class TransactionEvent(Base):
+    __tablename__ = "transaction_events"
+    __table_args__ = (
+        Index("ix_transaction_events_transaction", "transaction_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(
+        Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False
+    )
+    event_type = Column(String(30), nullable=False)
+    # JSON bytes, zlib-compressed when compressed is set
+    payload = Column(LargeBinary(length=2**24), nullable=False)
+    compressed = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Append-only inbox of raw M-Pesa STK callbacks, applied by callback_inbox.worker
+class CallbackInbox(Base):
+    __tablename__ = "mpesa_callback_inbox"
+    __table_args__ = (Index("ix_callback_inbox_pending", "processed_at", "id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    checkout_request_id = Column(String(100), nullable=False, index=True)
+    payload = Column(JSON, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    # Failed applies; failed_at is set once the worker stops retrying
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String(255), nullable=True)
+    failed_at = Column(DateTime, nullable=True)
+
+
 # New table for multiple product images
 class ProductImage(Base):
     __tablename__ = "product_images"
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
-    img_url = Column(String(200), nullable=False)
+    # Indexed for the reference counts in images.release_image
+    img_url = Column(String(200), nullable=False, index=True)
     product = relationship("Products", back_populates="images")
 
 
@@ -246,6 +305,11 @@ class ProductSpecification(Base):
 # New table for favorites (wishlist)
 class Favorite(Base):
     __tablename__ = "favorites"
+    __table_args__ = (
+        # One favorite per user and product; also serves the batch lookup
+        UniqueConstraint("user_id", "product_id", name="uq_favorites_user_product"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
@@ -256,6 +320,16 @@ class Favorite(Base):
 # New table for reviews
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Keyset pages of a product's reviews, by recency and by rating
+        Index("ix_reviews_product_created", "product_id", "created_at", "id"),
+        Index("ix_reviews_product_rating", "product_id", "rating", "created_at", "id"),
+        # One review per product per order; backs the duplicate checks
+        UniqueConstraint(
+            "user_id", "product_id", "order_id", name="uq_reviews_user_product_order"
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
@@ -271,7 +345,7 @@ class Review(Base):
 class Banner(Base):
     __tablename__ = "banners"
     id = Column(Integer, primary_key=True, index=True)
-    image_url = Column(String(255), nullable=False)
+    image_url = Column(String(255), nullable=False, index=True)
     title = Column(String(100), nullable=True)
     subtitle = Column(String(255), nullable=True)
     active = Column(Boolean, default=True)
@@ -291,3 +365,16 @@ class NewsletterSubscriber(Base):
     email = Column(String(200), unique=True, index=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
+
+
+# Revoked JWTs (access and refresh), mirrored in memory by auth.revocation_list
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(64), unique=True, index=True, nullable=False)
+    token_type = Column(String(20), nullable=False)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
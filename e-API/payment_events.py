@@ -0,0 +1,79 @@
+"""
+In-process pub/sub for payment status changes.
+
+Subscribers (the per-order SSE streams in lnmo.py) each get an asyncio
+queue on the event loop. Publishers are the callback inbox worker and the
+reconciler, which run in threadpool workers, so ``publish`` hands events to
+the loop with ``call_soon_threadsafe`` instead of touching the queues
+directly. Events only reach subscribers in the same process; the SSE
+stream re-reads the status on each keep-alive to cover the rest.
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict
+
+import models
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber before the oldest is dropped
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def transaction_event(transaction: models.Transaction) -> Dict[str, Any]:
+    """Status event for a transaction, built from its hot columns"""
+    return {
+        "order_id": transaction._pid,
+        "transaction_id": transaction.transaction_id,
+        "status": transaction._status.value,
+        "status_name": transaction._status.name,
+        "transaction_code": transaction.transaction_code,
+    }
+
+
+class PaymentEventBroker:
+    """Fans status events out to the subscribers of each order"""
+
+    def __init__(self):
+        self._loop = None
+        self._subscribers: Dict[int, set] = {}
+
+    @contextmanager
+    def subscribe(self, order_id: int):
+        """Register a queue for an order's events (call on the event loop)"""
+        self._loop = asyncio.get_running_loop()
+        events = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(order_id, set()).add(events)
+        try:
+            yield events
+        finally:
+            subscribers = self._subscribers.get(order_id)
+            if subscribers is not None:
+                subscribers.discard(events)
+                if not subscribers:
+                    del self._subscribers[order_id]
+
+    def publish(self, order_id: int, event: Dict[str, Any]):
+        """Queue an event for an order's subscribers; safe from any thread"""
+        if self._loop is None or order_id not in self._subscribers:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._dispatch, order_id, event)
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def _dispatch(self, order_id: int, event: Dict[str, Any]):
+        for events in self._subscribers.get(order_id, ()):
+            if events.full():
+                # A slow client only needs the latest status
+                events.get_nowait()
+            events.put_nowait(event)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+broker = PaymentEventBroker()
@@ -2,9 +2,11 @@ from pydantic import BaseModel, EmailStr, computed_field
 from datetime import datetime
 from enum import Enum
 from decimal import Decimal
-from typing import Dict, Any, List, Optional
+from typing import Annotated, Dict, Any, List, Optional
 from pydantic import Field
 
+from images import variant_urls
+
 
 class Role(str, Enum):
     SUPERADMIN = "SUPERADMIN"
@@ -24,19 +26,31 @@ class UpdateOrderStatusRequest(BaseModel):
     status: OrderStatus  # Expect "status" in the body, matching frontend
 
 
+# Rules for new passwords, shared by registration, admin creation and bulk import
+PASSWORD_MIN_LENGTH = 6
+NewPassword = Annotated[str, Field(min_length=PASSWORD_MIN_LENGTH)]
+
+
 class CreateUserRequest(BaseModel):
     username: str
     email: EmailStr
-    password: str
+    password: NewPassword
 
 
 class CreateAdminRequest(BaseModel):
     username: str
     email: EmailStr
-    password: str
+    password: NewPassword
     role: Role = Role.ADMIN  # Default to admin, but can be overridden
 
 
+class BulkUserRow(BaseModel):
+    username: str = Field(..., min_length=1, max_length=50)
+    email: EmailStr
+    password: NewPassword
+    role: Role = Role.CUSTOMER
+
+
 class LoginUserRequest(BaseModel):
     email: EmailStr
     password: str
@@ -45,6 +59,16 @@ class LoginUserRequest(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # Access token lifetime in seconds
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
 
 
 class CategoryBase(BaseModel):
@@ -108,6 +132,12 @@ class ProductImageCreate(ProductImageBase):
 class ProductImageResponse(ProductImageBase):
     id: int
 
+    @computed_field
+    @property
+    def variants(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """Resized copies by size then format; None for external images"""
+        return variant_urls(self.img_url)
+
     class Config:
         from_attributes = True
 
@@ -164,8 +194,17 @@ class FavoriteResponse(FavoriteBase):
         from_attributes = True
 
 
+class FavoriteLookupRequest(BaseModel):
+    # One page of product cards
+    product_ids: List[int] = Field(..., max_length=100)
+
+
+class FavoriteLookupResponse(BaseModel):
+    favorited: List[int]
+
+
 class ReviewBase(BaseModel):
-    rating: int
+    rating: int = Field(..., ge=1, le=5)
     comment: Optional[str] = None
 
 
@@ -175,6 +214,14 @@ class ReviewCreate(ReviewBase):
     order_id: int
 
 
+class OrderReviewItem(ReviewBase):
+    product_id: int
+
+
+class OrderReviewsCreate(BaseModel):
+    reviews: List[OrderReviewItem] = Field(..., min_length=1, max_length=100)
+
+
 class ReviewResponse(ReviewBase):
     id: int
     user_id: int
@@ -195,13 +242,40 @@ class ProductResponse(ProductsBase):
     subcategory: Optional[SubcategoryResponse]  # New field
     images: Optional[List[ProductImageResponse]] = []
     product_specifications: Optional[List[ProductSpecificationResponse]] = []
-    favorites: Optional[List[FavoriteResponse]] = []
-    reviews: Optional[List[ReviewResponse]] = []
+    favorite_count: int = 0
+    # Maintained aggregates; review text is paged via /products/{id}/reviews
+    rating: Optional[float] = 0.0
+    rating_count: int = 0
 
     class Config:
         from_attributes = True
 
 
+class RatingSummary(BaseModel):
+    count: int
+    average: float
+    histogram: Dict[int, int]
+
+
+class ReviewPage(BaseModel):
+    reviews: List[ReviewResponse]
+    next_cursor: Optional[str] = None
+
+
+class OrderReviewsResponse(BaseModel):
+    created: List[ReviewResponse]
+    # Products in the request that this order already had a review for
+    already_reviewed: List[int]
+
+
+class ProductDetailResponse(ProductResponse):
+    """Product page payload: the rating summary and only the first page of reviews"""
+
+    reviews: List[ReviewResponse] = []
+    rating_summary: Optional[RatingSummary] = None
+    reviews_next_cursor: Optional[str] = None
+
+
 class CartItem(BaseModel):
     id: int
     quantity: float
@@ -254,6 +328,8 @@ class EmailVerificationResponse(BaseModel):
     message: str
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
     user_role: str
     username: str
 
@@ -284,6 +360,32 @@ class ImageResponse(BaseModel):
     message: str
     img_url: str
 
+    @computed_field
+    @property
+    def variants(self) -> Optional[Dict[str, Dict[str, str]]]:
+        return variant_urls(self.img_url)
+
+
+class UploadedImage(BaseModel):
+    """Outcome for one file of a multi-file upload"""
+
+    filename: Optional[str]
+    img_url: Optional[str] = None
+    image_id: Optional[int] = None
+    error: Optional[str] = None
+
+    @computed_field
+    @property
+    def variants(self) -> Optional[Dict[str, Dict[str, str]]]:
+        return variant_urls(self.img_url)
+
+
+class MultiImageUploadResponse(BaseModel):
+    product_id: Optional[int]
+    uploaded: int
+    failed: int
+    images: List[UploadedImage]
+
 
 class AddressBase(BaseModel):
     first_name: str
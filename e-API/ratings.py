@@ -0,0 +1,185 @@
+"""
+Incrementally maintained product rating aggregates.
+
+Products carry ``rating_sum``, ``rating_count`` and a per-star histogram
+(``rating_1`` .. ``rating_5``). Review writes adjust them with a single
+arithmetic UPDATE in the same transaction as the review itself, so the cost
+no longer grows with the number of reviews. ``rating`` is derived from the
+sum and count in that same statement. ``rebuild_product_ratings``
+recomputes everything from the reviews table with set-based UPDATEs when
+exact values are needed.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, exists, func, or_, select, update
+from sqlalchemy.orm import Session
+
+import models
+from cache import TTLCache
+
+STARS = range(1, 6)
+
+RATING_REBUILD_CHUNK_SIZE = int(os.getenv("RATING_REBUILD_CHUNK_SIZE", "10000"))
+RATING_SUMMARY_CACHE_TTL = int(os.getenv("RATING_SUMMARY_CACHE_TTL", "300"))
+
+# product id -> rating summary; invalidated by the review endpoints on write
+rating_summary_cache = TTLCache(ttl=RATING_SUMMARY_CACHE_TTL, maxsize=10000)
+
+
+def star_column(star: int):
+    return getattr(models.Products, f"rating_{star}")
+
+
+def _derived_rating(rating_sum, rating_count):
+    return case(
+        (rating_count > 0, rating_sum * 1.0 / rating_count),
+        else_=0,
+    )
+
+
+def apply_rating_delta(
+    db: Session,
+    product_id: int,
+    old_rating: Optional[int] = None,
+    new_rating: Optional[int] = None,
+):
+    """Adjust a product's aggregates for one review change (no commit).
+
+    Pass only ``new_rating`` for an added review, only ``old_rating`` for a
+    deleted one and both for an edit.
+    """
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    products = models.Products
+
+    # rating goes first: MySQL evaluates SET clauses left to right against
+    # already-updated columns, other databases against the old row. Reading
+    # the old sum/count plus the deltas gives the same result on both.
+    values = [
+        (
+            products.rating,
+            _derived_rating(
+                products.rating_sum + sum_delta, products.rating_count + count_delta
+            ),
+        ),
+        (products.rating_sum, products.rating_sum + sum_delta),
+        (products.rating_count, products.rating_count + count_delta),
+    ]
+    if old_rating != new_rating:
+        if old_rating is not None:
+            values.append((star_column(old_rating), star_column(old_rating) - 1))
+        if new_rating is not None:
+            values.append((star_column(new_rating), star_column(new_rating) + 1))
+
+    db.execute(
+        update(products)
+        .where(products.id == product_id)
+        .ordered_values(*values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def get_rating_summary(db: Session, product_id: int) -> Optional[Dict[str, Any]]:
+    """Review count, average and star histogram; None for unknown products"""
+    summary = rating_summary_cache.get(product_id)
+    if summary is not None:
+        return summary
+    row = (
+        db.query(models.Products)
+        .with_entities(
+            models.Products.rating_sum,
+            models.Products.rating_count,
+            *(star_column(star) for star in STARS),
+        )
+        .filter(models.Products.id == product_id)
+        .first()
+    )
+    if row is None:
+        return None
+    rating_sum, rating_count, *histogram = row
+    summary = {
+        "count": rating_count,
+        "average": round(rating_sum / rating_count, 2) if rating_count else 0.0,
+        "histogram": dict(zip(STARS, histogram)),
+    }
+    rating_summary_cache.set(product_id, summary)
+    return summary
+
+
+def _rebuild_range(db: Session, low: int, high: int) -> int:
+    review = models.Review
+    products = models.Products
+    totals = (
+        select(
+            review.product_id,
+            func.count(review.id).label("rating_count"),
+            func.sum(review.rating).label("rating_sum"),
+            *(
+                func.sum(case((review.rating == star, 1), else_=0)).label(
+                    f"rating_{star}"
+                )
+                for star in STARS
+            ),
+        )
+        .where(review.product_id.between(low, high))
+        .group_by(review.product_id)
+        .subquery()
+    )
+    exact = {
+        "rating": func.round(totals.c.rating_sum * 1.0 / totals.c.rating_count, 2),
+        "rating_sum": totals.c.rating_sum,
+        "rating_count": totals.c.rating_count,
+        **{f"rating_{star}": totals.c[f"rating_{star}"] for star in STARS},
+    }
+
+    def differs(values):
+        # Only touch rows that drifted, so the row count is the change count
+        return or_(
+            *(
+                func.coalesce(getattr(products, name), -1) != value
+                for name, value in values.items()
+            )
+        )
+
+    reviewed = db.execute(
+        update(products)
+        .where(products.id == totals.c.product_id, differs(exact))
+        .values(exact)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    empty = {name: 0 for name in exact}
+    unreviewed = db.execute(
+        update(products)
+        .where(
+            products.id.between(low, high),
+            ~exists().where(review.product_id == products.id),
+            differs(empty),
+        )
+        .values(empty)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return reviewed + unreviewed
+
+
+def rebuild_product_ratings(db: Session, chunk_size: int = RATING_REBUILD_CHUNK_SIZE):
+    """Recompute aggregates from the reviews table; returns products changed.
+
+    Runs one UPDATE joined to a grouped aggregate over reviews per id range
+    of ``chunk_size`` products, committing after each range so row locks
+    stay short on large catalogs.
+    """
+    low, high = db.query(
+        func.min(models.Products.id), func.max(models.Products.id)
+    ).one()
+    changed = 0
+    if low is None:
+        return changed
+    for start in range(low, high + 1, chunk_size):
+        changed += _rebuild_range(db, start, start + chunk_size - 1)
+        db.commit()
+    if changed:
+        rating_summary_cache.clear()
+    return changed
@@ -0,0 +1,263 @@
+"""
+Background reconciliation of STK pushes whose callback never arrived.
+
+``PaymentReconciler`` walks PROCESSING transactions older than a grace
+period in keyset order on (created_at, id), queries Daraja for each batch
+concurrently under a rate limit, and applies final results with the same
+``apply_stk_callback`` used for real callbacks. Transactions still without
+a result after ``RECONCILE_TIMEOUT_SECONDS`` are marked REJECTED, whether
+Daraja reported them as still processing or could not be queried at all.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from starlette.concurrency import run_in_threadpool
+
+import models
+from callback_inbox import apply_stk_callback
+from database import SessionLocal
+from payment_events import broker, transaction_event
+from transaction_events import record_event
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("RECONCILE_INTERVAL_SECONDS", "60"))
+# Leave recent pushes alone; the customer may still be entering their PIN
+RECONCILE_MIN_AGE_SECONDS = int(os.getenv("RECONCILE_MIN_AGE_SECONDS", "90"))
+RECONCILE_TIMEOUT_SECONDS = int(os.getenv("RECONCILE_TIMEOUT_SECONDS", "3600"))
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "100"))
+RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", "5"))
+RECONCILE_RATE_PER_SECOND = float(os.getenv("RECONCILE_RATE_PER_SECOND", "5"))
+RECONCILE_MAX_ATTEMPTS = int(os.getenv("RECONCILE_MAX_ATTEMPTS", "3"))
+RECONCILE_BACKOFF_SECONDS = float(os.getenv("RECONCILE_BACKOFF_SECONDS", "1"))
+
+# Daraja answers stkpushquery with this error while the push is unresolved
+STILL_PROCESSING_ERROR = "500.001.1001"
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across coroutines"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class PaymentReconciler:
+    """Resolves stale PROCESSING transactions by polling stkpushquery"""
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.runs = 0
+        self.scanned = 0
+        self.reconciled = 0
+        self.timed_out = 0
+        self.still_pending = 0
+        self.errors = 0
+        self.last_run_at = None
+        self.last_run_seconds = None
+        self._running = asyncio.Lock()
+
+    def _load_batch(self, cursor: Optional[Tuple[datetime, int]]) -> List[tuple]:
+        """Next keyset page of stale PROCESSING rows as (id, checkout id, created_at)"""
+        cutoff = datetime.utcnow() - timedelta(seconds=RECONCILE_MIN_AGE_SECONDS)
+        db = SessionLocal()
+        try:
+            query = db.query(
+                models.Transaction.id,
+                models.Transaction.transaction_id,
+                models.Transaction.created_at,
+            ).filter(
+                models.Transaction._status == models.TransactionStatus.PROCESSING,
+                models.Transaction.created_at < cutoff,
+            )
+            if cursor is not None:
+                created_at, last_id = cursor
+                query = query.filter(
+                    or_(
+                        models.Transaction.created_at > created_at,
+                        and_(
+                            models.Transaction.created_at == created_at,
+                            models.Transaction.id > last_id,
+                        ),
+                    )
+                )
+            return (
+                query.order_by(models.Transaction.created_at, models.Transaction.id)
+                .limit(RECONCILE_BATCH_SIZE)
+                .all()
+            )
+        finally:
+            db.close()
+
+    async def _query(
+        self, checkout_request_id: str, limiter: RateLimiter, slots: asyncio.Semaphore
+    ) -> Optional[Dict[str, Any]]:
+        """Query one push, backing off on throttling and server errors.
+
+        Returns the Daraja response body, or None if every attempt failed.
+        """
+        for attempt in range(RECONCILE_MAX_ATTEMPTS):
+            try:
+                async with slots:
+                    await limiter.wait()
+                    response = await self.repository.query_status(checkout_request_id)
+                data = response.json()
+                if (
+                    response.status_code < 400
+                    or data.get("errorCode") == STILL_PROCESSING_ERROR
+                ):
+                    return data
+                logger.warning(
+                    "stkpushquery for %s returned %s: %s",
+                    checkout_request_id,
+                    response.status_code,
+                    data.get("errorMessage"),
+                )
+            except (httpx.HTTPError, HTTPException, ValueError) as e:
+                logger.warning("stkpushquery for %s failed: %r", checkout_request_id, e)
+            if attempt + 1 < RECONCILE_MAX_ATTEMPTS:
+                delay = RECONCILE_BACKOFF_SECONDS * 2**attempt
+                await asyncio.sleep(delay + random.uniform(0, delay))
+        return None
+
+    def _apply(self, results: Dict[int, Optional[Dict[str, Any]]]):
+        """Apply one batch of query results in a single transaction"""
+        give_up_before = datetime.utcnow() - timedelta(
+            seconds=RECONCILE_TIMEOUT_SECONDS
+        )
+        db = SessionLocal()
+        try:
+            transactions = (
+                db.query(models.Transaction)
+                .filter(
+                    models.Transaction.id.in_(list(results)),
+                    # A callback may have landed while we were querying
+                    models.Transaction._status == models.TransactionStatus.PROCESSING,
+                )
+                .all()
+            )
+            # Built before commit, which expires the loaded attributes
+            events = []
+            for transaction in transactions:
+                data = results[transaction.id]
+                if data is not None and "ResultCode" in data:
+                    # Reshape the query response into the callback format
+                    callback = {
+                        "body": {
+                            "stkCallback": {
+                                "merchantRequestID": data.get("MerchantRequestID"),
+                                "checkoutRequestID": transaction.transaction_id,
+                                "resultCode": int(data["ResultCode"]),
+                                "resultDesc": data.get("ResultDesc"),
+                            }
+                        }
+                    }
+                    if apply_stk_callback(
+                        db, transaction, callback, event_type="query", raw_payload=data
+                    ):
+                        self.reconciled += 1
+                        events.append(transaction_event(transaction))
+                        logger.info(
+                            "Transaction %s reconciled: status %s",
+                            transaction.id,
+                            transaction._status,
+                        )
+                elif transaction.created_at < give_up_before:
+                    transaction._status = models.TransactionStatus.REJECTED
+                    transaction.result_desc = "No result from M-Pesa before timeout"
+                    record_event(db, transaction.id, "timeout", data or {})
+                    self.timed_out += 1
+                    events.append(transaction_event(transaction))
+                    logger.warning(
+                        "Transaction %s timed out without a result", transaction.id
+                    )
+                elif data is None:
+                    # Retried on the next pass until the timeout above applies
+                    self.errors += 1
+                else:
+                    self.still_pending += 1
+            db.commit()
+            for event in events:
+                broker.publish(event["order_id"], event)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def reconcile_once(self) -> Dict[str, Any]:
+        """Run one full pass over the stale transactions"""
+        async with self._running:
+            start = time.monotonic()
+            limiter = RateLimiter(RECONCILE_RATE_PER_SECOND)
+            slots = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+            cursor = None
+            while True:
+                rows = await run_in_threadpool(self._load_batch, cursor)
+                if not rows:
+                    break
+                self.scanned += len(rows)
+                responses = await asyncio.gather(
+                    *(
+                        self._query(checkout_request_id, limiter, slots)
+                        for _, checkout_request_id, _ in rows
+                        if checkout_request_id is not None
+                    )
+                )
+                # Rows saved without a CheckoutRequestID cannot be queried;
+                # they get no result and are timed out once old enough
+                queried = iter(responses)
+                responses = [
+                    next(queried) if checkout_request_id is not None else None
+                    for _, checkout_request_id, _ in rows
+                ]
+                await run_in_threadpool(
+                    self._apply, {row[0]: data for row, data in zip(rows, responses)}
+                )
+                cursor = (rows[-1][2], rows[-1][0])
+                if len(rows) < RECONCILE_BATCH_SIZE:
+                    break
+            self.runs += 1
+            self.last_run_at = datetime.utcnow()
+            self.last_run_seconds = round(time.monotonic() - start, 3)
+            return self.stats()
+
+    async def run(self):
+        """Background loop started from the application startup hook"""
+        while True:
+            await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+            try:
+                await self.reconcile_once()
+            except Exception as e:
+                logger.error("Error reconciling transactions: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "scanned": self.scanned,
+            "reconciled": self.reconciled,
+            "timed_out": self.timed_out,
+            "still_pending": self.still_pending,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at,
+            "last_run_seconds": self.last_run_seconds,
+        }
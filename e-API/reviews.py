@@ -0,0 +1,99 @@
+"""
+Keyset-paginated product reviews.
+
+Pages are ordered newest first (``recent``) or by rating, highest first,
+with recency as the tie-breaker (``rating``). The cursor carries the sort
+key of the last review on the page, so each page is one index range scan
+on ``reviews`` no matter how deep the client has paged.
+"""
+
+import base64
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+import models
+
+REVIEW_SORTS = ("recent", "rating")
+# Reviews embedded in the product detail response and the default page size
+REVIEW_PAGE_SIZE = int(os.getenv("REVIEW_PAGE_SIZE", "10"))
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a cursor that does not decode for the requested sort"""
+
+
+def _sort_columns(sort: str):
+    review = models.Review
+    if sort == "rating":
+        return [review.rating, review.created_at, review.id]
+    return [review.created_at, review.id]
+
+
+def encode_cursor(sort: str, row) -> str:
+    values = [str(row.rating)] if sort == "rating" else []
+    values += [row.created_at.isoformat(), str(row.id)]
+    return base64.urlsafe_b64encode("|".join(values).encode()).decode()
+
+
+def decode_cursor(sort: str, cursor: str) -> List[Any]:
+    try:
+        parts = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if sort == "rating":
+            rating, created_at, review_id = parts
+            return [int(rating), datetime.fromisoformat(created_at), int(review_id)]
+        created_at, review_id = parts
+        return [datetime.fromisoformat(created_at), int(review_id)]
+    except ValueError:
+        raise InvalidCursorError("Invalid cursor")
+
+
+def _after(columns, values):
+    """Rows strictly after ``values`` in descending ``columns`` order"""
+    column, value = columns[0], values[0]
+    if len(columns) == 1:
+        return column < value
+    return or_(column < value, and_(column == value, _after(columns[1:], values[1:])))
+
+
+def review_rows(db: Session):
+    """Projection of review fields plus the reviewer's username"""
+    return (
+        db.query(models.Review)
+        .outerjoin(models.Users, models.Users.id == models.Review.user_id)
+        .with_entities(
+            models.Review.id,
+            models.Review.user_id,
+            models.Review.product_id,
+            models.Review.order_id,
+            models.Review.rating,
+            models.Review.comment,
+            models.Review.created_at,
+            models.Users.username,
+        )
+    )
+
+
+def review_page(
+    db: Session,
+    product_id: int,
+    sort: str = "recent",
+    limit: int = 10,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """One page of a product's reviews with the cursor for the next page"""
+    columns = _sort_columns(sort)
+    query = review_rows(db).filter(models.Review.product_id == product_id)
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(sort, cursor)))
+    rows = query.order_by(*(c.desc() for c in columns)).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "reviews": rows,
+        "next_cursor": encode_cursor(sort, rows[-1]) if has_more else None,
+    }
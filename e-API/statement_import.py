@@ -0,0 +1,289 @@
+"""
+Matching of M-Pesa statement exports against recorded transactions.
+
+The statement is read as a stream and processed in chunks. For each chunk,
+the candidate transactions are loaded with two projected IN queries: one by
+receipt code and one by account reference. They are kept in dict hash maps,
+and the chunk's status changes are written with a single bulk UPDATE. Only
+one chunk is ever held in memory.
+
+Matching by account reference only settles attempts that are still
+PROCESSING. A row whose amount matches an attempt the callback already
+closed is reported as a conflict rather than overriding that outcome.
+"""
+
+import csv
+import io
+import logging
+import os
+from decimal import Decimal, InvalidOperation
+from typing import IO, Any, Dict, List, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+import models
+from payment_events import broker
+from transaction_events import encode_payload
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_CHUNK_SIZE = int(os.getenv("STATEMENT_CHUNK_SIZE", "5000"))
+# Cap on unmatched/mismatched rows listed in the report (counts are exact)
+STATEMENT_REPORT_LIMIT = int(os.getenv("STATEMENT_REPORT_LIMIT", "1000"))
+
+# Accepted spellings of the columns we need, after lower-casing
+COLUMN_ALIASES = {
+    "receipt": ("receipt no.", "receipt no", "receipt", "transaction_code"),
+    "amount": ("paid in", "amount"),
+    "account": ("a/c no.", "a/c no", "account_reference", "account"),
+    "status": ("transaction status", "status"),
+}
+
+
+def _resolve_columns(header: List[str]) -> Dict[str, Optional[int]]:
+    normalized = [h.strip().lower() for h in header]
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        columns[key] = next(
+            (normalized.index(a) for a in aliases if a in normalized), None
+        )
+    if columns["receipt"] is None or columns["amount"] is None:
+        raise ValueError("Statement needs 'Receipt No.' and 'Paid In' columns")
+    return columns
+
+
+def _parse_amount(value: str) -> Optional[Decimal]:
+    try:
+        return Decimal(value.replace(",", "").strip())
+    except InvalidOperation:
+        return None
+
+
+class StatementImport:
+    """One statement import run and its report"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.counts = {
+            "rows": 0,
+            "skipped": 0,
+            "already_accepted": 0,
+            "updated": 0,
+            "unmatched": 0,
+            "mismatched": 0,
+            "conflicts": 0,
+            "duplicates": 0,
+        }
+        self.seen_receipts = set()
+        self.unmatched: List[Dict[str, Any]] = []
+        self.mismatched: List[Dict[str, Any]] = []
+        self.conflicts: List[Dict[str, Any]] = []
+
+    def run(self, stream: IO[bytes]) -> Dict[str, Any]:
+        reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("Statement is empty")
+        columns = _resolve_columns(header)
+
+        chunk = []
+        for line_number, row in enumerate(reader, start=2):
+            if not any(row):
+                continue
+            chunk.append((line_number, row))
+            if len(chunk) >= STATEMENT_CHUNK_SIZE:
+                self._process_chunk(chunk, columns)
+                chunk = []
+        if chunk:
+            self._process_chunk(chunk, columns)
+
+        return {
+            **self.counts,
+            "unmatched_rows": self.unmatched,
+            "mismatched_rows": self.mismatched,
+            "conflicting_rows": self.conflicts,
+        }
+
+    def _report(self, target: List, entry: Dict[str, Any]):
+        if len(target) < STATEMENT_REPORT_LIMIT:
+            target.append(entry)
+
+    def _process_chunk(self, chunk, columns):
+        entries = []
+        for line_number, row in chunk:
+            self.counts["rows"] += 1
+
+            def cell(key):
+                index = columns[key]
+                return (
+                    row[index].strip() if index is not None and index < len(row) else ""
+                )
+
+            status_text = cell("status").lower()
+            amount = _parse_amount(cell("amount"))
+            receipt = cell("receipt")
+            # Only completed incoming payments can settle a transaction
+            if (
+                (status_text and status_text != "completed")
+                or not receipt
+                or not amount
+            ):
+                self.counts["skipped"] += 1
+                continue
+            entries.append((line_number, receipt, cell("account"), amount))
+        if not entries:
+            return
+
+        columns_loaded = (
+            models.Transaction.id,
+            models.Transaction._pid.label("order_id"),
+            models.Transaction.transaction_id.label("checkout_request_id"),
+            models.Transaction.transaction_code,
+            models.Transaction.account_reference,
+            models.Transaction.transaction_amount,
+            models.Transaction._status.label("status"),
+            models.Transaction.created_at,
+        )
+        by_receipt = {
+            t.transaction_code: t
+            for t in self.db.query(models.Transaction)
+            .with_entities(*columns_loaded)
+            .filter(models.Transaction.transaction_code.in_({e[1] for e in entries}))
+        }
+        accounts = {e[2] for e in entries if e[2] and e[1] not in by_receipt}
+        # Only attempts still awaiting their callback can be settled by account
+        # reference; one the callback already closed is left for manual review
+        by_account: Dict[str, list] = {}
+        settled_by_account: Dict[str, list] = {}
+        if accounts:
+            for t in (
+                self.db.query(models.Transaction)
+                .with_entities(*columns_loaded)
+                .filter(
+                    models.Transaction.account_reference.in_(accounts),
+                    models.Transaction.transaction_code.is_(None),
+                )
+                .order_by(models.Transaction.created_at.desc())
+            ):
+                target = (
+                    by_account
+                    if t.status == models.TransactionStatus.PROCESSING
+                    else settled_by_account
+                )
+                target.setdefault(t.account_reference, []).append(t)
+
+        updates, events, published = [], [], []
+        for line_number, receipt, account, amount in entries:
+            if receipt in self.seen_receipts:
+                self.counts["duplicates"] += 1
+                continue
+            self.seen_receipts.add(receipt)
+
+            transaction = by_receipt.get(receipt)
+            if transaction is None:
+                candidates = by_account.get(account, [])
+                # Newest unclaimed attempt for the account with the same amount
+                transaction = next(
+                    (t for t in candidates if t.transaction_amount == amount), None
+                )
+                if transaction is None:
+                    # Same amount on an attempt the callback already closed
+                    settled = next(
+                        (
+                            t
+                            for t in settled_by_account.get(account, [])
+                            if t.transaction_amount == amount
+                        ),
+                        None,
+                    )
+                    if settled is not None:
+                        self._conflict(line_number, receipt, account, amount, settled)
+                        continue
+                if transaction is None and candidates:
+                    self._mismatch(line_number, receipt, account, amount, candidates[0])
+                    continue
+                if transaction is not None:
+                    candidates.remove(transaction)
+            if transaction is None:
+                self.counts["unmatched"] += 1
+                self._report(
+                    self.unmatched,
+                    {
+                        "line": line_number,
+                        "receipt": receipt,
+                        "account_reference": account,
+                        "amount": float(amount),
+                    },
+                )
+                continue
+            if transaction.transaction_amount != amount:
+                self._mismatch(line_number, receipt, account, amount, transaction)
+                continue
+            if transaction.status == models.TransactionStatus.ACCEPTED:
+                self.counts["already_accepted"] += 1
+                continue
+
+            updates.append(
+                {
+                    "id": transaction.id,
+                    "_status": models.TransactionStatus.ACCEPTED,
+                    "transaction_code": receipt,
+                }
+            )
+            payload, compressed = encode_payload(
+                {"line": line_number, "receipt": receipt, "amount": str(amount)}
+            )
+            events.append(
+                {
+                    "transaction_id": transaction.id,
+                    "event_type": "statement",
+                    "payload": payload,
+                    "compressed": compressed,
+                }
+            )
+            published.append(
+                {
+                    "order_id": transaction.order_id,
+                    "transaction_id": transaction.checkout_request_id,
+                    "status": models.TransactionStatus.ACCEPTED.value,
+                    "status_name": models.TransactionStatus.ACCEPTED.name,
+                    "transaction_code": receipt,
+                }
+            )
+
+        if updates:
+            self.db.execute(update(models.Transaction), updates)
+            self.db.execute(insert(models.TransactionEvent), events)
+            self.db.commit()
+            self.counts["updated"] += len(updates)
+            for event in published:
+                broker.publish(event["order_id"], event)
+
+    def _conflict(self, line_number, receipt, account, amount, transaction):
+        self.counts["conflicts"] += 1
+        self._report(
+            self.conflicts,
+            {
+                "line": line_number,
+                "receipt": receipt,
+                "account_reference": account,
+                "amount": float(amount),
+                "transaction_id": transaction.id,
+                "transaction_status": transaction.status.name,
+            },
+        )
+
+    def _mismatch(self, line_number, receipt, account, amount, transaction):
+        self.counts["mismatched"] += 1
+        self._report(
+            self.mismatched,
+            {
+                "line": line_number,
+                "receipt": receipt,
+                "account_reference": account,
+                "statement_amount": float(amount),
+                "transaction_id": transaction.id,
+                "transaction_amount": float(transaction.transaction_amount),
+            },
+        )
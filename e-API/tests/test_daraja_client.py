@@ -0,0 +1,112 @@
+"""
+Stub-based tests for the pooled Daraja client in lnmo.py.
+
+Daraja is replaced by an ``httpx.MockTransport`` on the shared client, so
+these run without network access or credentials.
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for var in (
+    "MPESA_LNMO_CONSUMER_KEY",
+    "MPESA_LNMO_CONSUMER_SECRET",
+    "MPESA_LNMO_PASS_KEY",
+    "MPESA_LNMO_SHORT_CODE",
+    "MPESA_CALLBACK_URL",
+):
+    os.environ.setdefault(var, "test")
+
+from lnmo import LNMORepository  # noqa: E402
+
+STK_PUSH = "/mpesa/stkpush/v1/processrequest"
+
+
+class FakeDaraja:
+    """Counts requests and hands out numbered tokens"""
+
+    def __init__(self, reject_tokens=()):
+        self.oauth_calls = 0
+        self.api_calls = []
+        self.reject_tokens = set(reject_tokens)
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/oauth/v1/generate":
+            self.oauth_calls += 1
+            # Give concurrent callers a chance to pile up behind the lock
+            await asyncio.sleep(0.01)
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": f"token-{self.oauth_calls}",
+                    "expires_in": "3599",
+                },
+            )
+        token = request.headers["Authorization"].removeprefix("Bearer ")
+        self.api_calls.append(token)
+        if token in self.reject_tokens:
+            return httpx.Response(401, json={"errorMessage": "Invalid Access Token"})
+        return httpx.Response(200, json={"ResponseCode": "0"})
+
+
+def make_repository(daraja: FakeDaraja) -> LNMORepository:
+    repository = LNMORepository()
+    repository._client = httpx.AsyncClient(
+        base_url="https://daraja.test", transport=httpx.MockTransport(daraja)
+    )
+    return repository
+
+
+def test_concurrent_token_requests_share_one_oauth_call():
+    daraja = FakeDaraja()
+    repository = make_repository(daraja)
+
+    async def scenario():
+        try:
+            return await asyncio.gather(
+                *(repository.generate_access_token() for _ in range(20))
+            )
+        finally:
+            await repository.aclose()
+
+    tokens = asyncio.run(scenario())
+
+    assert daraja.oauth_calls == 1
+    assert set(tokens) == {"token-1"}
+
+
+def test_rejected_token_is_refreshed_and_retried_once():
+    daraja = FakeDaraja(reject_tokens={"token-1"})
+    repository = make_repository(daraja)
+
+    async def scenario():
+        try:
+            return await repository._post(STK_PUSH, {"Amount": "1"})
+        finally:
+            await repository.aclose()
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert daraja.oauth_calls == 2
+    assert daraja.api_calls == ["token-1", "token-2"]
+
+
+def test_second_rejection_is_returned_without_another_retry():
+    daraja = FakeDaraja(reject_tokens={"token-1", "token-2", "token-3"})
+    repository = make_repository(daraja)
+
+    async def scenario():
+        try:
+            return await repository._post(STK_PUSH, {"Amount": "1"})
+        finally:
+            await repository.aclose()
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 401
+    assert daraja.api_calls == ["token-1", "token-2"]
@@ -0,0 +1,50 @@
+"""
+Tests for refresh token rotation under concurrent use.
+
+Each TokenRevocationList stands in for one API worker; they share a
+database, as the real workers share MySQL.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth import TokenRevocationList  # noqa: E402
+from models import RevokedToken, Users  # noqa: E402
+
+
+def make_session_factory():
+    engine = create_engine("sqlite://")
+    Users.__table__.create(engine)
+    RevokedToken.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_refresh_token_recorded_by_another_worker_is_rejected():
+    Session = make_session_factory()
+    expires_at = datetime.utcnow() + timedelta(days=7)
+    first, second = TokenRevocationList(), TokenRevocationList()
+
+    with Session() as db:
+        assert first.revoke(db, "jti-1", expires_at, "refresh") is True
+    with Session() as db:
+        # Unique jti violation: rolled back and reported, not raised
+        assert second.revoke(db, "jti-1", expires_at, "refresh") is False
+        # The session is still usable after the rollback
+        assert db.query(RevokedToken).count() == 1
+    assert second.is_revoked("jti-1")
+
+
+def test_replayed_refresh_token_is_rejected_by_the_same_worker():
+    Session = make_session_factory()
+    expires_at = datetime.utcnow() + timedelta(days=7)
+    revocation_list = TokenRevocationList()
+
+    with Session() as db:
+        assert revocation_list.revoke(db, "jti-1", expires_at, "refresh") is True
+        assert revocation_list.revoke(db, "jti-1", expires_at, "refresh") is False
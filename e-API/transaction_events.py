@@ -0,0 +1,67 @@
+"""
+Storage for raw Daraja payloads in the append-only transaction_events table.
+
+The transactions row keeps only parsed fields (status, result code,
+receipt number); the STK push response, callbacks and status query
+results are appended here, zlib-compressed once they pass a size
+threshold.
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+
+TRANSACTION_EVENTS_COMPRESS = (
+    os.getenv("TRANSACTION_EVENTS_COMPRESS", "true").lower() == "true"
+)
+# Small payloads barely shrink and are cheaper to read uncompressed
+TRANSACTION_EVENTS_COMPRESS_MIN_BYTES = int(
+    os.getenv("TRANSACTION_EVENTS_COMPRESS_MIN_BYTES", "256")
+)
+
+
+def encode_payload(payload: Dict[str, Any]) -> Tuple[bytes, bool]:
+    """Serialize a payload; returns (bytes, compressed)"""
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    if (
+        TRANSACTION_EVENTS_COMPRESS
+        and len(raw) >= TRANSACTION_EVENTS_COMPRESS_MIN_BYTES
+    ):
+        return zlib.compress(raw), True
+    return raw, False
+
+
+def decode_payload(event: models.TransactionEvent) -> Dict[str, Any]:
+    raw = zlib.decompress(event.payload) if event.compressed else event.payload
+    return json.loads(raw)
+
+
+def record_event(
+    db: Session, transaction_id: int, event_type: str, payload: Dict[str, Any]
+) -> models.TransactionEvent:
+    """Append a payload to the log (the caller commits)"""
+    data, compressed = encode_payload(payload)
+    event = models.TransactionEvent(
+        transaction_id=transaction_id,
+        event_type=event_type,
+        payload=data,
+        compressed=compressed,
+    )
+    db.add(event)
+    return event
+
+
+def latest_payload(db: Session, transaction_id: int) -> Optional[Dict[str, Any]]:
+    """Most recent raw payload recorded for a transaction"""
+    event = (
+        db.query(models.TransactionEvent)
+        .filter(models.TransactionEvent.transaction_id == transaction_id)
+        .order_by(models.TransactionEvent.id.desc())
+        .first()
+    )
+    return decode_payload(event) if event else None
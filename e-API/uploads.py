@@ -0,0 +1,151 @@
+"""
+Streaming storage of uploaded images.
+
+Uploads are copied to a temporary file in fixed-size chunks, so memory use
+per upload stays at one chunk whatever the file size, and the copy stops as
+soon as the size limit is passed. The file type is taken from the leading
+magic bytes rather than the client's ``content_type`` or file name. Disk
+writes run in the threadpool, and the finished file is moved into
+``UPLOAD_DIR`` with an atomic ``os.replace``, so a partial upload is never
+visible under ``/uploads``.
+
+Files are content-addressed: the name is the SHA-256 digest of the bytes,
+so uploading the same image twice stores it once, and a URL always refers
+to the same content.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_DIR = Path("uploads")
+# Temp files live next to the uploads so the final rename stays on one filesystem
+UPLOAD_TMP_DIR = UPLOAD_DIR / ".tmp"
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Files accepted by one /upload-images request, and how many are copied at once
+UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", "10"))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+# ((offset, magic bytes), ...), extension) for the accepted image formats;
+# every part must match. WebP is a RIFF container with "WEBP" at offset 8.
+IMAGE_SIGNATURES = (
+    (((0, b"\xff\xd8\xff"),), "jpg"),
+    (((0, b"\x89PNG\r\n\x1a\n"),), "png"),
+    (((0, b"GIF87a"),), "gif"),
+    (((0, b"GIF89a"),), "gif"),
+    (((0, b"RIFF"), (8, b"WEBP")), "webp"),
+)
+SNIFF_BYTES = max(
+    offset + len(magic) for parts, _ in IMAGE_SIGNATURES for offset, magic in parts
+)
+
+
+class UploadRejected(Exception):
+    """Raised for uploads that are too large or not a supported image"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Extension for the image format ``head`` starts with, if supported"""
+    for parts, extension in IMAGE_SIGNATURES:
+        if all(head.startswith(magic, offset) for offset, magic in parts):
+            return extension
+    return None
+
+
+def ensure_upload_dirs():
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    UPLOAD_TMP_DIR.mkdir(exist_ok=True)
+
+
+def _too_large():
+    return UploadRejected(
+        413, f"File size exceeds {UPLOAD_MAX_BYTES // (1024 * 1024)}MB limit"
+    )
+
+
+def check_content_length(content_length: Optional[str], files: int = 1):
+    """Reject a request up front when its declared size is over the limit.
+
+    The multipart envelope adds a little on top of each file, so this only
+    catches clearly oversized bodies; the streaming copy enforces the exact
+    per-file limit.
+    """
+    if content_length and content_length.isdigit():
+        if int(content_length) > files * (UPLOAD_MAX_BYTES + UPLOAD_CHUNK_SIZE):
+            raise _too_large()
+
+
+async def save_upload(file: UploadFile) -> str:
+    """Stream an uploaded image into UPLOAD_DIR; returns the stored file name"""
+    tmp = await run_in_threadpool(
+        tempfile.NamedTemporaryFile, dir=UPLOAD_TMP_DIR, delete=False
+    )
+    try:
+        size = 0
+        head = b""
+        extension = None
+        digest = hashlib.sha256()
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > UPLOAD_MAX_BYTES:
+                raise _too_large()
+            if extension is None:
+                head += chunk[: SNIFF_BYTES - len(head)]
+                if len(head) >= SNIFF_BYTES:
+                    extension = sniff_image_type(head)
+                    if extension is None:
+                        raise UploadRejected(400, "Unsupported image format")
+            await run_in_threadpool(_write_chunk, tmp, digest, chunk)
+        if extension is None:
+            # Shorter than the longest signature
+            extension = sniff_image_type(head)
+            if extension is None:
+                raise UploadRejected(400, "Unsupported image format")
+        await run_in_threadpool(tmp.close)
+
+        filename = f"{digest.hexdigest()}.{extension}"
+        await run_in_threadpool(_publish, tmp.name, UPLOAD_DIR / filename)
+        return filename
+    except BaseException:
+        await run_in_threadpool(_discard, tmp)
+        raise
+
+
+def _write_chunk(tmp, digest, chunk: bytes):
+    digest.update(chunk)
+    tmp.write(chunk)
+
+
+def _publish(tmp_name: str, destination: Path):
+    if destination.exists():
+        # Same content is already stored; refresh its age for release_image
+        os.unlink(tmp_name)
+        now = time.time()
+        os.utime(destination, (now, now))
+        return
+    # Temp files are created owner-only; uploads are served to everyone
+    os.chmod(tmp_name, 0o644)
+    os.replace(tmp_name, destination)
+
+
+def _discard(tmp):
+    tmp.close()
+    try:
+        os.unlink(tmp.name)
+    except FileNotFoundError:
+        pass
@@ -242,7 +242,7 @@ const AddProduct: React.FC<AddProductProps> = ({ onClose }) => {
     const files = Array.from(e.target.files || []);
     const validFiles = files.filter((file) => {
       if (!file.type.startsWith("image/")) {
-        toast.error("Please select an image file (jpg, png, gif)");
+        toast.error("Please select an image file (jpg, png, gif, webp)");
         return false;
       }
       if (file.size > 20 * 1024 * 1024) {
@@ -296,13 +296,13 @@ const AddProduct: React.FC<AddProductProps> = ({ onClose }) => {
     try {
       let uploadedImageUrls: string[] = [];
 
-      // Upload all selected image files
-      for (let i = 0; i < imageFiles.length; i++) {
-        const formDataImage = new FormData();
-        formDataImage.append("file", imageFiles[i]);
+      // Upload all selected image files in one request
+      if (imageFiles.length > 0) {
+        const formDataImages = new FormData();
+        imageFiles.forEach((file) => formDataImages.append("files", file));
         const imageResponse = await axios.post(
-          `${import.meta.env.VITE_API_BASE_URL}/upload-image`,
-          formDataImage,
+          `${import.meta.env.VITE_API_BASE_URL}/upload-images`,
+          formDataImages,
           {
             headers: {
               Authorization: `Bearer ${token}`,
@@ -310,7 +310,13 @@ const AddProduct: React.FC<AddProductProps> = ({ onClose }) => {
             },
           }
         );
-        uploadedImageUrls.push(imageResponse.data.img_url);
+        for (const image of imageResponse.data.images) {
+          if (image.img_url) {
+            uploadedImageUrls.push(image.img_url);
+          } else {
+            toast.error(`${image.filename}: ${image.error}`);
+          }
+        }
       }
 
       // Prepare images array for API
@@ -713,7 +719,7 @@ const AddProduct: React.FC<AddProductProps> = ({ onClose }) => {
                 <div className="relative">
                   <input
                     type="file"
-                    accept="image/jpeg,image/png,image/gif"
+                    accept="image/jpeg,image/png,image/gif,image/webp"
                     multiple
                     onChange={handleImageChange}
                     className="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-purple-500 focus:border-transparent transition-all duration-200 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-purple-50 file:text-purple-700 hover:file:bg-purple-100"
@@ -721,7 +727,7 @@ const AddProduct: React.FC<AddProductProps> = ({ onClose }) => {
                 </div>
                 <p className="text-xs text-gray-500 mt-1">
                   Max file size: 20MB per image. Supported formats: JPG, PNG,
-                  GIF
+                  GIF, WebP
                 </p>
               </div>
               {imagePreviews.length > 0 && (
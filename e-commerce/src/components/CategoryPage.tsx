@@ -52,12 +52,11 @@ type Product = {
   images: Array<{
     id: number;
     img_url: string;
+    // Resized copies by size then format; null for external images
+    variants?: Record<string, Record<string, string>> | null;
   }>;
-  reviews: Array<{
-    id: number;
-    rating: number;
-    comment: string;
-  }>;
+  // Number of reviews behind rating; the reviews themselves are paged
+  rating_count?: number;
 };
 
 const CategoryProductsPage = () => {
@@ -85,9 +84,15 @@ const CategoryProductsPage = () => {
   );
 
   const { addToCart, getItemQuantity, removeFromCart } = useShoppingCart();
-  const { isFavorite, addFavorite, removeFavorite } = useFavorites();
+  const { isFavorite, addFavorite, removeFavorite, checkFavorites } =
+    useFavorites();
   const { isAuthenticated } = useAuth();
 
+  // Refresh the heart icons for the cards on screen
+  useEffect(() => {
+    checkFavorites(products.map((product) => product.id));
+  }, [products, checkFavorites]);
+
   // Get selected category object and cat (define only once, above all useEffects)
   const selectedCategoryObj =
     selectedCategory &&
@@ -397,14 +402,8 @@ const CategoryProductsPage = () => {
     return matchesSearch && matchesPrice;
   });
 
-  // Helper to get average rating from reviews array or fallback to product.rating
-  const getAverageRating = (product: Product) => {
-    if (product.reviews && product.reviews.length > 0) {
-      const sum = product.reviews.reduce((acc, r) => acc + (r.rating || 0), 0);
-      return sum / product.reviews.length;
-    }
-    return product.rating || 0;
-  };
+  // Average rating, maintained server-side from the product's reviews
+  const getAverageRating = (product: Product) => product.rating || 0;
 
   const sortedProducts = [...filteredProducts].sort(
     (a: Product, b: Product) => {
@@ -482,7 +481,9 @@ const CategoryProductsPage = () => {
   // Get product image URL
   const getProductImage = (product: Product) => {
     if (product.images && product.images.length > 0) {
-      const imageUrl = product.images[0].img_url;
+      // Grid cards use the card-sized variant rather than the original
+      const imageUrl =
+        product.images[0].variants?.card?.webp ?? product.images[0].img_url;
       return imageUrl.startsWith("http")
         ? imageUrl
         : `${import.meta.env.VITE_API_BASE_URL}${imageUrl}`;
@@ -870,7 +871,7 @@ const CategoryProductsPage = () => {
 
           {/* Rating */}
           <div className="mb-3">
-            {renderRating(product.rating, product.reviews?.length, product)}
+            {renderRating(product.rating, product.rating_count, product)}
           </div>
 
           {/* Price Section */}
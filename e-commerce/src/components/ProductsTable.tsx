@@ -29,6 +29,7 @@ interface Product {
   cost?: number;
   rating?: number;
   reviews?: number;
+  rating_count?: number;
   img_url?: string;
   category?: { id: string; name: string };
   brand?: string;
@@ -292,7 +293,7 @@ const ProductsTable: React.FC = () => {
       cost: product.cost ?? 0,
       original_price: product.original_price ?? product.price,
       rating: product.rating ?? 0,
-      reviews: product.reviews ?? 0,
+      reviews: product.rating_count ?? product.reviews ?? 0,
       discount: product.discount ?? 0,
       is_new: product.is_new ?? false,
       is_favorite: product.is_favorite ?? false,
@@ -586,31 +587,13 @@ const ProductsTable: React.FC = () => {
                         </td>
                         <td className="py-4 px-6">
                           <div className="flex flex-col gap-0.5">
-                            {Array.isArray(product.reviews) &&
-                            product.reviews.length > 0 ? (
-                              (() => {
-                                const count = product.reviews.length;
-                                const avg =
-                                  product.reviews.reduce(
-                                    (sum, r) => sum + (r.rating || 0),
-                                    0
-                                  ) / count;
-                                return (
-                                  <span className="text-sm text-gray-800">
-                                    {avg.toFixed(1)}{" "}
-                                    <span className="text-yellow-400">★</span>{" "}
-                                    from {count} review{count > 1 ? "s" : ""}
-                                  </span>
-                                );
-                              })()
-                            ) : typeof product.rating === "number" &&
-                              typeof product.reviews === "number" &&
-                              product.reviews > 0 ? (
+                            {typeof product.rating === "number" &&
+                            (product.rating_count ?? 0) > 0 ? (
                               <span className="text-sm text-gray-800">
                                 {product.rating.toFixed(1)}{" "}
                                 <span className="text-yellow-400">★</span> from{" "}
-                                {product.reviews} review
-                                {product.reviews > 1 ? "s" : ""}
+                                {product.rating_count} review
+                                {product.rating_count! > 1 ? "s" : ""}
                               </span>
                             ) : (
                               <span className="text-sm text-gray-400">
@@ -295,7 +295,7 @@ const UpdateProductModal: React.FC<UpdateProductModalProps> = ({
     const files = Array.from(e.target.files || []);
     const validFiles = files.filter((file) => {
       if (!file.type.startsWith("image/")) {
-        toast.error("Please select an image file (jpg, png, gif)");
+        toast.error("Please select an image file (jpg, png, gif, webp)");
         return false;
       }
       if (file.size > 20 * 1024 * 1024) {
@@ -369,14 +369,15 @@ const UpdateProductModal: React.FC<UpdateProductModalProps> = ({
     setIsSubmitting(true);
 
     try {
-      // Upload all selected image files
+      // Upload all selected image files and attach them to the product
       let uploadedImageUrls: string[] = [];
-      for (let i = 0; i < imageFiles.length; i++) {
-        const formDataImage = new FormData();
-        formDataImage.append("file", imageFiles[i]);
+      if (imageFiles.length > 0) {
+        const formDataImages = new FormData();
+        imageFiles.forEach((file) => formDataImages.append("files", file));
+        formDataImages.append("product_id", String(productToEdit.id));
         const imageResponse = await axios.post(
-          `${import.meta.env.VITE_API_BASE_URL}/upload-image`,
-          formDataImage,
+          `${import.meta.env.VITE_API_BASE_URL}/upload-images`,
+          formDataImages,
           {
             headers: {
               Authorization: `Bearer ${token}`,
@@ -384,15 +385,13 @@ const UpdateProductModal: React.FC<UpdateProductModalProps> = ({
             },
           }
         );
-        uploadedImageUrls.push(imageResponse.data.img_url);
-        // Add to backend images table
-        await axios.post(
-          `${import.meta.env.VITE_API_BASE_URL}/products/${
-            productToEdit.id
-          }/images`,
-          { img_url: imageResponse.data.img_url },
-          { headers: { Authorization: `Bearer ${token}` } }
-        );
+        for (const image of imageResponse.data.images) {
+          if (image.img_url) {
+            uploadedImageUrls.push(image.img_url);
+          } else {
+            toast.error(`${image.filename}: ${image.error}`);
+          }
+        }
       }
 
       // Update product (main fields)
@@ -801,7 +800,7 @@ const UpdateProductModal: React.FC<UpdateProductModalProps> = ({
                   <div className="relative">
                     <input
                       type="file"
-                      accept="image/jpeg,image/png,image/gif"
+                      accept="image/jpeg,image/png,image/gif,image/webp"
                       multiple
                       onChange={handleImageChange}
                       className="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-purple-500 focus:border-transparent transition-all duration-200 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-purple-50 file:text-purple-700 hover:file:bg-purple-100"
@@ -809,7 +808,7 @@ const UpdateProductModal: React.FC<UpdateProductModalProps> = ({
                   </div>
                   <p className="text-xs text-gray-500 mt-1">
                     Max file size: 20MB per image. Supported formats: JPG, PNG,
-                    GIF
+                    GIF, WebP
                   </p>
                 </div>
                 {(imagePreviews.length > 0 || existingImages.length > 0) && (
@@ -1,4 +1,11 @@
-import React, { createContext, useContext, useState, useEffect } from "react";
+import React, {
+  createContext,
+  useContext,
+  useState,
+  useEffect,
+  useCallback,
+} from "react";
+import axios, { AxiosError, InternalAxiosRequestConfig } from "axios";
 import { jwtDecode } from "jwt-decode";
 
 interface JwtPayload {
@@ -12,12 +19,67 @@ interface AuthContextType {
   isAuthenticated: boolean;
   token: string | null;
   role: string | null;
-  login: (token: string) => void;
+  login: (token: string, refreshToken?: string) => void;
   logout: () => void;
+  refreshAccessToken: () => Promise<string | null>;
 }
 
 const AuthContext = createContext<AuthContextType | undefined>(undefined);
 
+const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
+// Renew the access token this long before it expires
+const REFRESH_MARGIN_MS = 60 * 1000;
+
+const isExpired = (token: string, marginMs = 0) => {
+  try {
+    const decoded: JwtPayload = jwtDecode(token);
+    return decoded.exp * 1000 - marginMs < Date.now();
+  } catch {
+    return true;
+  }
+};
+
+const clearStoredTokens = () => {
+  localStorage.removeItem("token");
+  localStorage.removeItem("refresh_token");
+  localStorage.removeItem("isLoggedIn");
+};
+
+// Refresh tokens are single use, so concurrent callers share one request
+let refreshInFlight: Promise<string | null> | null = null;
+
+const requestTokenRefresh = (): Promise<string | null> => {
+  if (refreshInFlight) return refreshInFlight;
+  refreshInFlight = (async () => {
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (!refreshToken) return null;
+    try {
+      const response = await axios.post(`${API_BASE_URL}/auth/refresh`, {
+        refresh_token: refreshToken,
+      });
+      localStorage.setItem("token", response.data.access_token);
+      localStorage.setItem("refresh_token", response.data.refresh_token);
+      localStorage.setItem("isLoggedIn", "true");
+      return response.data.access_token as string;
+    } catch (err) {
+      // Another tab may have rotated the token first
+      const stored = localStorage.getItem("token");
+      if (
+        localStorage.getItem("refresh_token") !== refreshToken &&
+        stored &&
+        !isExpired(stored)
+      ) {
+        return stored;
+      }
+      console.error("Token refresh failed:", err);
+      return null;
+    }
+  })().finally(() => {
+    refreshInFlight = null;
+  });
+  return refreshInFlight;
+};
+
 export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({
   children,
 }) => {
@@ -29,35 +91,81 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({
   );
   const [role, setRole] = useState<string | null>(null);
 
-  // Decode token and check expiration
-  useEffect(() => {
-    if (token) {
-      try {
-        const decoded: JwtPayload = jwtDecode(token);
-        if (decoded.exp * 1000 < Date.now()) {
-          // Token is expired
-          setToken(null);
-          setRole(null);
-          setIsAuthenticated(false);
-          localStorage.removeItem("token");
-          localStorage.removeItem("isLoggedIn");
-        } else {
-          setRole(decoded.role);
-          setIsAuthenticated(true);
-        }
-      } catch (err) {
-        console.error("Invalid token:", err);
-        setToken(null);
-        setRole(null);
-        setIsAuthenticated(false);
-        localStorage.removeItem("token");
-        localStorage.removeItem("isLoggedIn");
-      }
+  const clearSession = useCallback(() => {
+    clearStoredTokens();
+    setToken(null);
+    setRole(null);
+    setIsAuthenticated(false);
+  }, []);
+
+  const refreshAccessToken = useCallback(async () => {
+    const newToken = await requestTokenRefresh();
+    if (newToken) {
+      setToken(newToken);
     } else {
+      clearSession();
+    }
+    return newToken;
+  }, [clearSession]);
+
+  // Decode token, refresh it shortly before it expires
+  useEffect(() => {
+    if (!token) {
       setRole(null);
       setIsAuthenticated(false);
+      return;
+    }
+    let decoded: JwtPayload;
+    try {
+      decoded = jwtDecode(token);
+    } catch (err) {
+      console.error("Invalid token:", err);
+      clearSession();
+      return;
+    }
+    const refreshIn = decoded.exp * 1000 - REFRESH_MARGIN_MS - Date.now();
+    if (refreshIn <= 0) {
+      // Expired or about to: keep the session only if it can be renewed
+      if (localStorage.getItem("refresh_token")) {
+        refreshAccessToken();
+      } else if (decoded.exp * 1000 < Date.now()) {
+        clearSession();
+        return;
+      }
     }
-  }, [token]);
+    setRole(decoded.role);
+    setIsAuthenticated(true);
+    if (refreshIn <= 0) return;
+    const timer = window.setTimeout(refreshAccessToken, refreshIn);
+    return () => window.clearTimeout(timer);
+  }, [token, refreshAccessToken, clearSession]);
+
+  // Retry requests rejected with 401 once, after renewing the access token
+  useEffect(() => {
+    const interceptor = axios.interceptors.response.use(
+      (response) => response,
+      async (error: AxiosError) => {
+        const config = error.config as
+          | (InternalAxiosRequestConfig & { _retried?: boolean })
+          | undefined;
+        if (
+          error.response?.status !== 401 ||
+          !config ||
+          config._retried ||
+          config.url?.includes("/auth/") ||
+          !localStorage.getItem("refresh_token")
+        ) {
+          return Promise.reject(error);
+        }
+        config._retried = true;
+        const newToken = await refreshAccessToken();
+        if (!newToken) return Promise.reject(error);
+        config.headers.set("Authorization", `Bearer ${newToken}`);
+        return axios(config);
+      }
+    );
+    return () => axios.interceptors.response.eject(interceptor);
+  }, [refreshAccessToken]);
 
   // Sync with localStorage changes
   useEffect(() => {
@@ -70,13 +178,30 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({
     return () => window.removeEventListener("storage", handleStorageChange);
   }, []);
 
-  const login = (newToken: string) => {
+  const login = (newToken: string, refreshToken?: string) => {
     localStorage.setItem("token", newToken);
     localStorage.setItem("isLoggedIn", "true");
+    if (refreshToken) {
+      localStorage.setItem("refresh_token", refreshToken);
+    } else {
+      localStorage.removeItem("refresh_token");
+    }
     setToken(newToken);
   };
 
   const logout = () => {
+    const accessToken = localStorage.getItem("token");
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (accessToken) {
+      // Revoke both tokens server-side; the local session ends regardless
+      axios
+        .post(
+          `${API_BASE_URL}/auth/logout`,
+          refreshToken ? { refresh_token: refreshToken } : {},
+          { headers: { Authorization: `Bearer ${accessToken}` } }
+        )
+        .catch(() => {});
+    }
     localStorage.clear();
     setToken(null);
     setRole(null);
@@ -85,7 +210,14 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({
 
   return (
     <AuthContext.Provider
-      value={{ isAuthenticated, token, role, login, logout }}
+      value={{
+        isAuthenticated,
+        token,
+        role,
+        login,
+        logout,
+        refreshAccessToken,
+      }}
     >
       {children}
     </AuthContext.Provider>
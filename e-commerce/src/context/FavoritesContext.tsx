@@ -4,6 +4,7 @@ import React, {
   useState,
   useEffect,
   useCallback,
+  useMemo,
 } from "react";
 import axios from "axios";
 import { useAuth } from "./AuthContext";
@@ -14,6 +15,7 @@ interface FavoritesContextType {
   addFavorite: (productId: string) => Promise<void>;
   removeFavorite: (productId: string) => Promise<void>;
   refreshFavorites: () => Promise<void>;
+  checkFavorites: (productIds: Array<string | number>) => Promise<void>;
 }
 
 const FavoritesContext = createContext<FavoritesContextType>({
@@ -22,19 +24,32 @@ const FavoritesContext = createContext<FavoritesContextType>({
   addFavorite: async () => {},
   removeFavorite: async () => {},
   refreshFavorites: async () => {},
+  checkFavorites: async () => {},
 });
 
 export const useFavorites = () => useContext(FavoritesContext);
 
+// /favorites/lookup accepts one page of product cards at a time
+const LOOKUP_BATCH_SIZE = 100;
+
 export const FavoritesProvider: React.FC<{ children: React.ReactNode }> = ({
   children,
 }) => {
   const { isAuthenticated, token } = useAuth();
-  const [favorites, setFavorites] = useState<Set<string>>(new Set());
+  // product id -> favorite id (null until the server has returned it)
+  const [favoriteIds, setFavoriteIds] = useState<Map<string, number | null>>(
+    new Map()
+  );
+  const favorites = useMemo(
+    () => new Set(favoriteIds.keys()),
+    [favoriteIds]
+  );
 
+  // The full list backs the wishlist page and the header badge, so it is
+  // loaded once per session; later updates go through /favorites/lookup
   const fetchFavorites = useCallback(async () => {
     if (!isAuthenticated || !token) {
-      setFavorites(new Set());
+      setFavoriteIds(new Map());
       return;
     }
     try {
@@ -44,10 +59,13 @@ export const FavoritesProvider: React.FC<{ children: React.ReactNode }> = ({
           headers: { Authorization: `Bearer ${token}` },
         }
       );
-      const ids = res.data.map((fav: any) => fav.product_id.toString());
-      setFavorites(new Set(ids));
+      setFavoriteIds(
+        new Map(
+          res.data.map((fav: any) => [fav.product_id.toString(), fav.id])
+        )
+      );
     } catch {
-      setFavorites(new Set());
+      setFavoriteIds(new Map());
     }
   }, [isAuthenticated, token]);
 
@@ -55,51 +73,91 @@ export const FavoritesProvider: React.FC<{ children: React.ReactNode }> = ({
     fetchFavorites();
   }, [fetchFavorites]);
 
-  const isFavorite = (productId: string) => favorites.has(productId);
+  // Reconcile the given products with the server, e.g. for a page of cards
+  const checkFavorites = useCallback(
+    async (productIds: Array<string | number>) => {
+      if (!isAuthenticated || !token || productIds.length === 0) return;
+      const ids = Array.from(new Set(productIds.map((id) => Number(id))));
+      try {
+        const favorited = new Set<string>();
+        for (let i = 0; i < ids.length; i += LOOKUP_BATCH_SIZE) {
+          const res = await axios.post(
+            `${import.meta.env.VITE_API_BASE_URL}/favorites/lookup`,
+            { product_ids: ids.slice(i, i + LOOKUP_BATCH_SIZE) },
+            { headers: { Authorization: `Bearer ${token}` } }
+          );
+          res.data.favorited.forEach((id: number) =>
+            favorited.add(id.toString())
+          );
+        }
+        setFavoriteIds((prev) => {
+          const next = new Map(prev);
+          let changed = false;
+          for (const id of ids.map(String)) {
+            if (favorited.has(id) && !next.has(id)) {
+              next.set(id, null);
+              changed = true;
+            } else if (!favorited.has(id) && next.has(id)) {
+              next.delete(id);
+              changed = true;
+            }
+          }
+          return changed ? next : prev;
+        });
+      } catch {
+        // Keep the current state; the next lookup will reconcile it
+      }
+    },
+    [isAuthenticated, token]
+  );
+
+  const isFavorite = (productId: string) => favoriteIds.has(productId);
 
   const addFavorite = async (productId: string) => {
-    setFavorites((prev) => new Set(prev).add(productId));
+    setFavoriteIds((prev) => new Map(prev).set(productId, null));
     try {
-      await axios.post(
+      const res = await axios.post(
         `${import.meta.env.VITE_API_BASE_URL}/favorites`,
         { product_id: parseInt(productId) },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchFavorites();
+      setFavoriteIds((prev) => new Map(prev).set(productId, res.data.id));
     } catch {
-      setFavorites((prev) => {
-        const newSet = new Set(prev);
-        newSet.delete(productId);
-        return newSet;
+      setFavoriteIds((prev) => {
+        const next = new Map(prev);
+        next.delete(productId);
+        return next;
       });
     }
   };
 
   const removeFavorite = async (productId: string) => {
-    setFavorites((prev) => {
-      const newSet = new Set(prev);
-      newSet.delete(productId);
-      return newSet;
+    const favoriteId = favoriteIds.get(productId);
+    setFavoriteIds((prev) => {
+      const next = new Map(prev);
+      next.delete(productId);
+      return next;
     });
     try {
-      const res = await axios.get(
-        `${import.meta.env.VITE_API_BASE_URL}/favorites`,
-        {
-          headers: { Authorization: `Bearer ${token}` },
-        }
-      );
-      const fav = res.data.find(
-        (f: any) => f.product_id === parseInt(productId)
-      );
-      if (fav) {
+      let id = favoriteId;
+      if (id == null) {
+        // Only known through a lookup so far; find the favorite's id
+        const res = await axios.get(
+          `${import.meta.env.VITE_API_BASE_URL}/favorites`,
+          { headers: { Authorization: `Bearer ${token}` } }
+        );
+        id = res.data.find(
+          (f: any) => f.product_id === parseInt(productId)
+        )?.id;
+      }
+      if (id != null) {
         await axios.delete(
-          `${import.meta.env.VITE_API_BASE_URL}/favorites/${fav.id}`,
+          `${import.meta.env.VITE_API_BASE_URL}/favorites/${id}`,
           { headers: { Authorization: `Bearer ${token}` } }
         );
       }
-      fetchFavorites();
     } catch {
-      setFavorites((prev) => new Set(prev).add(productId));
+      checkFavorites([productId]);
     }
   };
 
@@ -111,6 +169,7 @@ export const FavoritesProvider: React.FC<{ children: React.ReactNode }> = ({
         addFavorite,
         removeFavorite,
         refreshFavorites: fetchFavorites,
+        checkFavorites,
       }}
     >
       {children}
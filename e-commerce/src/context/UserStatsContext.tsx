@@ -44,33 +44,41 @@ export const UserStatsProvider: React.FC<{ children: React.ReactNode }> = ({
     }
     if (!currentUser) return;
     try {
-      const [orderRes, pendingRes, processingRes, favRes] = await Promise.all([
-        axios.get(`${API_BASE_URL}/orders`, {
-          params: { limit: 100, status: "delivered" },
-          headers: { Authorization: `Bearer ${token}` },
-        }),
-        axios.get(`${API_BASE_URL}/orders`, {
-          params: { limit: 100, status: "pending" },
-          headers: { Authorization: `Bearer ${token}` },
-        }),
-        axios.get(`${API_BASE_URL}/orders`, {
-          params: { limit: 100, status: "processing" },
-          headers: { Authorization: `Bearer ${token}` },
-        }),
-        axios.get(`${API_BASE_URL}/favorites`, {
-          headers: { Authorization: `Bearer ${token}` },
-        }),
-      ]);
+      const [orderRes, reviewsRes, pendingRes, processingRes, favRes] =
+        await Promise.all([
+          axios.get(`${API_BASE_URL}/orders`, {
+            params: { limit: 100, status: "delivered" },
+            headers: { Authorization: `Bearer ${token}` },
+          }),
+          axios.get(`${API_BASE_URL}/my-reviews`, {
+            headers: { Authorization: `Bearer ${token}` },
+          }),
+          axios.get(`${API_BASE_URL}/orders`, {
+            params: { limit: 100, status: "pending" },
+            headers: { Authorization: `Bearer ${token}` },
+          }),
+          axios.get(`${API_BASE_URL}/orders`, {
+            params: { limit: 100, status: "processing" },
+            headers: { Authorization: `Bearer ${token}` },
+          }),
+          axios.get(`${API_BASE_URL}/favorites`, {
+            headers: { Authorization: `Bearer ${token}` },
+          }),
+        ]);
       // Pending reviews
       const deliveredOrders = orderRes.data.items || [];
+      const reviewed = new Set(
+        (reviewsRes.data || []).map(
+          (rev: any) => `${rev.product_id}:${rev.order_id}`
+        )
+      );
       let reviewCount = 0;
       deliveredOrders.forEach((order: any) => {
         if (!order.order_details) return;
         order.order_details.forEach((detail: any) => {
           const product = detail.product;
-          const alreadyReviewed = (product.reviews || []).some(
-            (rev: any) =>
-              rev.user_id === currentUser!.id && rev.order_id === order.order_id
+          const alreadyReviewed = reviewed.has(
+            `${product.id}:${order.order_id}`
           );
           if (!alreadyReviewed) {
             reviewCount++;
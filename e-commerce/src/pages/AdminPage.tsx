@@ -76,10 +76,12 @@ interface ApiResponse<T> {
   pages?: number;
   detail?: string;
   access_token?: string;
+  refresh_token?: string;
 }
 
 const SuperAdminDashboard: React.FC = () => {
-  const { token, role, isAuthenticated, login, logout } = useAuth();
+  const { token, role, isAuthenticated, login, logout, refreshAccessToken } =
+    useAuth();
 
   // Component-specific state
   const [users, setUsers] = useState<User[]>([]);
@@ -143,10 +145,24 @@ const SuperAdminDashboard: React.FC = () => {
     options: RequestInit = {}
   ): Promise<ApiResponse<T>> => {
     try {
-      const response = await fetch(url, {
+      let response = await fetch(url, {
         headers: { "Content-Type": "application/json", ...options.headers },
         ...options,
       });
+      if (response.status === 401 && !url.includes("/auth/")) {
+        // Access token expired mid-session: renew it and retry once
+        const newToken = await refreshAccessToken();
+        if (newToken) {
+          response = await fetch(url, {
+            ...options,
+            headers: {
+              "Content-Type": "application/json",
+              ...options.headers,
+              Authorization: `Bearer ${newToken}`,
+            },
+          });
+        }
+      }
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({}));
         throw new Error(
@@ -202,7 +218,7 @@ const SuperAdminDashboard: React.FC = () => {
         }
       );
       if (response.access_token) {
-        login(response.access_token);
+        login(response.access_token, response.refresh_token);
         toast.success("Login successful!");
       }
     } catch (error: any) {
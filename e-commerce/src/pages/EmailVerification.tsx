@@ -47,7 +47,10 @@ const EmailVerification: React.FC = () => {
         console.log("Verification response:", response.data);
 
         if (response.data.access_token) {
-          login(response.data.access_token);
+          login(
+            response.data.access_token,
+            response.data.refresh_token
+          );
           if (isMounted) {
             setStatus("success");
             setMessage("Email verified successfully! Welcome to FlowTech!");
@@ -49,12 +49,11 @@ type Product = {
   images: Array<{
     id: number;
     img_url: string;
+    // Resized copies by size then format; null for external images
+    variants?: Record<string, Record<string, string>> | null;
   }>;
-  reviews: Array<{
-    id: number;
-    rating: number;
-    comment: string;
-  }>;
+  // Number of reviews behind rating; the reviews themselves are paged
+  rating_count?: number;
 };
 
 type Banner = {
@@ -86,9 +85,17 @@ const ModernEcommerceHomepage = () => {
   const [homepageBanners, setHomepageBanners] = useState<Banner[]>([]);
 
   const { addToCart, getItemQuantity, removeFromCart } = useShoppingCart();
-  const { isFavorite, addFavorite, removeFavorite } = useFavorites();
+  const { isFavorite, addFavorite, removeFavorite, checkFavorites } =
+    useFavorites();
   const { isAuthenticated } = useAuth();
 
+  // Refresh the heart icons for the cards on screen
+  useEffect(() => {
+    checkFavorites(
+      [...featuredProducts, ...topRatedProducts].map((product) => product.id)
+    );
+  }, [featuredProducts, topRatedProducts, checkFavorites]);
+
   // Newsletter subscription handler
   const handleNewsletterSubscription = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -142,14 +149,8 @@ const ModernEcommerceHomepage = () => {
     }
   };
 
-  // Helper to get average rating from reviews array or fallback to product.rating
-  const getAverageRating = (product: Product) => {
-    if (product.reviews && product.reviews.length > 0) {
-      const sum = product.reviews.reduce((acc, r) => acc + (r.rating || 0), 0);
-      return sum / product.reviews.length;
-    }
-    return product.rating || 0;
-  };
+  // Average rating, maintained server-side from the product's reviews
+  const getAverageRating = (product: Product) => product.rating || 0;
 
   // Fetch featured products (one per category, max 6)
   const fetchFeaturedProducts = async () => {
@@ -384,7 +385,9 @@ const ModernEcommerceHomepage = () => {
   // Get product image URL
   const getProductImage = (product: Product) => {
     if (product.images && product.images.length > 0) {
-      const imageUrl = product.images[0].img_url;
+      // Grid cards use the card-sized variant rather than the original
+      const imageUrl =
+        product.images[0].variants?.card?.webp ?? product.images[0].img_url;
       return imageUrl.startsWith("http")
         ? imageUrl
         : `${import.meta.env.VITE_API_BASE_URL}${imageUrl}`;
@@ -673,7 +676,7 @@ const ModernEcommerceHomepage = () => {
                             </div>
                             <span className="text-sm text-gray-600 ml-2">
                               ({getAverageRating(product).toFixed(1)}) •{" "}
-                              {product.reviews?.length || 0}
+                              {product.rating_count || 0}
                             </span>
                           </div>
 
@@ -777,7 +780,7 @@ const ModernEcommerceHomepage = () => {
                               </div>
                               <span className="text-xs text-gray-600 ml-1">
                                 {getAverageRating(product).toFixed(1)} (
-                                {product.reviews?.length || 0})
+                                {product.rating_count || 0})
                               </span>
                             </div>
                             <div className="flex items-center mt-1">
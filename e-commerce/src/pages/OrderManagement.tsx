@@ -109,8 +109,12 @@ const OrdersManagement: React.FC = () => {
   const [paymentStatus, setPaymentStatus] = useState("idle");
 
   const dropdownRefs = useRef<{ [key: number]: HTMLDivElement | null }>({});
+  // Stops the payment status stream (and any fallback polling)
+  const stopPaymentWatchRef = useRef<(() => void) | null>(null);
   const { refreshStats } = useUserStats();
 
+  useEffect(() => () => stopPaymentWatchRef.current?.(), []);
+
   const statusOptions = [
     { value: "", label: "All Statuses" },
     { value: "pending", label: "Pending" },
@@ -294,6 +298,100 @@ const OrdersManagement: React.FC = () => {
     return data.transaction.status;
   };
 
+  // Follow a payment through the status stream, polling only if it fails
+  const watchPayment = (orderId: number, checkoutRequestId?: string) => {
+    stopPaymentWatchRef.current?.();
+    let finished = false;
+    let source: EventSource | null = null;
+    let interval: ReturnType<typeof setInterval> | null = null;
+
+    const stop = () => {
+      finished = true;
+      source?.close();
+      if (interval) clearInterval(interval);
+      clearTimeout(timeout);
+      stopPaymentWatchRef.current = null;
+    };
+
+    const handleStatus = async (status: number) => {
+      if (finished) return;
+      if (status === 4) {
+        // ACCEPTED
+        stop();
+        await updateOrderStatus(orderId, "delivered");
+        setPaymentStatus("success");
+        setShowDeliveredModal(false);
+        setSelectedOrderForDelivery(null);
+        setMpesaPhone("");
+        toast.success("Payment confirmed and order marked as delivered.");
+        refreshStats();
+      } else if (status === 3 || status === 2) {
+        // REJECTED or CANCELLED
+        stop();
+        setPaymentStatus("error");
+        setError("Payment was rejected or cancelled");
+      }
+    };
+
+    const timeout = setTimeout(() => {
+      if (finished) return;
+      stop();
+      setPaymentStatus("error");
+      setError("Payment confirmation timed out");
+    }, 2 * 60 * 1000);
+
+    const startPolling = () => {
+      if (finished || interval) return;
+      source?.close();
+      interval = setInterval(async () => {
+        try {
+          await handleStatus(await checkTransactionStatus(orderId));
+        } catch {
+          // Try again on the next tick
+        }
+      }, 5000);
+    };
+
+    const openStream = async () => {
+      // EventSource cannot send headers, so the stream is opened with a
+      // short-lived single-use ticket instead of the access token
+      const response = await fetch(
+        `${
+          import.meta.env.VITE_API_BASE_URL
+        }/payments/lnmo/orders/${orderId}/events/ticket`,
+        {
+          method: "POST",
+          headers: { Authorization: `Bearer ${token}` },
+        }
+      );
+      if (!response.ok) throw new Error("Could not open payment stream");
+      const { ticket } = await response.json();
+      if (finished) return;
+
+      source = new EventSource(
+        `${
+          import.meta.env.VITE_API_BASE_URL
+        }/payments/lnmo/orders/${orderId}/events?ticket=${encodeURIComponent(
+          ticket
+        )}`
+      );
+      source.addEventListener("payment", (e) => {
+        const event = JSON.parse((e as MessageEvent).data);
+        // The first event may describe an earlier attempt for this order
+        if (checkoutRequestId && event.transaction_id !== checkoutRequestId) {
+          return;
+        }
+        handleStatus(event.status);
+      });
+      // The stream ends after a final status; any other error falls back to
+      // polling, since a reconnect would reuse the spent ticket
+      source.onerror = startPolling;
+    };
+
+    openStream().catch(startPolling);
+    stopPaymentWatchRef.current = stop;
+  };
+
   // Handle initiate payment
   const handleInitiatePayment = async (orderId: number, total: number) => {
     try {
@@ -310,34 +408,12 @@ const OrdersManagement: React.FC = () => {
         formattedPhone = "254" + mpesaPhone.substring(1);
       }
 
-      await initiateTransaction(orderId, formattedPhone, total);
-      let attempts = 0;
-      const maxAttempts = 24; // 2 minutes with 5-second intervals
-
-      const interval = setInterval(async () => {
-        attempts++;
-        const status = await checkTransactionStatus(orderId);
-        if (status === 4) {
-          // ACCEPTED
-          clearInterval(interval);
-          await updateOrderStatus(orderId, "delivered");
-          setPaymentStatus("success");
-          setShowDeliveredModal(false);
-          setSelectedOrderForDelivery(null);
-          setMpesaPhone("");
-          toast.success("Payment confirmed and order marked as delivered.");
-          refreshStats();
-        } else if (status === 3 || status === 2) {
-          // REJECTED or CANCELLED
-          clearInterval(interval);
-          setPaymentStatus("error");
-          setError("Payment was rejected or cancelled");
-        } else if (attempts >= maxAttempts) {
-          clearInterval(interval);
-          setPaymentStatus("error");
-          setError("Payment confirmation timed out");
-        }
-      }, 5000);
+      const checkoutRequestId = await initiateTransaction(
+        orderId,
+        formattedPhone,
+        total
+      );
+      watchPayment(orderId, checkoutRequestId);
     } catch (err: any) {
       setPaymentStatus("error");
       setError(err.message || "Failed to initiate payment");
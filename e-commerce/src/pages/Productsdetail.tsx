@@ -147,20 +147,13 @@ const ProductDetail: React.FC = () => {
           });
         }
 
-        // Fetch reviews first to calculate rating
-        let fetchedReviews: Review[] = [];
-        try {
-          const reviewsRes = await axios.get(
-            `${API_BASE_URL}/products/${data.id}/reviews`
-          );
-          fetchedReviews = reviewsRes.data;
-          setReviews(fetchedReviews);
-        } catch {
-          setReviews([]);
-        }
+        // The detail payload carries the first page of reviews and a summary
+        const fetchedReviews: Review[] = data.reviews || [];
+        setReviews(fetchedReviews);
 
-        // Calculate rating from reviews
-        const calculatedRating = calculateAverageRating(fetchedReviews);
+        const calculatedRating =
+          data.rating_summary?.average ?? calculateAverageRating(fetchedReviews);
+        const reviewCount = data.rating_summary?.count ?? fetchedReviews.length;
 
         // Compose product object with calculated rating
         const prod: Product = {
@@ -169,7 +162,7 @@ const ProductDetail: React.FC = () => {
           price: data.price,
           originalPrice: data.original_price,
           rating: calculatedRating, // Use calculated rating
-          reviews: fetchedReviews.length, // Use actual review count
+          reviews: reviewCount, // Use actual review count
           images,
           category: data.category?.name || "Uncategorized",
           brand: data.brand || "Unknown",
@@ -195,56 +188,41 @@ const ProductDetail: React.FC = () => {
             (p: any) => p.id !== data.id
           );
 
-          // Fetch reviews for each related product to calculate ratings
-          const relatedProductsWithRatings = await Promise.all(
-            relItems.map(async (item: any) => {
-              let itemRating = 0;
-              let itemReviewCount = 0;
-
-              try {
-                const itemReviewsRes = await axios.get(
-                  `${API_BASE_URL}/products/${item.id}/reviews`
-                );
-                const itemReviews = itemReviewsRes.data;
-                itemRating = calculateAverageRating(itemReviews);
-                itemReviewCount = itemReviews.length;
-              } catch {
-                // If reviews fetch fails, keep default values
-                itemRating = 0;
-                itemReviewCount = 0;
-              }
-
-              return {
-                id: item.id,
-                name: item.name,
-                price: item.price,
-                originalPrice: item.original_price,
-                rating: itemRating, // Use calculated rating
-                reviews: itemReviewCount, // Use actual review count
-                images:
-                  item.images && item.images.length > 0
-                    ? item.images.map((img: any) =>
-                        img.img_url.startsWith("http")
-                          ? img.img_url
-                          : `${API_BASE_URL}${img.img_url}`
-                      )
-                    : [
-                        "https://images.unsplash.com/photo-1560472354-b33ff0c44a43?w=400&h=400&fit=crop",
-                      ],
-                category: item.category?.name || "Uncategorized",
-                brand: item.brand || "Unknown",
-                inStock: item.stock_quantity > 0,
-                discount: item.discount || 0,
-                isNew: item.is_new || false,
-                isFavorite: false,
-                stockQuantity: item.stock_quantity,
-                description: item.description || "",
-                barcode: item.barcode,
-                createdAt: item.created_at,
-                specifications: {},
-              };
-            })
-          );
+          // Listing items carry their rating aggregates
+          const relatedProductsWithRatings = relItems.map((item: any) => {
+            const itemRating = item.rating || 0;
+            const itemReviewCount = item.rating_count || 0;
+
+            return {
+              id: item.id,
+              name: item.name,
+              price: item.price,
+              originalPrice: item.original_price,
+              rating: itemRating, // Use calculated rating
+              reviews: itemReviewCount, // Use actual review count
+              images:
+                item.images && item.images.length > 0
+                  ? item.images.map((img: any) =>
+                      img.img_url.startsWith("http")
+                        ? img.img_url
+                        : `${API_BASE_URL}${img.img_url}`
+                    )
+                  : [
+                      "https://images.unsplash.com/photo-1560472354-b33ff0c44a43?w=400&h=400&fit=crop",
+                    ],
+              category: item.category?.name || "Uncategorized",
+              brand: item.brand || "Unknown",
+              inStock: item.stock_quantity > 0,
+              discount: item.discount || 0,
+              isNew: item.is_new || false,
+              isFavorite: false,
+              stockQuantity: item.stock_quantity,
+              description: item.description || "",
+              barcode: item.barcode,
+              createdAt: item.created_at,
+              specifications: {},
+            };
+          });
 
           setRelatedProducts(relatedProductsWithRatings);
         } else {
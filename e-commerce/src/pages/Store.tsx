@@ -36,6 +36,7 @@ interface ApiProduct {
   cost?: number;
   rating?: number | ReviewObject[];
   reviews?: number | ReviewObject[];
+  rating_count?: number;
   img_url?: string;
   category?: { id: string; name: string };
   brand?: string;
@@ -98,9 +99,11 @@ const transformProduct = (apiProduct: ApiProduct): Product => {
     ratingValue = apiProduct.rating;
   }
 
-  // Handle reviews count: if reviews is an array, use its length
+  // Handle reviews count: prefer the maintained count, then the reviews array
   let reviewsCount = 0;
-  if (typeof apiProduct.reviews === "number") {
+  if (typeof apiProduct.rating_count === "number") {
+    reviewsCount = apiProduct.rating_count;
+  } else if (typeof apiProduct.reviews === "number") {
     reviewsCount = apiProduct.reviews;
   } else if (
     Array.isArray(apiProduct.reviews) &&
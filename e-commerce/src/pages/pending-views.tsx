@@ -216,12 +216,22 @@ const ReviewPage: React.FC = () => {
     const fetchPendingReviews = async () => {
       if (!token || !currentUser) return;
       try {
-        // Fetch all delivered orders
-        const orderRes = await axios.get(`${API_BASE_URL}/orders`, {
-          params: { limit: 100, status: "delivered" },
-          headers: { Authorization: `Bearer ${token}` },
-        });
+        // Fetch all delivered orders and the user's own reviews
+        const [orderRes, reviewsRes] = await Promise.all([
+          axios.get(`${API_BASE_URL}/orders`, {
+            params: { limit: 100, status: "delivered" },
+            headers: { Authorization: `Bearer ${token}` },
+          }),
+          axios.get(`${API_BASE_URL}/my-reviews`, {
+            headers: { Authorization: `Bearer ${token}` },
+          }),
+        ]);
         const deliveredOrders = orderRes.data.items || [];
+        const reviewed = new Set(
+          (reviewsRes.data || []).map(
+            (rev: any) => `${rev.product_id}:${rev.order_id}`
+          )
+        );
         // For each product in each order, check if the user has reviewed it for that order
         const productsToReview: Product[] = [];
         deliveredOrders.forEach((order: any) => {
@@ -229,10 +239,8 @@ const ReviewPage: React.FC = () => {
           order.order_details.forEach((detail: any) => {
             const product = detail.product;
             // Check if user has reviewed this product in this order
-            const alreadyReviewed = (product.reviews || []).some(
-              (rev: any) =>
-                rev.user_id === currentUser!.id &&
-                rev.order_id === order.order_id
+            const alreadyReviewed = reviewed.has(
+              `${product.id}:${order.order_id}`
             );
             if (!alreadyReviewed) {
               productsToReview.push({